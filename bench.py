@@ -0,0 +1,619 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lexer import lexer
+from parser import Parser, MemberAccess
+from typecheck import pointee
+from interpreter import Interpreter, deref
+from codegen_x86 import compile_source, build_executable
+from tiered import TieredInterpreter
+from stackless import StacklessInterpreter
+from memory import c_string
+from runtime import Runtime, Format
+from client import Client
+from visitor import Analysis, run_analyses
+
+
+SAMPLE_FUNCTION = """
+int f{n}(int a, int b) {{
+    int s = 0;
+    int i;
+    for (i = 0; i < a; i++) {{
+        if (i % 3 == 0) s += i * b;
+        else if (i % 3 == 1) s -= b;
+        else {{ while (s > 100) s = s / 2; }}
+    }}
+    switch (s) {{
+        case 0: s = 1; break;
+        case 1: s = 2;
+        default: s = s + 1;
+    }}
+    do {{ s--; }} while (s > 10);
+    return s;
+}}
+"""
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_parse(functions=2000):
+    code = "".join(SAMPLE_FUNCTION.format(n=n) for n in range(functions))
+    lex_time, tokens = best_of(lambda: lexer(code))
+    parse_time, _ = best_of(lambda: Parser(tokens).parse())
+    print(f"parse: {len(tokens)} tokens, {functions} functions")
+    print(f"  lexer : {lex_time * 1000:8.1f} ms  ({len(tokens) / lex_time:,.0f} tokens/s)")
+    print(f"  parser: {parse_time * 1000:8.1f} ms  ({len(tokens) / parse_time:,.0f} tokens/s)")
+
+
+MEMBER_PROGRAM = """
+struct vec { double x; double y; };
+struct particle { struct vec pos; struct vec vel; double mass; int alive; };
+struct node { int value; struct node *next; };
+
+struct particle ps[100];
+struct node nodes[200];
+
+double simulate(int rounds) {
+    int r;
+    int i;
+    double energy = 0.0;
+    for (i = 0; i < 100; i++) {
+        ps[i].pos.x = i;
+        ps[i].pos.y = 0.0;
+        ps[i].vel.x = 1.0;
+        ps[i].vel.y = 0.5;
+        ps[i].mass = 1.0 + i % 3;
+        ps[i].alive = i % 7 != 0;
+    }
+    for (r = 0; r < rounds; r++) {
+        for (i = 0; i < 100; i++) {
+            struct particle *p = &ps[i];
+            if (!p->alive) continue;
+            p->pos.x += p->vel.x * 0.01;
+            p->pos.y += p->vel.y * 0.01;
+            p->vel.y -= 0.001 * p->mass;
+            energy += p->mass * (p->vel.x * p->vel.x + p->vel.y * p->vel.y);
+        }
+    }
+    return energy;
+}
+
+int walk(int rounds) {
+    int r;
+    int i;
+    int total = 0;
+    for (i = 0; i < 199; i++) {
+        nodes[i].value = i;
+        nodes[i].next = &nodes[i + 1];
+    }
+    nodes[199].value = 199;
+    nodes[199].next = 0;
+    for (r = 0; r < rounds; r++) {
+        struct node *p = &nodes[0];
+        while (p) {
+            total += p->value;
+            p = p->next;
+        }
+    }
+    return total;
+}
+"""
+
+
+class NameLookupInterpreter(Interpreter):
+    # member access as it was before the type registry resolved it: the field is
+    # looked up by name in the aggregate at every access
+    def lvalue(self, node, frame):
+        if node.__class__ is not MemberAccess:
+            return Interpreter.lvalue(self, node, frame)
+        target = self.evaluate(node.target, frame)
+        aggregate = node.target.ctype
+        if node.arrow:
+            target, aggregate = deref(target), pointee(aggregate)
+        return target, aggregate.member(node.member).index
+
+
+def bench_members(rounds=40):
+    times = {}
+    for name, cls in (("name lookup", NameLookupInterpreter), ("resolved slot", Interpreter)):
+        interp = cls(Parser(lexer(MEMBER_PROGRAM)).parse())
+        times[name] = (best_of(lambda: interp.run("simulate", [rounds]), 3),
+                       best_of(lambda: interp.run("walk", [rounds]), 3))
+    (sim_slow, energy), (walk_slow, total) = times["name lookup"]
+    (sim_fast, _), (walk_fast, _) = times["resolved slot"]
+    print(f"members: struct-array update and linked-list walk ({rounds} rounds) on the interpreter")
+    print(f"  simulate: name lookup {sim_slow * 1000:7.1f} ms, resolved slot {sim_fast * 1000:7.1f} ms"
+          f"  ({sim_slow / sim_fast:.2f}x, energy {energy:.3f})")
+    print(f"  walk    : name lookup {walk_slow * 1000:7.1f} ms, resolved slot {walk_fast * 1000:7.1f} ms"
+          f"  ({walk_slow / walk_fast:.2f}x, sum {total})")
+
+
+CALL_PROGRAM = """
+int fib(int n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+
+int ack(int m, int n) {
+    if (m == 0) return n + 1;
+    if (n == 0) return ack(m - 1, 1);
+    return ack(m - 1, ack(m, n - 1));
+}
+"""
+
+
+def count_calls(fn):
+    calls = [0]
+
+    def counted(*args):
+        calls[0] += 1
+        return fn(*args)
+    return counted, calls
+
+
+def bench_calls():
+    interp = Interpreter(Parser(lexer(CALL_PROGRAM)).parse())
+    print("calls: recursive C functions on the tree-walking interpreter")
+    for name, args in (("fib", (20,)), ("ack", (2, 20))):
+        fn = interp.functions[name]
+        original = interp.call_function
+        interp.call_function, calls = count_calls(original)
+        interp.call_function(fn, list(args))
+        interp.call_function = original
+        elapsed, result = best_of(lambda: interp.call_function(fn, list(args)), 3)
+        print(f"  {name}{args} = {result}: {elapsed * 1000:8.1f} ms, {calls[0]} calls, "
+              f"{elapsed / calls[0] * 1e6:.2f} us/call")
+
+
+NATIVE_PROGRAM = """
+int fib(int n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+
+double integrate(int steps) {
+    double h = 1.0 / steps;
+    double sum = 0.0;
+    int i;
+    for (i = 0; i < steps; i++) {
+        double x = (i + 0.5) * h;
+        sum += 4.0 / (1.0 + x * x);
+    }
+    return sum * h;
+}
+
+int main() {
+    double pi = integrate(200000);
+    return (fib(22) + (pi > 3.14159 && pi < 3.1416)) % 256;
+}
+"""
+
+
+def bench_native():
+    if shutil.which("cc") is None:
+        print("native: cc não encontrado, benchmark ignorado")
+        return
+    interp_time, expected = best_of(
+        lambda: Interpreter(Parser(lexer(NATIVE_PROGRAM)).parse()).run("main") % 256, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        exe = os.path.join(tmp, "native")
+        compile_time, _ = best_of(lambda: build_executable(compile_source(NATIVE_PROGRAM), exe), 3)
+        run_time, status = best_of(lambda: subprocess.run([exe]).returncode)
+    print("native: fib(22) + numeric integration, 200k steps")
+    print(f"  interpreter   : {interp_time * 1000:8.1f} ms  (exit {expected})")
+    print(f"  x86-64 build  : {compile_time * 1000:8.1f} ms")
+    print(f"  x86-64 run    : {run_time * 1000:8.1f} ms  (exit {status}, {interp_time / run_time:.0f}x)")
+
+
+DISPATCH_PROGRAM = """
+double grades(int n) {
+    float nota1 = 8.5;
+    float nota2 = 7.0;
+    float nota3 = 9.2;
+    float media = 0.0;
+    int i;
+    int k = 0;
+    for (i = 0; i < n; i++) {
+        media = (nota1 + nota2 + nota3) / 3.0;
+        k = k + i / 3 - i % 3;
+    }
+    return media + k;
+}
+"""
+
+
+def bench_dispatch(n=30000):
+    tu = Parser(lexer(DISPATCH_PROGRAM)).parse()
+    print(f"dispatch: teste.c average + integer division, {n} iterations")
+    times = {}
+    for specialize in (False, True):
+        interp = Interpreter(tu, specialize=specialize)
+        fn = interp.functions["grades"]
+        times[specialize], result = best_of(lambda: interp.call_function(fn, [n]), 3)
+        label = "typed ops  " if specialize else "dynamic ops"
+        print(f"  {label}: {times[specialize] * 1000:8.1f} ms  (result {result:.2f})")
+    print(f"  speedup    : {times[False] / times[True]:.2f}x")
+
+
+SHORT_FUNCTION = """
+int step{n}(int x) {{
+    int y = x * {n} + 1;
+    if (y % 2 == 0) y = y / 2;
+    else y = 3 * y + 1;
+    return y % 1000;
+}}
+"""
+
+HOT_LOOP_PROGRAM = CALL_PROGRAM + """
+int main() {
+    int i;
+    int s = 0;
+    for (i = 0; i < 200000; i++) {
+        s = (s + i * 7) % 10007;
+    }
+    return (s + fib(20)) % 256;
+}
+"""
+
+
+def short_program(functions=150):
+    calls = " + ".join(f"step{n}({n})" for n in range(functions))
+    return ("".join(SHORT_FUNCTION.format(n=n) for n in range(functions))
+            + f"int main() {{ return ({calls}) % 256; }}\n")
+
+
+def bench_tiers():
+    modes = (("tier 0 only", 10**12), ("eager compile", 0), ("tiered (1000)", 1000))
+    print("tiers: startup of a run-once script vs. a long hot loop")
+    for label, code in (("short script", short_program()), ("hot loop", HOT_LOOP_PROGRAM)):
+        tu = Parser(lexer(code)).parse()
+        for mode, threshold in modes:
+            interp = None
+
+            def run():
+                nonlocal interp
+                interp = TieredInterpreter(tu, call_threshold=threshold, loop_threshold=threshold)
+                return interp.run("main")
+            elapsed, result = best_of(run, 3)
+            compile_time = sum(event.compile_time for event in interp.events)
+            print(f"  {label:<12} {mode:<14}: {elapsed * 1000:8.1f} ms  (result {result}, "
+                  f"{len(interp.events)} promotion(s), {compile_time * 1000:.1f} ms compiling)")
+
+
+DEEP_PROGRAM = """
+int sum(int n) {
+    if (n == 0) return 0;
+    return n + sum(n - 1);
+}
+
+int acc(int n, int a) {
+    if (n == 0) return a;
+    return acc(n - 1, (a + n) % 1000003);
+}
+"""
+
+
+def bench_stack(depth=1000000):
+    print("stack: call throughput on the host stack vs. the explicit heap stack")
+    tu = Parser(lexer(CALL_PROGRAM)).parse()
+    for label, interp in (("host recursion", Interpreter(tu)), ("heap stack", StacklessInterpreter(tu))):
+        fn = interp.functions["fib"]
+        elapsed, result = best_of(lambda: interp.call_function(fn, [20]), 3)
+        print(f"  {label:<15}: fib(20) = {result} in {elapsed * 1000:7.1f} ms  ({21891 / elapsed:,.0f} calls/s)")
+
+    interp = StacklessInterpreter(Parser(lexer(DEEP_PROGRAM)).parse())
+    for name, args in (("sum", [depth]), ("acc", [depth, 0])):
+        interp.max_depth = 0
+        start = time.perf_counter()
+        result = interp.call_function(interp.functions[name], args)
+        elapsed = time.perf_counter() - start
+        print(f"  {name}({depth}) = {result}: {elapsed * 1000:7.1f} ms, max stack depth {interp.max_depth}, "
+              f"{depth / elapsed:,.0f} calls/s")
+
+
+ARRAY_PROGRAM = """
+double a[64][64];
+double b[64][64];
+double c[64][64];
+char composite[1000000];
+
+int matmul(int n) {
+    int i;
+    int j;
+    int k;
+    for (i = 0; i < n; i++)
+        for (j = 0; j < n; j++) {
+            a[i][j] = i + j;
+            b[i][j] = i - j;
+        }
+    memset(c, 0, 64 * 64 * 8);
+    for (i = 0; i < n; i++)
+        for (k = 0; k < n; k++) {
+            double x = a[i][k];
+            for (j = 0; j < n; j++)
+                c[i][j] += x * b[k][j];
+        }
+    return c[n - 1][n - 1];
+}
+
+int sieve(int n) {
+    int i;
+    int j;
+    int count = 0;
+    memset(composite, 0, n);
+    for (i = 2; i < n; i++) {
+        if (!composite[i]) {
+            count++;
+            for (j = i + i; j < n; j += i) composite[j] = 1;
+        }
+    }
+    return count;
+}
+
+int clear_loop(int n) {
+    int i;
+    for (i = 0; i < n; i++) composite[i] = 0;
+    return n;
+}
+
+int clear_bulk(int n) {
+    memset(composite, 0, n);
+    return n;
+}
+"""
+
+
+def bench_arrays(n=64, limit=200000):
+    tu = Parser(lexer(ARRAY_PROGRAM)).parse()
+    print(f"arrays: {n}x{n} double matrix multiply and sieve up to {limit} on typed buffers")
+    engines = (("tree walker", Interpreter(tu), 1), ("tier 1", TieredInterpreter(tu, call_threshold=0), 3))
+    for label, interp, repeat in engines:
+        for name, args in (("matmul", [n]), ("sieve", [limit])):
+            fn = interp.functions[name]
+            elapsed, result = best_of(lambda: interp.call_function(fn, args), repeat)
+            print(f"  {label:<11} {name:<6}: {elapsed * 1000:8.1f} ms  (result {result})")
+
+    interp = TieredInterpreter(tu, call_threshold=0)
+    size = len(interp.globals["composite"])
+    loop_time, _ = best_of(lambda: interp.call_function(interp.functions["clear_loop"], [size]), 3)
+    bulk_time, _ = best_of(lambda: interp.call_function(interp.functions["clear_bulk"], [size]), 3)
+    print(f"  clearing {size:,} chars: loop {loop_time * 1000:.1f} ms, memset {bulk_time * 1000:.2f} ms "
+          f"({loop_time / bulk_time:.0f}x)")
+    print(f"  storage: {sys.getsizeof(interp.globals['composite']):,} bytes as a buffer, "
+          f"{sys.getsizeof([0] * size):,} bytes as a list")
+
+
+STDIO_PROGRAM = """
+int main() {
+    int i;
+    for (i = 0; i < %d; i++)
+        printf("linha %%d: %%.2f %%s\\n", i, i * 0.5, "ok");
+    return 0;
+}
+"""
+
+
+def naive_printf(fd):
+    # the format is parsed on every call and every line is its own write(2)
+    def printf(fmt, *args):
+        data = Format(c_string(fmt)).render(args)
+        os.write(fd, data)
+        return len(data)
+    return printf
+
+
+def bench_stdio(lines=1000000):
+    tu = Parser(lexer(STDIO_PROGRAM % lines)).parse()
+    print(f"stdio: {lines:,} formatted lines from printf in a tier-1 loop")
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for label in ("per-call write", "buffered"):
+            path = outputs[label] = os.path.join(tmp, label.replace(" ", "_"))
+            with open(path, "wb") as f:
+                if label == "buffered":
+                    builtins = Runtime(stdout=f, capacity=1 << 20).builtins
+                else:
+                    builtins = {"printf": naive_printf(f.fileno())}
+                interp = TieredInterpreter(tu, builtins, call_threshold=0, loop_threshold=0)
+                start = time.perf_counter()
+                interp.run("main")
+                elapsed = time.perf_counter() - start
+            print(f"  {label:<15}: {elapsed * 1000:8.1f} ms  ({lines / elapsed:,.0f} lines/s, "
+                  f"{os.path.getsize(path):,} bytes)")
+        with open(outputs["per-call write"], "rb") as a, open(outputs["buffered"], "rb") as b:
+            print(f"  same output    : {'sim' if a.read() == b.read() else 'NÃO'}")
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def wait_for_server(path, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return Client(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def bench_server(functions=50, clients=16):
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = "".join(SAMPLE_FUNCTION.format(n=n) for n in range(functions))
+    print(f"server: check of a {functions}-function file, cold processes vs. round trips to server.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        source, sock = os.path.join(tmp, "prog.c"), os.path.join(tmp, "server.sock")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(code)
+        server = subprocess.Popen([sys.executable, os.path.join(here, "server.py"), "--socket", sock],
+                                  cwd=here, stdout=subprocess.DEVNULL)
+        try:
+            client = wait_for_server(sock)
+            cold = median_ms(lambda: subprocess.run([sys.executable, "typecheck.py", source], cwd=here,
+                                                    stdout=subprocess.DEVNULL), 7)
+            thin = median_ms(lambda: subprocess.run([sys.executable, "client.py", "--socket", sock, "check", source],
+                                                    cwd=here, stdout=subprocess.DEVNULL), 7)
+            cached = median_ms(lambda: client.request("check", path=source), 200)
+            edits = iter(range(10**9))
+            fresh = median_ms(lambda: client.request("check", code=f"{code}// {next(edits)}\n"), 30)
+            ping = median_ms(lambda: client.request("ping"), 200)
+
+            def burst(k):
+                with Client(sock) as c:
+                    for i in range(10):
+                        c.request("check", code=f"{code}// {k} {i}\n")
+            start = time.perf_counter()
+            with ThreadPoolExecutor(clients) as pool:
+                list(pool.map(burst, range(clients)))
+            elapsed = time.perf_counter() - start
+            client.close()
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"  cold typecheck.py process : {cold:8.1f} ms")
+    print(f"  client.py process, warm   : {thin:8.1f} ms")
+    print(f"  round trip, uncached      : {fresh:8.2f} ms")
+    print(f"  round trip, cached        : {cached:8.3f} ms  (ping {ping:.3f} ms, {cold / cached:,.0f}x vs cold)")
+    print(f"  {clients} concurrent clients   : {clients * 10 / elapsed:8.0f} uncached checks/s "
+          f"({os.cpu_count()} worker process(es))")
+
+
+class NodeCounts(Analysis):
+    def __init__(self):
+        self.counts = {}
+
+    def visit_Node(self, node):
+        name = node.__class__.__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def result(self):
+        return self.counts
+
+
+class Names(Analysis):
+    def __init__(self):
+        self.names = set()
+
+    def visit_Identifier(self, node):
+        self.names.add(node.name)
+
+    def result(self):
+        return self.names
+
+
+class Operators(Analysis):
+    def __init__(self):
+        self.ops = {}
+
+    def visit_BinaryOp(self, node):
+        self.ops[node.op] = self.ops.get(node.op, 0) + 1
+
+    visit_Assignment = visit_UnaryOp = visit_BinaryOp
+
+    def result(self):
+        return self.ops
+
+
+class Constants(Analysis):
+    def __init__(self):
+        self.values = []
+
+    def visit_Constant(self, node):
+        self.values.append(node.value)
+
+    def result(self):
+        return sum(self.values)
+
+
+class LoopDepth(Analysis):
+    def __init__(self):
+        self.depth = self.deepest = 0
+
+    def visit_WhileStatement(self, node):
+        self.depth += 1
+        self.deepest = max(self.deepest, self.depth)
+
+    def leave_WhileStatement(self, node):
+        self.depth -= 1
+
+    visit_ForStatement = visit_DoWhileStatement = visit_WhileStatement
+    leave_ForStatement = leave_DoWhileStatement = leave_WhileStatement
+
+    def result(self):
+        return self.deepest
+
+
+class Jumps(Analysis):
+    def __init__(self):
+        self.count = 0
+
+    def visit_BreakStatement(self, node):
+        self.count += 1
+
+    visit_ContinueStatement = visit_ReturnStatement = visit_BreakStatement
+
+    def result(self):
+        return self.count
+
+
+ANALYSES = [NodeCounts, Names, Operators, Constants, LoopDepth, Jumps]
+
+
+def bench_visitors(functions=2000):
+    tree = Parser(lexer("".join(SAMPLE_FUNCTION.format(n=n) for n in range(functions)))).parse()
+    nodes = sum(NodeCounts().run(tree).values())
+    separate_time, separate = best_of(lambda: [cls().run(tree) for cls in ANALYSES])
+    fused_time, fused = best_of(lambda: run_analyses(tree, [cls() for cls in ANALYSES]))
+    assert fused == separate
+    print(f"visitors: {len(ANALYSES)} analyses over {nodes:,} nodes ({functions} functions)")
+    print(f"  separate walks: {separate_time * 1000:8.1f} ms")
+    print(f"  one fused walk: {fused_time * 1000:8.1f} ms  ({separate_time / fused_time:.1f}x)")
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "members": bench_members,
+    "calls": bench_calls,
+    "native": bench_native,
+    "dispatch": bench_dispatch,
+    "tiers": bench_tiers,
+    "stack": bench_stack,
+    "arrays": bench_arrays,
+    "stdio": bench_stdio,
+    "server": bench_server,
+    "visitors": bench_visitors,
+}
+
+
+def main(argv):
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"benchmark desconhecido: {name} (opções: {', '.join(BENCHMARKS)})")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
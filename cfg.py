@@ -0,0 +1,575 @@
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from lexer import lexer
+from parser import (Parser, FunctionDefinition, Declaration, CompoundStatement, IfStatement,
+                    WhileStatement, ForStatement, SwitchStatement, CaseStatement, DoWhileStatement,
+                    ReturnStatement, ExpressionStatement, BreakStatement, ContinueStatement,
+                    BinaryOp, UnaryOp, TernaryOp, Assignment, Call, Constant, Identifier,
+                    ArraySubscript, MemberAccess, evaluate_constant)
+from frames import layout_function
+from typecheck import resolve_members
+
+
+class CodegenError(Exception):
+    # a construct the CFG lowering or a backend does not handle
+    pass
+
+
+@dataclass(frozen=True)
+class Const:
+    value: Any
+
+    def __str__(self):
+        return repr(self.value) if isinstance(self.value, str) else str(self.value)
+
+
+@dataclass
+class Instr:
+    # op is one of: const copy binop unop call addr load store elem member
+    op: str
+    dest: Optional[str]
+    args: List[Any]
+    detail: Any = None
+
+    def uses(self):
+        return [a for a in self.args if isinstance(a, str)]
+
+    @property
+    def has_side_effects(self):
+        return self.op in SIDE_EFFECT_OPS
+
+    def __str__(self):
+        args = [str(a) for a in self.args]
+        if self.op == "binop":
+            rhs = f"{args[0]} {self.detail} {args[1]}"
+        elif self.op == "unop":
+            rhs = f"{self.detail}{args[0]}"
+        elif self.op in ("const", "copy"):
+            rhs = args[0]
+        elif self.op == "call":
+            rhs = f"call {self.detail}({', '.join(args)})"
+        elif self.op == "store":
+            return f"store [{args[0]}] = {args[1]}"
+        elif self.op == "member":
+            rhs = f"{args[0]} + offsetof({self.detail})"
+        else:
+            rhs = f"{self.op} {', '.join(args)}"
+        return f"{self.dest} = {rhs}" if self.dest is not None else rhs
+
+
+@dataclass
+class Terminator:
+    # op is one of: jump branch ret
+    op: str
+    args: List[Any] = field(default_factory=list)
+    targets: List[str] = field(default_factory=list)
+
+    def uses(self):
+        return [a for a in self.args if isinstance(a, str)]
+
+    def __str__(self):
+        if self.op == "jump":
+            return f"jump {self.targets[0]}"
+        if self.op == "branch":
+            return f"branch {self.args[0]} ? {self.targets[0]} : {self.targets[1]}"
+        return f"ret {self.args[0]}" if self.args else "ret"
+
+
+SIDE_EFFECT_OPS = {"call", "store"}
+
+
+@dataclass
+class BasicBlock:
+    label: str
+    instrs: List[Instr] = field(default_factory=list)
+    terminator: Optional[Terminator] = None
+
+    @property
+    def succs(self):
+        return self.terminator.targets if self.terminator else []
+
+
+@dataclass
+class FunctionCFG:
+    name: str
+    params: List[str]
+    locals: set
+    blocks: Dict[str, BasicBlock]
+    entry: str
+    # variables whose address escapes (and globals) are never treated as dead
+    pinned: set = field(default_factory=set)
+
+    def instruction_count(self):
+        return sum(len(b.instrs) + 1 for b in self.blocks.values())
+
+    def preds(self):
+        preds = {label: [] for label in self.blocks}
+        for block in self.blocks.values():
+            for succ in block.succs:
+                preds[succ].append(block.label)
+        return preds
+
+
+class Lowerer:
+    def __init__(self, fn, types):
+        self.fn = fn
+        self.types = types
+        layout = fn.frame if fn.frame is not None else layout_function(fn, types)
+        counts = Counter(layout.names)
+        self.var_names = [name if counts[name] == 1 else f"{name}.{slot}"
+                          for slot, name in enumerate(layout.names)]
+        self.params = self.var_names[:layout.param_count]
+        self.blocks = {}
+        self.temps = 0
+        self.pinned = set()
+        self.break_targets = []
+        self.continue_targets = []
+        self.current = self.new_block()
+
+    def new_block(self):
+        block = BasicBlock(f"B{len(self.blocks)}")
+        self.blocks[block.label] = block
+        return block
+
+    def new_temp(self):
+        self.temps += 1
+        return f"%t{self.temps}"
+
+    def emit(self, op, dest, args, detail=None):
+        self.current.instrs.append(Instr(op, dest, args, detail))
+        return dest
+
+    def terminate(self, op, args=(), targets=()):
+        if self.current.terminator is None:
+            self.current.terminator = Terminator(op, list(args), list(targets))
+
+    def jump(self, block):
+        self.terminate("jump", targets=[block.label])
+
+    def start(self, block):
+        self.current = block
+
+    def retarget(self, value, var):
+        # write a just-computed temporary straight into its destination
+        instrs = self.current.instrs
+        if isinstance(value, str) and value.startswith("%") and instrs and instrs[-1].dest == value:
+            instrs[-1].dest = var
+            return True
+        return False
+
+    def var(self, ident):
+        if ident.slot is not None:
+            return self.var_names[ident.slot]
+        name = ident.symbol or ident.name
+        self.pinned.add(name)
+        return name
+
+    def lower(self):
+        self.lower_stmt(self.fn.body)
+        self.terminate("ret")
+        entry = "B0"
+        return FunctionCFG(self.fn.frame.name, self.params, set(self.var_names), self.blocks, entry, self.pinned)
+
+    # statements
+    def lower_stmt(self, node):
+        if node is None:
+            return
+        cls = node.__class__
+        if cls is CompoundStatement:
+            for item in node.items:
+                self.lower_stmt(item)
+        elif cls is Declaration:
+            for dec, init in node.init_declarators:
+                # static and extern locals (no slot) are initialised once, outside the function
+                if init is not None and dec.direct_decl is not None and dec.direct_decl.slot is not None:
+                    value = self.lower_expr(init)
+                    var = self.var(dec.direct_decl)
+                    if not self.retarget(value, var):
+                        self.emit("copy", var, [value])
+        elif cls is ExpressionStatement:
+            if node.expr is not None:
+                self.lower_expr(node.expr)
+        elif cls is IfStatement:
+            then_block, join = self.new_block(), self.new_block()
+            else_block = self.new_block() if node.else_stmt is not None else join
+            self.branch(node.cond, then_block, else_block)
+            self.start(then_block)
+            self.lower_stmt(node.then_stmt)
+            self.jump(join)
+            if node.else_stmt is not None:
+                self.start(else_block)
+                self.lower_stmt(node.else_stmt)
+                self.jump(join)
+            self.start(join)
+        elif cls is WhileStatement:
+            head, body, exit = self.new_block(), self.new_block(), self.new_block()
+            self.jump(head)
+            self.start(head)
+            self.branch(node.cond, body, exit)
+            self.loop_body(node.body, body, exit, head)
+            self.jump(head)
+            self.start(exit)
+        elif cls is DoWhileStatement:
+            body, cond, exit = self.new_block(), self.new_block(), self.new_block()
+            self.jump(body)
+            self.loop_body(node.body, body, exit, cond)
+            self.jump(cond)
+            self.start(cond)
+            self.branch(node.cond, body, exit)
+            self.start(exit)
+        elif cls is ForStatement:
+            self.lower_stmt(node.init)
+            head, body, post, exit = self.new_block(), self.new_block(), self.new_block(), self.new_block()
+            self.jump(head)
+            self.start(head)
+            if node.cond is not None:
+                self.branch(node.cond, body, exit)
+            else:
+                self.jump(body)
+            self.loop_body(node.body, body, exit, post)
+            self.jump(post)
+            self.start(post)
+            if node.post is not None:
+                self.lower_expr(node.post)
+            self.jump(head)
+            self.start(exit)
+        elif cls is SwitchStatement:
+            self.lower_switch(node)
+        elif cls is CaseStatement:
+            for item in node.body:
+                self.lower_stmt(item)
+        elif cls is ReturnStatement:
+            args = [] if node.expr is None else [self.lower_expr(node.expr)]
+            self.terminate("ret", args)
+            self.start(self.new_block())
+        elif cls is BreakStatement:
+            self.jump(self.break_targets[-1])
+            self.start(self.new_block())
+        elif cls is ContinueStatement:
+            self.jump(self.continue_targets[-1])
+            self.start(self.new_block())
+        else:
+            raise CodegenError(f"cannot lower {cls.__name__}")
+
+    def loop_body(self, stmt, body, exit, continue_target):
+        self.break_targets.append(exit)
+        self.continue_targets.append(continue_target)
+        self.start(body)
+        self.lower_stmt(stmt)
+        self.break_targets.pop()
+        self.continue_targets.pop()
+
+    def lower_switch(self, node):
+        value = self.lower_expr(node.cond)
+        exit = self.new_block()
+        items = node.body.items
+        case_blocks = [self.new_block() if isinstance(item, CaseStatement) else None for item in items]
+        default = exit
+        for item, block in zip(items, case_blocks):
+            if block is None:
+                continue
+            if item.expr is None:
+                default = block
+                continue
+            test = self.emit("binop", self.new_temp(),
+                             [value, Const(evaluate_constant(item.expr, self.types.enum_constants))], "==")
+            next_test = self.new_block()
+            self.terminate("branch", [test], [block.label, next_test.label])
+            self.start(next_test)
+        self.jump(default)
+
+        # statements before the first label are unreachable
+        self.start(self.new_block())
+        self.break_targets.append(exit)
+        for item, block in zip(items, case_blocks):
+            if block is not None:
+                self.jump(block)
+                self.start(block)
+            self.lower_stmt(item)
+        self.break_targets.pop()
+        self.jump(exit)
+        self.start(exit)
+
+    def branch(self, cond, true_block, false_block):
+        value = self.lower_expr(cond)
+        self.terminate("branch", [value], [true_block.label, false_block.label])
+
+    # expressions
+    def lower_expr(self, node):
+        cls = node.__class__
+        if cls is Constant:
+            value = node.value
+            if isinstance(value, str) and value.startswith("'"):
+                value = evaluate_constant(node)
+            return Const(value)
+        if cls is Identifier:
+            if node.slot is None and node.name in self.types.enum_constants:
+                return Const(self.types.enum_constants[node.name])
+            return self.var(node)
+        if cls is BinaryOp:
+            if node.op in ("&&", "||"):
+                return self.lower_logical(node)
+            left = self.lower_expr(node.left)
+            right = self.lower_expr(node.right)
+            return self.emit("binop", self.new_temp(), [left, right], node.op)
+        if cls is UnaryOp:
+            return self.lower_unary(node)
+        if cls is TernaryOp:
+            result = self.new_temp()
+            true_block, false_block, join = self.new_block(), self.new_block(), self.new_block()
+            self.branch(node.cond, true_block, false_block)
+            for block, expr in ((true_block, node.if_true), (false_block, node.if_false)):
+                self.start(block)
+                self.emit("copy", result, [self.lower_expr(expr)])
+                self.jump(join)
+            self.start(join)
+            return result
+        if cls is Assignment:
+            return self.lower_assignment(node)
+        if cls is Call:
+            args = [self.lower_expr(arg) for arg in node.args]
+            if isinstance(node.func, Identifier) and node.func.slot is None:
+                callee = node.func.name
+            else:
+                callee = self.lower_expr(node.func)
+                args = [callee] + args
+                callee = "*"
+            return self.emit("call", self.new_temp(), args, callee)
+        if cls in (ArraySubscript, MemberAccess):
+            return self.emit("load", self.new_temp(), [self.address(node)])
+        raise CodegenError(f"cannot lower {cls.__name__}")
+
+    def lower_logical(self, node):
+        result = self.new_temp()
+        rhs_block, short_block, join = self.new_block(), self.new_block(), self.new_block()
+        if node.op == "&&":
+            self.branch(node.left, rhs_block, short_block)
+        else:
+            self.branch(node.left, short_block, rhs_block)
+        self.start(rhs_block)
+        right = self.lower_expr(node.right)
+        self.emit("binop", result, [right, Const(0)], "!=")
+        self.jump(join)
+        self.start(short_block)
+        self.emit("const", result, [Const(0 if node.op == "&&" else 1)])
+        self.jump(join)
+        self.start(join)
+        return result
+
+    def lower_unary(self, node):
+        op = node.op
+        if op == "&":
+            return self.address(node.operand)
+        if op == "*":
+            return self.emit("load", self.new_temp(), [self.lower_expr(node.operand)])
+        if op in ("++pre", "--pre", "++post", "--post"):
+            arith = "+" if op[0] == "+" else "-"
+            if isinstance(node.operand, Identifier):
+                var = self.var(node.operand)
+                old = self.emit("copy", self.new_temp(), [var]) if op.endswith("post") else var
+                self.emit("binop", var, [var, Const(1)], arith)
+                return old if op.endswith("post") else var
+            addr = self.address(node.operand)
+            old = self.emit("load", self.new_temp(), [addr])
+            new = self.emit("binop", self.new_temp(), [old, Const(1)], arith)
+            self.emit("store", None, [addr, new])
+            return old if op.endswith("post") else new
+        operand = self.lower_expr(node.operand)
+        return self.emit("unop", self.new_temp(), [operand], {"-u": "-", "+u": "+"}.get(op, op))
+
+    def lower_assignment(self, node):
+        arith = None if node.op == "ASSIGN" else ASSIGN_OPERATORS[node.op]
+        if isinstance(node.left, Identifier):
+            var = self.var(node.left)
+            value = self.lower_expr(node.right)
+            if arith:
+                self.emit("binop", var, [var, value], arith)
+            elif self.retarget(value, var):
+                pass
+            else:
+                self.emit("copy", var, [value])
+            return var
+        addr = self.address(node.left)
+        value = self.lower_expr(node.right)
+        if arith:
+            old = self.emit("load", self.new_temp(), [addr])
+            value = self.emit("binop", self.new_temp(), [old, value], arith)
+        self.emit("store", None, [addr, value])
+        return value
+
+    def address(self, node):
+        cls = node.__class__
+        if cls is Identifier:
+            var = self.var(node)
+            self.pinned.add(var)
+            return self.emit("addr", self.new_temp(), [var])
+        if cls is ArraySubscript:
+            base = self.lower_expr(node.array)
+            index = self.lower_expr(node.index)
+            return self.emit("elem", self.new_temp(), [base, index])
+        if cls is MemberAccess:
+            base = self.lower_expr(node.target) if node.arrow else self.address(node.target)
+            detail = node.member if node.offset is None else f"{node.member}={node.offset}"
+            return self.emit("member", self.new_temp(), [base], detail)
+        if cls is UnaryOp and node.op == "*":
+            return self.lower_expr(node.operand)
+        raise CodegenError(f"cannot take the address of {cls.__name__}")
+
+
+ASSIGN_OPERATORS = {
+    "PLUS_ASSIGN": "+", "MINUS_ASSIGN": "-", "MUL_ASSIGN": "*", "DIV_ASSIGN": "/", "MOD_ASSIGN": "%",
+    "BIT_AND_ASSIGN": "&", "BIT_OR_ASSIGN": "|", "BIT_XOR_ASSIGN": "^",
+    "SHIFT_LEFT_ASSIGN": "<<", "SHIFT_RIGHT_ASSIGN": ">>",
+}
+
+
+def lower_function(fn, types):
+    return Lowerer(fn, types).lower()
+
+
+def build_cfgs(tu):
+    resolve_members(tu)
+    return [lower_function(ext, tu.types) for ext in tu.external_declarations
+            if isinstance(ext, FunctionDefinition)]
+
+
+# analyses
+
+def liveness(cfg):
+    use, defs = {}, {}
+    for label, block in cfg.blocks.items():
+        u, d = set(), set()
+        for instr in block.instrs:
+            u.update(v for v in instr.uses() if v not in d)
+            if instr.dest is not None:
+                d.add(instr.dest)
+        u.update(v for v in block.terminator.uses() if v not in d)
+        use[label], defs[label] = u, d
+
+    live_in = {label: set() for label in cfg.blocks}
+    live_out = {label: set() for label in cfg.blocks}
+    order = list(reversed(list(cfg.blocks)))
+    changed = True
+    while changed:
+        changed = False
+        for label in order:
+            out = set(cfg.pinned)
+            for succ in cfg.blocks[label].succs:
+                out |= live_in[succ]
+            new_in = use[label] | (out - defs[label])
+            if out != live_out[label] or new_in != live_in[label]:
+                live_out[label], live_in[label] = out, new_in
+                changed = True
+    return live_in, live_out
+
+
+def remove_unreachable(cfg):
+    seen, stack = set(), [cfg.entry]
+    while stack:
+        label = stack.pop()
+        if label in seen:
+            continue
+        seen.add(label)
+        stack.extend(cfg.blocks[label].succs)
+    dead = [label for label in cfg.blocks if label not in seen]
+    removed = sum(len(cfg.blocks[label].instrs) + 1 for label in dead)
+    for label in dead:
+        del cfg.blocks[label]
+    return len(dead), removed
+
+
+def remove_dead_stores(cfg):
+    removed = 0
+    while True:
+        _, live_out = liveness(cfg)
+        round_removed = 0
+        for label, block in cfg.blocks.items():
+            live = set(live_out[label]) | set(block.terminator.uses())
+            kept = []
+            for instr in reversed(block.instrs):
+                if instr.dest is not None and instr.dest not in live and not instr.has_side_effects:
+                    round_removed += 1
+                    continue
+                if instr.dest is not None:
+                    live.discard(instr.dest)
+                live.update(instr.uses())
+                kept.append(instr)
+            kept.reverse()
+            block.instrs = kept
+        removed += round_removed
+        if not round_removed:
+            return removed
+
+
+def optimize(cfg):
+    before = cfg.instruction_count()
+    blocks, unreachable = remove_unreachable(cfg)
+    dead = remove_dead_stores(cfg)
+    return {"before": before, "after": cfg.instruction_count(),
+            "unreachable_blocks": blocks, "unreachable_instrs": unreachable, "dead_stores": dead}
+
+
+# output
+
+def dump(cfg, live=None):
+    live_in, live_out = live if live is not None else liveness(cfg)
+    lines = [f"function {cfg.name}({', '.join(cfg.params)})"]
+    for label, block in cfg.blocks.items():
+        lines.append(f"  {label}:  ; live-in: {', '.join(sorted(live_in[label])) or '-'}")
+        lines.extend(f"    {instr}" for instr in block.instrs)
+        lines.append(f"    {block.terminator}")
+    return "\n".join(lines)
+
+
+def to_dot(cfg):
+    def escape(text):
+        return text.replace("\\", "\\\\").replace('"', '\\"')
+
+    lines = [f'digraph "{cfg.name}" {{', "  node [shape=box, fontname=monospace];"]
+    for label, block in cfg.blocks.items():
+        body = "\\l".join(escape(str(i)) for i in block.instrs + [block.terminator])
+        lines.append(f'  {label} [label="{label}:\\l{body}\\l"];')
+        for i, succ in enumerate(block.succs):
+            style = ""
+            if block.terminator.op == "branch":
+                style = ' [label="T"]' if i == 0 else ' [label="F"]'
+            lines.append(f"  {label} -> {succ}{style};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def main(argv):
+    dot = "--dot" in argv
+    paths = [a for a in argv if a != "--dot"]
+    if not paths:
+        print("uso: cfg.py [--dot] ARQUIVOS.c...")
+        return 1
+
+    totals = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            tu = Parser(lexer(f.read())).parse()
+        for cfg in build_cfgs(tu):
+            stats = optimize(cfg)
+            totals.update(stats)
+            totals["functions"] += 1
+            if dot:
+                print(to_dot(cfg))
+            else:
+                print(f"; {path}")
+                print(dump(cfg))
+                print(f"; {stats['before']} -> {stats['after']} instructions "
+                      f"({stats['unreachable_blocks']} unreachable blocks, {stats['dead_stores']} dead stores)\n")
+
+    if not dot:
+        removed = totals["before"] - totals["after"]
+        print(f"TOTAL: {totals['functions']} funções, {totals['before']} -> {totals['after']} instruções "
+              f"({removed} removidas: {totals['unreachable_instrs']} inalcançáveis, {totals['dead_stores']} stores mortos)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
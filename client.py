@@ -0,0 +1,79 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+
+
+# no compiler imports here: the point of the client is to start fast and let the
+# long-lived server (server.py) do the work with warm caches
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"compilador-{os.getuid()}.sock")
+
+
+class Client:
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.stream = self.sock.makefile("rwb")
+
+    def request(self, op, **fields):
+        self.stream.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("o servidor fechou a conexão")
+        return json.loads(line)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+ERROR_LABELS = {"parse": "ERRO DE PARSING", "type": "ERRO DE TIPO"}
+
+
+def report(op, path, response):
+    if not response["ok"]:
+        print(f"{ERROR_LABELS.get(response.get('kind'), 'ERRO')} em {path}: {response['error']}")
+        return 1
+    if op == "lex":
+        print(f"{path}: {len(response['tokens'])} tokens")
+    elif op == "parse":
+        print(f"{path}: {len(response['functions'])} função(ões): {', '.join(response['functions'])}")
+    else:
+        print(f"{path}: ok")
+    return 0
+
+
+def main(argv):
+    path = DEFAULT_SOCKET
+    if argv[:1] == ["--socket"] and len(argv) > 1:
+        path, argv = argv[1], argv[2:]
+    if not argv or argv[0] not in {"lex", "parse", "check", "ping", "stats"}:
+        print("uso: client.py [--socket CAMINHO] (lex|parse|check) ARQUIVOS... | client.py (ping|stats)")
+        return 1
+    op, files = argv[0], argv[1:]
+    try:
+        client = Client(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"servidor não encontrado em {path} (inicie com: python server.py)")
+        return 2
+    status = 0
+    with client:
+        if op in ("ping", "stats"):
+            response = client.request(op)
+            print(" ".join(f"{k}={v}" for k, v in response.items() if k != "ok") or "pong")
+            return 0
+        for name in files:
+            status |= report(op, name, client.request(op, path=os.path.abspath(name)))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
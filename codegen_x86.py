@@ -0,0 +1,729 @@
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import fields
+
+from lexer import lexer
+from parser import (Parser, Node, FunctionDefinition, Declaration, CompoundStatement, IfStatement,
+                    WhileStatement, ForStatement, DoWhileStatement, ReturnStatement,
+                    ExpressionStatement, BreakStatement, ContinueStatement, SwitchStatement, CaseStatement, BinaryOp, UnaryOp,
+                    TernaryOp, Assignment, Call, Constant, Identifier, evaluate_constant,
+                    declarator_type)
+from frames import layout_frames
+from cfg import CodegenError
+from typecheck import check_types, binary_result, decay
+from interpreter import string_literal, unsigned_mask, operation_mask
+from type_registry import ScalarType, PointerType, FunctionType, INT, FLOAT, DOUBLE, usual_arithmetic_conversion
+
+
+INT_ARG_REGS = ["%rdi", "%rsi", "%rdx", "%rcx", "%r8", "%r9"]
+FLOAT_ARG_REGS = [f"%xmm{i}" for i in range(8)]
+# the 1, 2 and 4 byte parts of each integer argument register
+ARG_REG_PARTS = {
+    "%rdi": ("%dil", "%di", "%edi"), "%rsi": ("%sil", "%si", "%esi"), "%rdx": ("%dl", "%dx", "%edx"),
+    "%rcx": ("%cl", "%cx", "%ecx"), "%r8": ("%r8b", "%r8w", "%r8d"), "%r9": ("%r9b", "%r9w", "%r9d"),
+}
+CALLEE_SAVED = ["%rbx", "%r12", "%r13", "%r14", "%r15"]
+
+INT_BINOPS = {"+": "addq", "-": "subq", "*": "imulq", "&": "andq", "|": "orq", "^": "xorq"}
+FLOAT_BINOPS = {"+": "addsd", "-": "subsd", "*": "mulsd", "/": "divsd"}
+INT_COMPARE = {"==": "sete", "!=": "setne", "<": "setl", ">": "setg", "<=": "setle", ">=": "setge"}
+UNSIGNED_COMPARE = {**INT_COMPARE, "<": "setb", ">": "seta", "<=": "setbe", ">=": "setae"}
+# operands are swapped for < and <= so that unordered (NaN) compares come out false
+FLOAT_COMPARE = {"==": ("sete", False), "!=": ("setne", False), ">": ("seta", False),
+                 ">=": ("setae", False), "<": ("seta", True), "<=": ("setae", True)}
+ASSIGN_OPERATORS = {
+    "PLUS_ASSIGN": "+", "MINUS_ASSIGN": "-", "MUL_ASSIGN": "*", "DIV_ASSIGN": "/", "MOD_ASSIGN": "%",
+    "BIT_AND_ASSIGN": "&", "BIT_OR_ASSIGN": "|", "BIT_XOR_ASSIGN": "^",
+    "SHIFT_LEFT_ASSIGN": "<<", "SHIFT_RIGHT_ASSIGN": ">>",
+}
+# truncate %rax to the width of the destination before storing it
+SIGN_EXTEND = {1: "movsbq %al, %rax", 2: "movswq %ax, %rax", 4: "movslq %eax, %rax"}
+ZERO_EXTEND = {1: "movzbq %al, %rax", 2: "movzwq %ax, %rax", 4: "movl %eax, %eax"}
+
+
+def is_float(ctype):
+    return isinstance(ctype, ScalarType) and ctype.is_float
+
+
+def extend_argument(reg, ctype):
+    part = ARG_REG_PARTS[reg][{1: 0, 2: 1, 4: 2}[ctype.size]]
+    if not ctype.signed and ctype.size == 4:
+        return f"movl {part}, {part}"
+    op = {1: "movsbq", 2: "movswq", 4: "movslq"} if ctype.signed else {1: "movzbq", 2: "movzwq"}
+    return f"{op[ctype.size]} {part}, {reg}"
+
+
+class FunctionCompiler:
+    def __init__(self, program, fn):
+        self.program = program
+        self.fn = fn
+        self.layout = fn.frame
+        self.lines = []
+        self.loops = []
+        self.case_labels = {}
+        self.depth = 0
+        self.locations = {}
+        self.saved = []
+        self.allocate_registers()
+
+    # register allocation: the most used scalar integer locals live in callee-saved registers
+    def allocate_registers(self):
+        uses = Counter()
+        escaped = set()
+        self.count_uses(self.fn.body, uses, escaped)
+        for slot in range(self.layout.param_count):
+            uses[slot] += 1
+        candidates = [slot for slot, _ in uses.most_common()
+                      if slot not in escaped and self.slot_is_integer(slot)]
+        for slot, reg in zip(candidates, CALLEE_SAVED):
+            self.locations[slot] = reg
+            self.saved.append(reg)
+        offset = 8 * len(self.saved)
+        for slot, ctype in enumerate(self.layout.types):
+            if slot in self.locations:
+                continue
+            if not isinstance(ctype, (ScalarType, PointerType)) or ctype.size == 0:
+                raise CodegenError(f"{self.layout.name}: unsupported local type {ctype} for '{self.layout.names[slot]}'")
+            offset += 8
+            self.locations[slot] = f"-{offset}(%rbp)"
+        self.frame_size = offset - 8 * len(self.saved)
+        # keep %rsp 16-byte aligned after the prologue
+        if (8 * len(self.saved) + self.frame_size) % 16:
+            self.frame_size += 8
+
+    def slot_is_integer(self, slot):
+        ctype = self.layout.types[slot]
+        return (isinstance(ctype, ScalarType) and not ctype.is_float) or isinstance(ctype, PointerType)
+
+    def count_uses(self, node, uses, escaped):
+        if isinstance(node, (list, tuple)):
+            for item in node:
+                self.count_uses(item, uses, escaped)
+            return
+        if not isinstance(node, Node):
+            return
+        if isinstance(node, Identifier) and node.slot is not None:
+            uses[node.slot] += 1
+        if isinstance(node, UnaryOp) and node.op == "&" and isinstance(node.operand, Identifier):
+            escaped.add(node.operand.slot)
+        for f in fields(node):
+            self.count_uses(getattr(node, f.name), uses, escaped)
+
+    def emit(self, line):
+        self.lines.append(f"    {line}")
+
+    def label(self, name):
+        self.lines.append(f"{name}:")
+
+    def push(self, reg="%rax"):
+        self.emit(f"pushq {reg}")
+        self.depth += 1
+
+    def pop(self, reg):
+        self.emit(f"popq {reg}")
+        self.depth -= 1
+
+    def push_float(self):
+        self.emit("subq $8, %rsp")
+        self.emit("movsd %xmm0, (%rsp)")
+        self.depth += 1
+
+    def pop_float(self, reg):
+        self.emit(f"movsd (%rsp), {reg}")
+        self.emit("addq $8, %rsp")
+        self.depth -= 1
+
+    def compile(self):
+        name = self.layout.name
+        self.lines.append(f"    .globl {name}")
+        self.lines.append(f"    .type {name}, @function")
+        self.label(name)
+        self.emit("pushq %rbp")
+        self.emit("movq %rsp, %rbp")
+        for reg in self.saved:
+            self.emit(f"pushq {reg}")
+        if self.frame_size:
+            self.emit(f"subq ${self.frame_size}, %rsp")
+
+        int_args = iter(INT_ARG_REGS)
+        float_args = iter(FLOAT_ARG_REGS)
+        for slot in range(self.layout.param_count):
+            ctype = self.layout.types[slot]
+            if is_float(ctype):
+                reg = next(float_args, None)
+                if reg is None:
+                    raise CodegenError(f"{name}: too many floating-point parameters")
+                op = "movss" if ctype.size == 4 else "movsd"
+                self.emit(f"{op} {reg}, {self.locations[slot]}")
+            else:
+                reg = next(int_args, None)
+                if reg is None:
+                    raise CodegenError(f"{name}: too many integer parameters")
+                if isinstance(ctype, ScalarType) and ctype.size in SIGN_EXTEND:
+                    # the caller only sets the low bytes of a narrow argument
+                    self.emit(extend_argument(reg, ctype))
+                self.emit(f"movq {reg}, {self.locations[slot]}")
+
+        self.return_label = f".L{name}_return"
+        self.statement(self.fn.body)
+        self.emit("xorl %eax, %eax")
+        self.label(self.return_label)
+        if self.frame_size:
+            self.emit(f"addq ${self.frame_size}, %rsp")
+        for reg in reversed(self.saved):
+            self.emit(f"popq {reg}")
+        self.emit("popq %rbp")
+        self.emit("ret")
+        self.lines.append(f"    .size {name}, .-{name}")
+        return self.lines
+
+    # types
+    def type_of(self, node):
+        # annotated by the type checker; calls to undeclared functions are taken as int
+        return decay(node.ctype) if node.ctype is not None else INT
+
+    # statements
+    def statement(self, node):
+        cls = node.__class__
+        if cls is CompoundStatement:
+            for item in node.items:
+                self.statement(item)
+        elif cls is Declaration:
+            for dec, init in node.init_declarators:
+                # static and extern locals have no slot: their storage is in the data section
+                if init is not None and dec.direct_decl is not None and dec.direct_decl.slot is not None:
+                    self.store(dec.direct_decl, self.expression_as(init, self.layout.types[dec.direct_decl.slot]))
+        elif cls is ExpressionStatement:
+            if node.expr is not None:
+                self.expression(node.expr)
+        elif cls is ReturnStatement:
+            if node.expr is not None:
+                ret = self.layout.return_type
+                self.expression_as(node.expr, ret)
+                if is_float(ret) and ret.size == 4:
+                    self.emit("cvtsd2ss %xmm0, %xmm0")
+                elif isinstance(ret, ScalarType) and ret.size in SIGN_EXTEND:
+                    self.emit((SIGN_EXTEND if ret.signed else ZERO_EXTEND)[ret.size])
+            self.emit(f"jmp {self.return_label}")
+        elif cls is IfStatement:
+            else_label, end_label = self.program.new_label(), self.program.new_label()
+            self.condition(node.cond, else_label)
+            self.statement(node.then_stmt)
+            if node.else_stmt is not None:
+                self.emit(f"jmp {end_label}")
+                self.label(else_label)
+                self.statement(node.else_stmt)
+                self.label(end_label)
+            else:
+                self.label(else_label)
+        elif cls is WhileStatement:
+            head, end = self.program.new_label(), self.program.new_label()
+            self.label(head)
+            self.condition(node.cond, end)
+            self.loop(node.body, end, head)
+            self.emit(f"jmp {head}")
+            self.label(end)
+        elif cls is DoWhileStatement:
+            head, cond, end = self.program.new_label(), self.program.new_label(), self.program.new_label()
+            self.label(head)
+            self.loop(node.body, end, cond)
+            self.label(cond)
+            self.condition(node.cond, end)
+            self.emit(f"jmp {head}")
+            self.label(end)
+        elif cls is ForStatement:
+            if node.init is not None:
+                self.statement(node.init)
+            head, post, end = self.program.new_label(), self.program.new_label(), self.program.new_label()
+            self.label(head)
+            if node.cond is not None:
+                self.condition(node.cond, end)
+            self.loop(node.body, end, post)
+            self.label(post)
+            if node.post is not None:
+                self.expression(node.post)
+            self.emit(f"jmp {head}")
+            self.label(end)
+        elif cls is SwitchStatement:
+            self.switch(node)
+        elif cls is CaseStatement:
+            self.label(self.case_labels[id(node)])
+            for item in node.body:
+                self.statement(item)
+        elif cls is BreakStatement:
+            self.emit(f"jmp {self.loops[-1][0]}")
+        elif cls is ContinueStatement:
+            self.emit(f"jmp {self.loops[-1][1]}")
+        else:
+            raise CodegenError(f"unsupported statement {cls.__name__}")
+
+    def switch(self, node):
+        end = self.program.new_label()
+        cases = node.body.items if isinstance(node.body, CompoundStatement) else [node.body]
+        default = end
+        self.expression_as(node.cond, INT)
+        for case in cases:
+            if not isinstance(case, CaseStatement):
+                continue
+            label = self.case_labels[id(case)] = self.program.new_label()
+            if case.expr is None:
+                default = label
+            else:
+                value = evaluate_constant(case.expr, self.program.types.enum_constants)
+                self.emit(f"cmpq ${value}, %rax")
+                self.emit(f"je {label}")
+        self.emit(f"jmp {default}")
+        self.loop(node.body, end, self.loops[-1][1] if self.loops else None)
+        self.label(end)
+
+    def loop(self, body, break_label, continue_label):
+        self.loops.append((break_label, continue_label))
+        self.statement(body)
+        self.loops.pop()
+
+    def condition(self, cond, false_label):
+        if is_float(self.type_of(cond)):
+            self.expression(cond)
+            self.emit("xorpd %xmm1, %xmm1")
+            self.emit("ucomisd %xmm1, %xmm0")
+            self.emit("jnp 1f")
+            self.emit("jmp 2f")
+            self.lines.append("1:")
+            self.emit(f"je {false_label}")
+            self.lines.append("2:")
+            return
+        self.expression(cond)
+        self.emit("testq %rax, %rax")
+        self.emit(f"je {false_label}")
+
+    # expressions: integers and pointers end up in %rax, floating point in %xmm0 (as double)
+    def expression_as(self, node, ctype):
+        source = self.type_of(node)
+        self.expression(node)
+        self.convert(source, ctype)
+        return ctype
+
+    def convert(self, source, target):
+        if is_float(target) and not is_float(source):
+            self.emit("cvtsi2sdq %rax, %xmm0")
+        elif is_float(source) and not is_float(target):
+            self.emit("cvttsd2siq %xmm0, %rax")
+
+    def location(self, ident):
+        if ident.slot is not None:
+            return self.locations[ident.slot]
+        name = ident.symbol or ident.name
+        if name in self.program.global_types:
+            return f"{name}(%rip)"
+        raise CodegenError(f"undeclared identifier '{ident.name}'")
+
+    def load(self, ident):
+        ctype = self.type_of(ident)
+        loc = self.location(ident)
+        if is_float(ctype):
+            if ctype.size == 4:
+                self.emit(f"cvtss2sd {loc}, %xmm0")
+            else:
+                self.emit(f"movsd {loc}, %xmm0")
+        else:
+            self.emit(f"movq {loc}, %rax")
+
+    def store(self, ident, ctype):
+        loc = self.location(ident)
+        if is_float(ctype):
+            if ctype.size == 4:
+                self.emit("cvtsd2ss %xmm0, %xmm1")
+                self.emit(f"movss %xmm1, {loc}")
+            else:
+                self.emit(f"movsd %xmm0, {loc}")
+            return
+        if isinstance(ctype, ScalarType) and ctype.size in SIGN_EXTEND:
+            self.emit((SIGN_EXTEND if ctype.signed else ZERO_EXTEND)[ctype.size])
+        self.emit(f"movq %rax, {loc}")
+
+    def simple_operand(self, node):
+        # an operand that can be used in place without going through %rax
+        if node.__class__ is Constant and isinstance(node.value, int) and -2**31 <= node.value < 2**31:
+            return f"${node.value}"
+        if node.__class__ is Identifier and not is_float(self.type_of(node)) and node.slot is not None:
+            return self.locations[node.slot]
+        return None
+
+    def expression(self, node):
+        cls = node.__class__
+        if cls is Constant:
+            value = node.value
+            if isinstance(value, float):
+                self.emit(f"movsd {self.program.float_constant(value)}(%rip), %xmm0")
+            elif isinstance(value, str) and not value.startswith("'"):
+                self.emit(f"leaq {self.program.string_constant(value)}(%rip), %rax")
+            else:
+                value = evaluate_constant(node) if isinstance(value, str) else value
+                self.emit(f"movq ${value}, %rax")
+        elif cls is Identifier:
+            if node.slot is None and node.name in self.program.types.enum_constants:
+                self.emit(f"movq ${self.program.types.enum_constants[node.name]}, %rax")
+            else:
+                self.load(node)
+        elif cls is BinaryOp:
+            self.binary(node)
+        elif cls is UnaryOp:
+            self.unary(node)
+        elif cls is Assignment:
+            self.assignment(node)
+        elif cls is TernaryOp:
+            result = self.type_of(node)
+            else_label, end_label = self.program.new_label(), self.program.new_label()
+            self.condition(node.cond, else_label)
+            self.expression_as(node.if_true, result)
+            self.emit(f"jmp {end_label}")
+            self.label(else_label)
+            self.expression_as(node.if_false, result)
+            self.label(end_label)
+            if node.converts and not is_float(result) and result.size in SIGN_EXTEND:
+                self.emit((SIGN_EXTEND if result.signed else ZERO_EXTEND)[result.size])
+        elif cls is Call:
+            self.call(node)
+        else:
+            raise CodegenError(f"unsupported expression {cls.__name__}")
+
+    def binary(self, node):
+        op = node.op
+        if op in ("&&", "||"):
+            short, end = self.program.new_label(), self.program.new_label()
+            self.expression_as(node.left, INT)
+            self.emit("testq %rax, %rax")
+            self.emit(f"{'je' if op == '&&' else 'jne'} {short}")
+            self.expression_as(node.right, INT)
+            self.emit("testq %rax, %rax")
+            self.emit("setne %al")
+            self.emit("movzbq %al, %rax")
+            self.emit(f"jmp {end}")
+            self.label(short)
+            self.emit(f"movq ${0 if op == '&&' else 1}, %rax")
+            self.label(end)
+            return
+
+        left, right = self.type_of(node.left), self.type_of(node.right)
+        if is_float(left) or is_float(right):
+            if op not in FLOAT_BINOPS and op not in FLOAT_COMPARE:
+                raise CodegenError(f"invalid operands to binary {op} (double)")
+            self.expression_as(node.right, DOUBLE)
+            self.push_float()
+            self.expression_as(node.left, DOUBLE)
+            self.pop_float("%xmm1")
+            if op in FLOAT_BINOPS:
+                self.emit(f"{FLOAT_BINOPS[op]} %xmm1, %xmm0")
+                if usual_arithmetic_conversion(left, right) == FLOAT:
+                    # round to single precision, as float arithmetic is
+                    self.emit("cvtsd2ss %xmm0, %xmm0")
+                    self.emit("cvtss2sd %xmm0, %xmm0")
+            else:
+                setcc, swap = FLOAT_COMPARE[op]
+                self.emit("ucomisd %xmm0, %xmm1" if swap else "ucomisd %xmm1, %xmm0")
+                self.emit(f"{setcc} %al")
+                if op == "==":
+                    self.emit("setnp %cl")
+                    self.emit("andb %cl, %al")
+                elif op == "!=":
+                    self.emit("setp %cl")
+                    self.emit("orb %cl, %al")
+                self.emit("movzbq %al, %rax")
+            return
+
+        if isinstance(left, PointerType) or isinstance(right, PointerType):
+            raise CodegenError("pointer arithmetic is not supported by the x86-64 backend")
+
+        mask = operation_mask(op, left, right)
+        # unsigned int operands are zero-extended to 64 bits (a signed -1 becomes 2**32 - 1),
+        # so they are always loaded into registers rather than used in place
+        narrow = mask == 0xFFFFFFFF
+        operand = None if narrow else self.simple_operand(node.right)
+        if operand is None:
+            self.expression(node.right)
+            self.push()
+            self.expression(node.left)
+            self.pop("%rcx")
+            operand = "%rcx"
+            if narrow and op not in ("<<", ">>"):
+                self.emit("movl %ecx, %ecx")
+        else:
+            self.expression(node.left)
+        if narrow:
+            self.emit("movl %eax, %eax")
+        self.integer_op(op, operand, mask is not None)
+        if narrow and op not in INT_COMPARE:
+            self.emit("movl %eax, %eax")
+
+    def integer_op(self, op, operand, unsigned=False):
+        if op in INT_BINOPS:
+            self.emit(f"{INT_BINOPS[op]} {operand}, %rax")
+        elif op in ("/", "%"):
+            if operand != "%rcx":
+                self.emit(f"movq {operand}, %rcx")
+            if unsigned:
+                self.emit("xorl %edx, %edx")
+                self.emit("divq %rcx")
+            else:
+                self.emit("cqto")
+                self.emit("idivq %rcx")
+            if op == "%":
+                self.emit("movq %rdx, %rax")
+        elif op in ("<<", ">>"):
+            if operand != "%rcx":
+                self.emit(f"movq {operand}, %rcx")
+            shift = "salq" if op == "<<" else "shrq" if unsigned else "sarq"
+            self.emit(f"{shift} %cl, %rax")
+        elif op in INT_COMPARE:
+            self.emit(f"cmpq {operand}, %rax")
+            self.emit(f"{(UNSIGNED_COMPARE if unsigned else INT_COMPARE)[op]} %al")
+            self.emit("movzbq %al, %rax")
+        else:
+            raise CodegenError(f"unsupported operator {op}")
+
+    def unary(self, node):
+        op = node.op
+        operand_type = self.type_of(node.operand)
+        if op in ("++pre", "--pre", "++post", "--post"):
+            if not isinstance(node.operand, Identifier) or is_float(operand_type):
+                raise CodegenError(f"unsupported {op[:2]} operand")
+            self.load(node.operand)
+            if op.endswith("post"):
+                self.push()
+            self.emit(f"{'addq' if op[0] == '+' else 'subq'} $1, %rax")
+            self.store(node.operand, operand_type)
+            if op.endswith("post"):
+                self.pop("%rax")
+            return
+        if op == "!":
+            if is_float(operand_type):
+                self.expression(BinaryOp("==", node.operand, Constant(0.0, DOUBLE)))
+            else:
+                self.expression(node.operand)
+                self.emit("testq %rax, %rax")
+                self.emit("sete %al")
+                self.emit("movzbq %al, %rax")
+            return
+        self.expression(node.operand)
+        if op == "-u":
+            if is_float(operand_type):
+                self.emit(f"xorpd {self.program.sign_mask()}(%rip), %xmm0")
+            else:
+                self.emit("negq %rax")
+        elif op == "~":
+            self.emit("notq %rax")
+        elif op != "+u":
+            raise CodegenError(f"unsupported unary operator {op}")
+        if op != "+u" and unsigned_mask(node.ctype) == 0xFFFFFFFF:
+            self.emit("movl %eax, %eax")
+
+    def assignment(self, node):
+        if not isinstance(node.left, Identifier):
+            raise CodegenError("only assignments to scalar variables are supported")
+        target = self.type_of(node.left)
+        if node.op == "ASSIGN":
+            self.expression_as(node.right, target)
+        else:
+            op = ASSIGN_OPERATORS[node.op]
+            combined = BinaryOp(op, node.left, node.right, binary_result(op, target, self.type_of(node.right)))
+            self.expression(combined)
+            self.convert(combined.ctype, target)
+        self.store(node.left, target)
+        self.load(node.left)
+
+    def call(self, node):
+        if (not isinstance(node.func, Identifier) or node.func.slot is not None
+                or (node.func.symbol or node.func.name) in self.program.global_types):
+            raise CodegenError("only direct calls are supported")
+        name = node.func.name
+        ftype = self.program.signatures.get(name)
+        params = ftype.params if ftype is not None else ()
+        variadic = ftype is None or ftype.variadic
+
+        kinds = []
+        for i, arg in enumerate(node.args):
+            arg_type = self.type_of(arg)
+            if i < len(params):
+                arg_type = self.expression_as(arg, params[i])
+                if is_float(arg_type) and arg_type.size == 4:
+                    self.emit("cvtsd2ss %xmm0, %xmm0")
+                    self.push_float()
+                    kinds.append("f")
+                    continue
+            else:
+                self.expression(arg)
+            if is_float(arg_type):
+                self.push_float()
+                kinds.append("f")
+            else:
+                self.push()
+                kinds.append("i")
+
+        int_regs = [r for r, _ in zip(INT_ARG_REGS, range(kinds.count("i")))]
+        float_regs = [r for r, _ in zip(FLOAT_ARG_REGS, range(kinds.count("f")))]
+        if kinds.count("i") > len(INT_ARG_REGS) or kinds.count("f") > len(FLOAT_ARG_REGS):
+            raise CodegenError(f"too many arguments in call to {name}")
+        for kind in reversed(kinds):
+            if kind == "f":
+                self.pop_float(float_regs.pop())
+            else:
+                self.pop(int_regs.pop())
+
+        padded = self.depth % 2 == 1
+        if padded:
+            self.emit("subq $8, %rsp")
+        if variadic:
+            self.emit(f"movl ${kinds.count('f')}, %eax")
+        target = name if name in self.program.functions else f"{name}@PLT"
+        self.emit(f"call {target}")
+        if padded:
+            self.emit("addq $8, %rsp")
+        # only the low bits of a narrow result are defined; an undeclared function returns int
+        ret = ftype.return_type if ftype is not None else INT
+        if is_float(ret) and ret.size == 4:
+            self.emit("cvtss2sd %xmm0, %xmm0")
+        elif isinstance(ret, ScalarType) and ret.size in SIGN_EXTEND:
+            self.emit((SIGN_EXTEND if ret.signed else ZERO_EXTEND)[ret.size])
+
+
+class ProgramCompiler:
+    def __init__(self, tu):
+        self.tu = tu
+        self.types = tu.types
+        check_types(tu)
+        layout_frames(tu)
+        self.functions = {ext.frame.name: ext for ext in tu.external_declarations
+                          if isinstance(ext, FunctionDefinition)}
+        self.signatures = {}
+        self.global_types = {}
+        self.global_inits = {}
+        self.local_symbols = set()
+        self.labels = 0
+        self.floats = {}
+        self.strings = {}
+        self.needs_sign_mask = False
+
+        for ext in tu.external_declarations:
+            if isinstance(ext, FunctionDefinition):
+                base = self.types.from_specifiers(ext.specifiers)
+                self.signatures[ext.frame.name] = declarator_type(self.types, base, ext.declarator)
+            elif isinstance(ext, Declaration) and "typedef" not in ext.specifiers:
+                self.declare_globals(ext)
+        for fn in self.functions.values():
+            for decl in fn.frame.statics:
+                self.declare_globals(decl)
+
+    def declare_globals(self, decl):
+        base = self.types.from_specifiers(decl.specifiers)
+        for dec, init in decl.init_declarators:
+            ident = dec.direct_decl
+            if ident is None:
+                continue
+            ctype = declarator_type(self.types, base, dec)
+            if isinstance(ctype, FunctionType):
+                self.signatures.setdefault(ident.name, ctype)
+                continue
+            if not isinstance(ctype, ScalarType):
+                raise CodegenError(f"unsupported global type {ctype} for '{ident.name}'")
+            name = ident.symbol or ident.name
+            if ident.symbol is not None:
+                # a static local: a file-local symbol, never exported
+                self.local_symbols.add(name)
+            self.global_types[name] = ctype
+            self.global_inits[name] = 0 if init is None else evaluate_constant(init, self.types.enum_constants)
+
+    def new_label(self):
+        self.labels += 1
+        return f".L{self.labels}"
+
+    def float_constant(self, value):
+        if value not in self.floats:
+            self.floats[value] = f".LF{len(self.floats)}"
+        return self.floats[value]
+
+    def string_constant(self, token):
+        if token not in self.strings:
+            self.strings[token] = f".LS{len(self.strings)}"
+        return self.strings[token]
+
+    def sign_mask(self):
+        self.needs_sign_mask = True
+        return ".LSIGN"
+
+    def compile(self):
+        text = ["    .text"]
+        for fn in self.functions.values():
+            text.extend(FunctionCompiler(self, fn).compile())
+
+        data = []
+        if self.global_types:
+            data.append("    .data")
+            for name, ctype in self.global_types.items():
+                value = self.global_inits[name]
+                if name not in self.local_symbols:
+                    data.append(f"    .globl {name}")
+                data.append("    .align 8")
+                data.append(f"{name}:")
+                if is_float(ctype):
+                    data.append(f"    .{'float' if ctype.size == 4 else 'double'} {float(value)!r}")
+                else:
+                    data.append(f"    .quad {int(value)}")
+        if self.floats or self.strings or self.needs_sign_mask:
+            data.append("    .section .rodata")
+            for value, label in self.floats.items():
+                data.append("    .align 8")
+                data.append(f"{label}:")
+                data.append(f"    .double {value!r}")
+            if self.needs_sign_mask:
+                data.append("    .align 16")
+                data.append(".LSIGN:")
+                data.append("    .quad 0x8000000000000000, 0")
+            for token, label in self.strings.items():
+                encoded = string_literal(token).encode("utf-8") + b"\0"
+                data.append(f"{label}:")
+                data.append(f"    .byte {', '.join(str(b) for b in encoded)}")
+        data.append('    .section .note.GNU-stack,"",@progbits')
+        return "\n".join(text + data) + "\n"
+
+
+def compile_source(code):
+    return ProgramCompiler(Parser(lexer(code)).parse()).compile()
+
+
+def build_executable(asm, output, cc="cc"):
+    with tempfile.NamedTemporaryFile("w", suffix=".s", delete=False) as f:
+        f.write(asm)
+        path = f.name
+    try:
+        subprocess.run([cc, "-o", output, path], check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        raise CodegenError(f"assembler/linker failed:\n{e.stderr}") from None
+    finally:
+        os.unlink(path)
+    return output
+
+
+def main(argv):
+    if not argv:
+        print("uso: codegen_x86.py ARQUIVO.c [-S] [-o SAIDA]")
+        return 1
+    source = argv[0]
+    output = argv[argv.index("-o") + 1] if "-o" in argv else os.path.splitext(source)[0]
+    with open(source, encoding="utf-8") as f:
+        asm = compile_source(f.read())
+    if "-S" in argv:
+        path = output if output.endswith(".s") else output + ".s"
+        with open(path, "w") as f:
+            f.write(asm)
+        print(f"assembly gravado em {path}")
+    else:
+        build_executable(asm, output)
+        print(f"executável gravado em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
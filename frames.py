@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, List
+
+from parser import (Node, FunctionDefinition, Declaration, CompoundStatement, ForStatement,
+                    Identifier, declarator_type, declares_function, innermost)
+from type_registry import FunctionType
+
+
+@dataclass
+class FrameLayout:
+    name: str
+    param_count: int
+    return_type: Any
+    variadic: bool = False
+    names: List[str] = field(default_factory=list)
+    types: List[Any] = field(default_factory=list)
+    # block-scope static declarations: their storage is global and initialised once
+    statics: List[Any] = field(default_factory=list)
+
+    @property
+    def size(self):
+        return len(self.names)
+
+    def __str__(self):
+        slots = ", ".join(f"{i}:{name}:{ctype}" for i, (name, ctype) in enumerate(zip(self.names, self.types)))
+        return f"{self.name} (params={self.param_count}, size={self.size}) [{slots}]"
+
+
+class FrameAllocator:
+    # every parameter and local gets its own slot, so a slot's type never changes;
+    # static and extern locals get none and name a global symbol instead
+    def __init__(self, types, layout):
+        self.types = types
+        self.layout = layout
+        self.scopes = [{}]
+        self.symbols = set()
+
+    def allocate(self, ident, ctype):
+        slot = len(self.layout.names)
+        self.layout.names.append(ident.name)
+        self.layout.types.append(ctype)
+        self.scopes[-1][ident.name] = (slot, None)
+        ident.slot = slot
+        return slot
+
+    def bind_global(self, ident, symbol):
+        self.scopes[-1][ident.name] = (None, symbol)
+        ident.slot, ident.symbol = None, symbol
+
+    def static_symbol(self, name):
+        symbol = f"{self.layout.name}.{name}"
+        count = 1
+        while symbol in self.symbols:
+            count += 1
+            symbol = f"{self.layout.name}.{name}.{count}"
+        self.symbols.add(symbol)
+        return symbol
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None, None
+
+    def visit(self, node):
+        if isinstance(node, (list, tuple)):
+            for item in node:
+                self.visit(item)
+            return
+        if not isinstance(node, Node):
+            return
+
+        if isinstance(node, Identifier):
+            node.slot, node.symbol = self.lookup(node.name)
+        elif isinstance(node, Declaration):
+            if "typedef" in node.specifiers:
+                return
+            static, extern = "static" in node.specifiers, "extern" in node.specifiers
+            base = self.types.from_specifiers(node.specifiers)
+            for dec, init in node.init_declarators:
+                self.visit(init)
+                ident = dec.direct_decl
+                if ident is None or declares_function(dec):
+                    continue
+                if static:
+                    self.bind_global(ident, self.static_symbol(ident.name))
+                elif extern:
+                    self.bind_global(ident, ident.name)
+                else:
+                    self.allocate(ident, declarator_type(self.types, base, dec))
+            if static:
+                self.layout.statics.append(node)
+        elif isinstance(node, (CompoundStatement, ForStatement)):
+            self.scopes.append({})
+            for f in fields(node):
+                self.visit(getattr(node, f.name))
+            self.scopes.pop()
+        else:
+            for f in fields(node):
+                self.visit(getattr(node, f.name))
+
+
+def layout_function(fn, types):
+    declarator = fn.declarator
+    ftype = declarator_type(types, types.from_specifiers(fn.specifiers), declarator)
+    if not isinstance(ftype, FunctionType):
+        ftype = FunctionType(ftype)
+    params = innermost(declarator).params or []
+    layout = FrameLayout(declarator.direct_decl.name, len(params), ftype.return_type, ftype.variadic)
+    allocator = FrameAllocator(types, layout)
+    for param, ctype in zip(params, ftype.params):
+        ident = param.declarator.direct_decl if param.declarator is not None else None
+        if ident is None:
+            ident = Identifier("")
+        allocator.allocate(ident, ctype)
+    allocator.visit(fn.body.items)
+    fn.frame = layout
+    return layout
+
+
+def layout_frames(tu):
+    return {layout.name: layout
+            for layout in (layout_function(ext, tu.types) for ext in tu.external_declarations
+                           if isinstance(ext, FunctionDefinition))}
@@ -0,0 +1,224 @@
+import bisect
+import hashlib
+import os
+import sqlite3
+import sys
+
+from lexer import lexer
+from parser import Parser, ParseError, Identifier, innermost
+from visitor import Visitor
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT,
+    offset INTEGER,
+    line INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols(name, kind);
+CREATE INDEX IF NOT EXISTS symbols_by_file ON symbols(file_id);
+"""
+
+# kinds stored in symbols.kind
+DEF, REF, CALL, ASSIGN = "def", "ref", "call", "assign"
+
+INCDEC_OPS = {"++pre", "--pre", "++post", "--post"}
+
+
+def collect_symbols(ast):
+    collector = SymbolCollector()
+    collector.visit(ast)
+    return collector.out
+
+
+class SymbolCollector(Visitor):
+    def __init__(self):
+        self.scope = None
+        self.out = []
+
+    def visit_FunctionDefinition(self, node):
+        outer = self.scope
+        ident = node.declarator.direct_decl if node.declarator else None
+        if ident is not None:
+            self.out.append((ident.name, DEF, self.scope, ident.offset))
+            self.scope = ident.name
+        for param in (innermost(node.declarator).params if node.declarator else None) or []:
+            if param.declarator is not None and param.declarator.direct_decl is not None:
+                self.out.append((param.declarator.direct_decl.name, DEF, self.scope, param.declarator.direct_decl.offset))
+        if node.body is not None:
+            self.visit(node.body)
+        self.scope = outer
+
+    def visit_Declaration(self, node):
+        for dec, init in node.init_declarators:
+            ident = dec.direct_decl
+            if ident is not None:
+                self.out.append((ident.name, DEF, self.scope, ident.offset))
+            if init is not None:
+                self.visit(init)
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, Identifier):
+            return self.generic_visit(node)
+        self.out.append((node.func.name, CALL, self.scope, node.func.offset))
+        for arg in node.args:
+            self.visit(arg)
+
+    def visit_Assignment(self, node):
+        if not isinstance(node.left, Identifier):
+            return self.generic_visit(node)
+        self.out.append((node.left.name, ASSIGN, self.scope, node.left.offset))
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        if node.op in INCDEC_OPS and isinstance(node.operand, Identifier):
+            self.out.append((node.operand.name, ASSIGN, self.scope, node.operand.offset))
+        else:
+            self.generic_visit(node)
+
+    def visit_Identifier(self, node):
+        self.out.append((node.name, REF, self.scope, node.offset))
+
+
+def parse_source(code):
+    return Parser(lexer(code, offsets=True)).parse()
+
+
+class Index:
+    def __init__(self, db_path="xref.db"):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, paths):
+        changed = 0
+        with self.db:
+            for path in paths:
+                if self._update_file(path):
+                    changed += 1
+        return changed
+
+    def update_file(self, path):
+        with self.db:
+            return self._update_file(path)
+
+    def remove_file(self, path):
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(path),))
+
+    def prune(self):
+        # forget files that no longer exist on disk
+        with self.db:
+            gone = [(p,) for (p,) in self.db.execute("SELECT path FROM files") if not os.path.exists(p)]
+            self.db.executemany("DELETE FROM files WHERE path = ?", gone)
+        return len(gone)
+
+    def _update_file(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        row = self.db.execute("SELECT id, mtime_ns, size, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[1] == st.st_mtime_ns and row[2] == st.st_size:
+            return False
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if row and row[3] == digest:
+            self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (st.st_mtime_ns, st.st_size, row[0]))
+            return False
+
+        code = data.decode("utf-8", errors="replace")
+        error = None
+        try:
+            symbols = collect_symbols(parse_source(code))
+        except ParseError as e:
+            symbols = []
+            error = str(e)
+
+        if row:
+            file_id = row[0]
+            self.db.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+            self.db.execute("UPDATE files SET mtime_ns = ?, size = ?, digest = ?, error = ? WHERE id = ?",
+                            (st.st_mtime_ns, st.st_size, digest, error, file_id))
+        else:
+            cur = self.db.execute("INSERT INTO files (path, mtime_ns, size, digest, error) VALUES (?, ?, ?, ?, ?)",
+                                  (path, st.st_mtime_ns, st.st_size, digest, error))
+            file_id = cur.lastrowid
+
+        newlines = [i for i, ch in enumerate(code) if ch == "\n"]
+        self.db.executemany(
+            "INSERT INTO symbols (file_id, name, kind, scope, offset, line) VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, name, kind, scope, offset,
+              bisect.bisect_left(newlines, offset) + 1 if offset is not None else None)
+             for name, kind, scope, offset in symbols])
+        return True
+
+    def _query(self, name, kinds):
+        marks = ", ".join("?" for _ in kinds)
+        return self.db.execute(
+            f"SELECT f.path, s.line, s.offset, s.kind, s.scope FROM symbols s JOIN files f ON f.id = s.file_id "
+            f"WHERE s.name = ? AND s.kind IN ({marks}) ORDER BY f.path, s.offset",
+            (name, *kinds)).fetchall()
+
+    def definitions(self, name):
+        return self._query(name, (DEF,))
+
+    def references(self, name):
+        return self._query(name, (REF, CALL, ASSIGN))
+
+    def assignments(self, name):
+        return self._query(name, (ASSIGN,))
+
+    def callers(self, name):
+        return self._query(name, (CALL,))
+
+    def errors(self):
+        return self.db.execute("SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path").fetchall()
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] not in {"index", "defs", "refs", "assigns", "callers"}:
+        print("uso: indexer.py index DB ARQUIVOS... | indexer.py (defs|refs|assigns|callers) DB NOME")
+        return 1
+
+    command, db_path = argv[0], argv[1]
+    with Index(db_path) as index:
+        if command == "index":
+            changed = index.update(argv[2:])
+            index.prune()
+            print(f"{changed} arquivo(s) reindexado(s)")
+            for path, error in index.errors():
+                print(f"ERRO DE PARSING em {path}: {error}")
+            return 0
+
+        query = {"defs": index.definitions, "refs": index.references,
+                 "assigns": index.assignments, "callers": index.callers}[command]
+        for path, line, offset, kind, scope in query(argv[2]):
+            print(f"{path}:{line}: {kind:<6} {scope or '<global>'} (offset {offset})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
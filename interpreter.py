@@ -0,0 +1,705 @@
+import copy
+import operator
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+from lexer import lexer
+from parser import (Parser, TranslationUnit, FunctionDefinition, Declaration, CompoundStatement, IfStatement,
+                    WhileStatement, ForStatement, SwitchStatement, CaseStatement, DoWhileStatement,
+                    ReturnStatement, ExpressionStatement, BreakStatement, ContinueStatement,
+                    BinaryOp, UnaryOp, TernaryOp, Assignment, Call, Constant, Identifier,
+                    ArraySubscript, MemberAccess, ESCAPES, c_div, c_mod, declarator_type, declares_function,
+                    evaluate_constant)
+from type_registry import (ScalarType, PointerType, ArrayType, AggregateType, EnumType, FunctionType, INTEGER_BY_NAME,
+                           FLOAT, is_integer, is_arithmetic, integer_promotion, usual_arithmetic_conversion)
+from typecheck import check_types, decay
+from frames import layout_frames
+from memory import CRuntimeError, Pointer, MEMORY_BUILTINS, typecode, strides, c_string
+from runtime import STDIO
+
+
+class Signal:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+BREAK = Signal("BREAK")
+CONTINUE = Signal("CONTINUE")
+RETURN = Signal("RETURN")
+
+
+@lru_cache(maxsize=None)
+def string_literal(token):
+    body = token[1:-1]
+    out = []
+    i = 0
+    while i < len(body):
+        if body[i] == "\\" and i + 1 < len(body):
+            out.append(ESCAPES.get(body[i:i + 2], body[i + 1]))
+            i += 2
+        else:
+            out.append(body[i])
+            i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=None)
+def string_buffer(token):
+    # string literals are static char arrays, shared by every evaluation of the token
+    return array("b", string_literal(token).encode("utf-8") + b"\0")
+
+
+def deref(value):
+    if value.__class__ is Pointer:
+        return value.load()
+    if isinstance(value, (list, array)):
+        return value[0]
+    if value.__class__ is FunctionDefinition:
+        # *fp designates the function itself, which decays straight back to fp
+        return value
+    raise CRuntimeError(f"cannot dereference {value!r}")
+
+
+def add(a, b):
+    try:
+        return a + b
+    except TypeError:
+        if isinstance(a, (list, array)):
+            return Pointer(a, b)
+        if isinstance(b, (list, array)):
+            return Pointer(b, a)
+        raise
+
+
+def sub(a, b):
+    try:
+        return a - b
+    except TypeError:
+        if isinstance(a, (list, array)):
+            return Pointer(a, 0) - b
+        raise
+
+
+BINARY_OPS = {
+    "+": add, "-": sub, "*": lambda a, b: a * b, "/": c_div, "%": c_mod,
+    "<<": lambda a, b: a << b, ">>": lambda a, b: a >> b,
+    "&": lambda a, b: a & b, "|": lambda a, b: a | b, "^": lambda a, b: a ^ b,
+    "==": lambda a, b: int(a == b), "!=": lambda a, b: int(a != b),
+    "<": lambda a, b: int(a < b), ">": lambda a, b: int(a > b),
+    "<=": lambda a, b: int(a <= b), ">=": lambda a, b: int(a >= b),
+}
+
+def int_div(a, b):
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+def int_mod(a, b):
+    return a - b * int_div(a, b)
+
+
+# picked ahead of time from the operand types computed by the type checker
+INT_BINARY_OPS = {
+    **BINARY_OPS, "+": operator.add, "-": operator.sub, "*": operator.mul, "/": int_div, "%": int_mod,
+}
+
+FLOAT_BINARY_OPS = {
+    **BINARY_OPS, "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+}
+
+# unsigned operations reduce their operands modulo 2**N, so that -1 < 0u compares the
+# large unsigned value -1 converts to; results wrap, and >> is a logical shift
+UNSIGNED_OPS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.floordiv, "%": operator.mod,
+    "&": operator.and_, "|": operator.or_, "^": operator.xor,
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge,
+}
+
+
+def float32_op(impl):
+    return lambda a, b: to_float32(impl(a, b))
+
+
+def unsigned_mask(ctype):
+    # 2**N - 1 for an N-bit unsigned integer type, None for any other type
+    if ctype.__class__ is ScalarType and not ctype.is_float and not ctype.signed:
+        return (1 << 8 * ctype.size) - 1
+    return None
+
+
+def operation_mask(op, left, right):
+    # the mask of the unsigned type an integer operator computes in (the promoted left
+    # operand for shifts, the usual arithmetic conversion otherwise), or None
+    if op in ("<<", ">>"):
+        return unsigned_mask(integer_promotion(left))
+    return unsigned_mask(usual_arithmetic_conversion(left, right))
+
+
+def unsigned_binary_op(op, mask):
+    if op == "<<":
+        return lambda a, b: (a << b) & mask
+    if op == ">>":
+        return lambda a, b: (a & mask) >> b
+    impl = UNSIGNED_OPS[op]
+    if op in ("==", "!=", "<", ">", "<=", ">="):
+        return lambda a, b: int(impl(a & mask, b & mask))
+    if op in ("/", "%"):
+        return lambda a, b: impl(a & mask, b & mask)
+    return lambda a, b: impl(a, b) & mask
+
+ASSIGN_OPS = {
+    "PLUS_ASSIGN": "+", "MINUS_ASSIGN": "-", "MUL_ASSIGN": "*", "DIV_ASSIGN": "/", "MOD_ASSIGN": "%",
+    "BIT_AND_ASSIGN": "&", "BIT_OR_ASSIGN": "|", "BIT_XOR_ASSIGN": "^",
+    "SHIFT_LEFT_ASSIGN": "<<", "SHIFT_RIGHT_ASSIGN": ">>",
+}
+
+
+def zero_value(ctype):
+    if isinstance(ctype, ScalarType):
+        return 0.0 if ctype.is_float else 0
+    if isinstance(ctype, ArrayType):
+        code = typecode(ctype)
+        if code is not None:
+            return array(code, [0.0 if code in "fd" else 0]) * (strides(ctype)[0] * (ctype.length or 0))
+        element = ctype.element
+        while isinstance(element, ArrayType):
+            element = element.element
+        return [zero_value(element) for _ in range(strides(ctype)[0] * (ctype.length or 0))]
+    if isinstance(ctype, AggregateType):
+        if ctype.kind == "union":
+            return [zero_value(ctype.members[0][1]) if ctype.members else 0]
+        return [zero_value(member_type) for _, member_type in ctype.members]
+    return 0
+
+
+INTEGER_LIMITS = {ctype: (-(1 << (8 * ctype.size - 1)), (1 << (8 * ctype.size - 1)) - 1) if ctype.signed
+                  else (0, (1 << (8 * ctype.size)) - 1)
+                  for ctype in INTEGER_BY_NAME.values()}
+
+# keyed by name for convert(): hashing the frozen type dataclass on every store is slow
+LIMITS_BY_NAME = {ctype.name: limits for ctype, limits in INTEGER_LIMITS.items()}
+
+
+FLOAT32 = struct.Struct("f")
+
+
+def to_float32(value):
+    # a C float: the value rounded to single precision, as a float array element is
+    return FLOAT32.unpack(FLOAT32.pack(value))[0]
+
+
+def convert(ctype, value):
+    cls = ctype.__class__
+    if cls is ScalarType:
+        if ctype.is_float:
+            return to_float32(value) if ctype.size == 4 else float(value)
+        if value.__class__ is float:
+            value = int(value)
+        if value.__class__ is int:
+            limits = LIMITS_BY_NAME.get(ctype.name)
+            if limits is not None and not limits[0] <= value <= limits[1]:
+                lo, hi = limits
+                value = (value - lo) % (hi - lo + 1) + lo
+        return value
+    if cls is PointerType:
+        if isinstance(value, (list, array)):
+            return Pointer(value, 0, strides(ctype))
+        return value
+    if cls is ArrayType and value.__class__ is array:
+        # char s[N] = "...": a private copy of the literal, padded with zeros to N
+        buffer = array(typecode(ctype) or "b", value.tobytes())
+        if len(buffer) < (ctype.length or 0):
+            buffer.extend(bytes(ctype.length - len(buffer)))
+        return buffer
+    if cls is AggregateType:
+        return copy.deepcopy(value)
+    if cls is EnumType and value.__class__ is float:
+        return int(value)
+    return value
+
+
+def pointer_arithmetic(op, ctype):
+    # arrays decay to pointers that step over whole rows of the flattened buffer
+    stride = strides(ctype)
+
+    def offset(pointer, n):
+        if pointer.__class__ is not Pointer:
+            pointer = Pointer(pointer, 0, stride)
+        return pointer + n if op == "+" else pointer - n
+
+    if op == "+":
+        return lambda a, b: offset(b, a) if isinstance(a, int) else offset(a, b)
+    return offset
+
+
+def select_binary_op(op, left, right):
+    left, right = decay(left), decay(right)
+    if op in ("+", "-") and isinstance(left, PointerType) and is_integer(right):
+        return pointer_arithmetic(op, left)
+    if op == "+" and isinstance(right, PointerType) and is_integer(left):
+        return pointer_arithmetic(op, right)
+    if is_integer(left) and is_integer(right):
+        mask = operation_mask(op, left, right)
+        return INT_BINARY_OPS[op] if mask is None else unsigned_binary_op(op, mask)
+    if is_arithmetic(left) and is_arithmetic(right):
+        if op in ("+", "-", "*", "/") and usual_arithmetic_conversion(left, right) == FLOAT:
+            # float arithmetic is carried out in single precision
+            return float32_op(FLOAT_BINARY_OPS[op])
+        return FLOAT_BINARY_OPS[op]
+    return BINARY_OPS[op]
+
+
+class Interpreter:
+    def __init__(self, tu, builtins=None, specialize=True):
+        self.tu = tu
+        self.types = tu.types
+        check_types(tu)
+        self.layouts = layout_frames(tu)
+        self.functions = {}
+        self.globals = {}
+        self.global_types = {}
+        self.builtins = {**MEMORY_BUILTINS, **STDIO.builtins, **(builtins or {})}
+        self.layout = None
+        self.return_value = None
+        self.decl_types = {}
+        self.switch_tables = {}
+        self.call_sites = {}
+
+        self.exec_table = {
+            CompoundStatement: self.exec_compound,
+            Declaration: self.exec_declaration,
+            ExpressionStatement: self.exec_expression,
+            IfStatement: self.exec_if,
+            WhileStatement: self.exec_while,
+            DoWhileStatement: self.exec_do_while,
+            ForStatement: self.exec_for,
+            SwitchStatement: self.exec_switch,
+            CaseStatement: self.exec_case,
+            ReturnStatement: self.exec_return,
+            BreakStatement: lambda node, frame: BREAK,
+            ContinueStatement: lambda node, frame: CONTINUE,
+        }
+        self.eval_table = {
+            Constant: self.eval_constant,
+            Identifier: self.eval_identifier,
+            BinaryOp: self.eval_binary if specialize else self.eval_binary_generic,
+            UnaryOp: self.eval_unary,
+            TernaryOp: self.eval_ternary,
+            Assignment: self.eval_assignment if specialize else self.eval_assignment_generic,
+            Call: self.eval_call,
+            ArraySubscript: self.eval_subscript,
+            MemberAccess: self.eval_member,
+        }
+
+        for ext in tu.external_declarations:
+            if isinstance(ext, FunctionDefinition):
+                self.functions[ext.frame.name] = ext
+            elif isinstance(ext, Declaration):
+                self.exec_declaration(ext, None)
+        # static locals are initialised once, before any code runs, like the globals
+        for layout in self.layouts.values():
+            for decl in layout.statics:
+                self.exec_declaration(decl, None)
+
+    # entry points
+    def run(self, entry="main", args=()):
+        if entry not in self.functions:
+            raise CRuntimeError(f"undefined function '{entry}'")
+        try:
+            return self.call_function(self.functions[entry], list(args))
+        finally:
+            fflush = self.builtins.get("fflush")
+            if fflush is not None:
+                fflush(0)
+
+    def call_function(self, fn, args):
+        layout = fn.frame
+        count = layout.param_count
+        if len(args) != count and not (layout.variadic and len(args) > count):
+            raise CRuntimeError(f"{layout.name} expects {count} argument(s), got {len(args)}")
+        frame = [None] * layout.size
+        types = layout.types
+        for i in range(count):
+            frame[i] = convert(types[i], args[i])
+
+        previous = self.layout
+        self.layout = layout
+        try:
+            signal = self.exec_table[CompoundStatement](fn.body, frame)
+        finally:
+            self.layout = previous
+        if signal is RETURN:
+            value = self.return_value
+            self.return_value = None
+            if value is not None:
+                return convert(layout.return_type, value)
+        return None
+
+    def take_return(self):
+        # the value of a return statement that compiled code handed back to the interpreter
+        value = self.return_value
+        self.return_value = None
+        if value is not None:
+            return convert(self.layout.return_type, value)
+        return None
+
+    # statements
+    def execute(self, node, frame):
+        return self.exec_table[node.__class__](node, frame)
+
+    def exec_compound(self, node, frame):
+        table = self.exec_table
+        for item in node.items:
+            signal = table[item.__class__](item, frame)
+            if signal is not None:
+                return signal
+        return None
+
+    def exec_declaration(self, node, frame):
+        if "typedef" in node.specifiers:
+            return None
+        for dec, init in node.init_declarators:
+            ident = dec.direct_decl
+            if declares_function(dec) or ident is None:
+                continue
+            if frame is not None and ident.slot is None:
+                # a static or extern local: its storage is global and already set up
+                continue
+            ctype = self.decl_types.get(id(dec))
+            if ctype is None:
+                base = self.types.from_specifiers(node.specifiers)
+                ctype = self.decl_types[id(dec)] = declarator_type(self.types, base, dec)
+            value = zero_value(ctype) if init is None else convert(ctype, self.evaluate(init, frame))
+            if frame is not None:
+                frame[ident.slot] = value
+            else:
+                name = ident.symbol or ident.name
+                self.globals[name] = value
+                self.global_types[name] = ctype
+        return None
+
+    def exec_expression(self, node, frame):
+        if node.expr is not None:
+            self.evaluate(node.expr, frame)
+        return None
+
+    def exec_if(self, node, frame):
+        if self.evaluate(node.cond, frame):
+            return self.execute(node.then_stmt, frame)
+        if node.else_stmt is not None:
+            return self.execute(node.else_stmt, frame)
+        return None
+
+    def exec_while(self, node, frame):
+        evaluate, execute = self.evaluate, self.execute
+        cond, body = node.cond, node.body
+        while evaluate(cond, frame):
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+        return None
+
+    def exec_do_while(self, node, frame):
+        evaluate, execute = self.evaluate, self.execute
+        cond, body = node.cond, node.body
+        while True:
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+            if not evaluate(cond, frame):
+                break
+        return None
+
+    def exec_for(self, node, frame):
+        evaluate, execute = self.evaluate, self.execute
+        if node.init is not None:
+            execute(node.init, frame)
+        cond, post, body = node.cond, node.post, node.body
+        while cond is None or evaluate(cond, frame):
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+            if post is not None:
+                evaluate(post, frame)
+        return None
+
+    def switch_table(self, node):
+        table = self.switch_tables.get(id(node))
+        if table is None:
+            cases, default = {}, None
+            for i, item in enumerate(node.body.items):
+                if isinstance(item, CaseStatement):
+                    if item.expr is None:
+                        default = i
+                    else:
+                        cases.setdefault(evaluate_constant(item.expr, self.types.enum_constants), i)
+            table = self.switch_tables[id(node)] = (cases, default)
+        return table
+
+    def exec_switch(self, node, frame):
+        cases, default = self.switch_table(node)
+        start = cases.get(self.evaluate(node.cond, frame), default)
+        if start is None:
+            return None
+        for item in node.body.items[start:]:
+            signal = self.execute(item, frame)
+            if signal is BREAK:
+                return None
+            if signal is not None:
+                return signal
+        return None
+
+    def exec_case(self, node, frame):
+        for item in node.body:
+            signal = self.execute(item, frame)
+            if signal is not None:
+                return signal
+        return None
+
+    def exec_return(self, node, frame):
+        self.return_value = None if node.expr is None else self.evaluate(node.expr, frame)
+        return RETURN
+
+    # expressions
+    def evaluate(self, node, frame):
+        return self.eval_table[node.__class__](node, frame)
+
+    def eval_constant(self, node, frame):
+        value = node.value
+        if value.__class__ is str:
+            if value.startswith("'"):
+                return evaluate_constant(node)
+            return string_buffer(value)
+        return value
+
+    def eval_identifier(self, node, frame):
+        slot = node.slot
+        if slot is not None:
+            return frame[slot]
+        name = node.symbol or node.name
+        if name in self.globals:
+            return self.globals[name]
+        if name in self.functions:
+            return self.functions[name]
+        if name in self.types.enum_constants:
+            return self.types.enum_constants[name]
+        raise CRuntimeError(f"undeclared identifier '{name}'")
+
+    def eval_binary(self, node, frame):
+        op = node.op
+        if op == "&&":
+            return int(bool(self.evaluate(node.left, frame)) and bool(self.evaluate(node.right, frame)))
+        if op == "||":
+            return int(bool(self.evaluate(node.left, frame)) or bool(self.evaluate(node.right, frame)))
+        impl = node.op_impl
+        if impl is None:
+            impl = node.op_impl = select_binary_op(op, node.left.ctype, node.right.ctype)
+        try:
+            return impl(self.evaluate(node.left, frame), self.evaluate(node.right, frame))
+        except ZeroDivisionError:
+            raise CRuntimeError("division by zero") from None
+
+    def eval_binary_generic(self, node, frame):
+        op = node.op
+        if op == "&&":
+            return int(bool(self.evaluate(node.left, frame)) and bool(self.evaluate(node.right, frame)))
+        if op == "||":
+            return int(bool(self.evaluate(node.left, frame)) or bool(self.evaluate(node.right, frame)))
+        try:
+            return BINARY_OPS[op](self.evaluate(node.left, frame), self.evaluate(node.right, frame))
+        except ZeroDivisionError:
+            raise CRuntimeError("division by zero") from None
+
+    def eval_unary(self, node, frame):
+        op = node.op
+        if op == "&":
+            if node.operand.ctype.__class__ is FunctionType:
+                return self.evaluate(node.operand, frame)
+            if node.operand.ctype.__class__ is ArrayType:
+                return Pointer(self.evaluate(node.operand, frame), 0, strides(node.ctype))
+            return Pointer(*self.lvalue(node.operand, frame), strides(node.ctype))
+        if op in INCDEC:
+            base, key = self.lvalue(node.operand, frame)
+            old = base[key]
+            new = old + 1 if op[0] == "+" else old - 1
+            self.store(node.operand, base, key, new)
+            return new if op.endswith("pre") else old
+        value = self.evaluate(node.operand, frame)
+        if op == "-u":
+            mask = unsigned_mask(node.ctype)
+            return -value if mask is None else -value & mask
+        if op == "+u":
+            return value
+        if op == "!":
+            return int(not value)
+        if op == "~":
+            mask = unsigned_mask(node.ctype)
+            return ~value if mask is None else ~value & mask
+        if op == "*":
+            if value.__class__ is not Pointer and node.ctype.__class__ is ArrayType:
+                value = Pointer(value, 0, strides(node.operand.ctype))
+            return deref(value)
+        raise CRuntimeError(f"unsupported unary operator {op}")
+
+    def eval_ternary(self, node, frame):
+        if self.evaluate(node.cond, frame):
+            value = self.evaluate(node.if_true, frame)
+        else:
+            value = self.evaluate(node.if_false, frame)
+        return convert(node.ctype, value) if node.converts else value
+
+    def eval_assignment(self, node, frame):
+        value = self.evaluate(node.right, frame)
+        base, key = self.lvalue(node.left, frame)
+        if node.op != "ASSIGN":
+            impl = node.op_impl
+            if impl is None:
+                impl = node.op_impl = select_binary_op(ASSIGN_OPS[node.op], node.left.ctype, node.right.ctype)
+            try:
+                value = impl(base[key], value)
+            except ZeroDivisionError:
+                raise CRuntimeError("division by zero") from None
+        return self.store(node.left, base, key, value)
+
+    def eval_assignment_generic(self, node, frame):
+        value = self.evaluate(node.right, frame)
+        base, key = self.lvalue(node.left, frame)
+        if node.op != "ASSIGN":
+            try:
+                value = BINARY_OPS[ASSIGN_OPS[node.op]](base[key], value)
+            except ZeroDivisionError:
+                raise CRuntimeError("division by zero") from None
+        return self.store(node.left, base, key, value)
+
+    def eval_call(self, node, frame):
+        func = node.func
+        if func.__class__ is Identifier and func.slot is None and func.symbol is None:
+            fn = self.functions.get(func.name)
+            if fn is not None:
+                return self.call_function(fn, [self.evaluate(arg, frame) for arg in node.args])
+            site = self.call_sites.get(id(node))
+            if site is None and func.name not in self.globals:
+                builtin = self.builtins.get(func.name)
+                if builtin is None:
+                    raise CRuntimeError(f"undefined function '{func.name}'")
+                site = self.bind_builtin(node, builtin)
+            if site is not None:
+                impl, args = site
+                return impl(*[self.evaluate(arg, frame) for arg in args])
+        args = [self.evaluate(arg, frame) for arg in node.args]
+        target = self.evaluate(func, frame)
+        if isinstance(target, Pointer):
+            target = target.load()
+        if isinstance(target, FunctionDefinition):
+            return self.call_function(target, args)
+        raise CRuntimeError("called object is not a function")
+
+    def bind_builtin(self, node, builtin):
+        # printf("literal", ...) gets a function with its format already compiled, so the
+        # format is parsed once per call site rather than once per call
+        site = self.call_sites.get(id(node))
+        if site is None:
+            bind = getattr(builtin, "bind", None)
+            first = node.args[0] if node.args else None
+            if (bind is not None and first.__class__ is Constant and first.value.__class__ is str
+                    and first.value.startswith('"')):
+                site = (bind(c_string(string_buffer(first.value))), node.args[1:])
+            else:
+                site = (builtin, node.args)
+            self.call_sites[id(node)] = site
+        return site
+
+    def eval_subscript(self, node, frame):
+        base, key, stride = self.element(node, frame)
+        if len(stride) > 1:
+            return Pointer(base, key, stride[1:])
+        return base[key]
+
+    def element(self, node, frame):
+        # (buffer, offset, strides) of a subscript; m[i][j] walks the flat buffer of m
+        # without materialising the row m[i] in between
+        array = node.array
+        if array.__class__ is ArraySubscript and array.ctype.__class__ is ArrayType:
+            base, offset, stride = self.element(array, frame)
+            stride = stride[1:]
+        else:
+            base = self.evaluate(array, frame)
+            if base.__class__ is Pointer:
+                base, offset, stride = base.base, base.index, base.strides
+            else:
+                offset, stride = 0, node.stride
+                if stride is None:
+                    stride = node.stride = strides(array.ctype)
+        return base, offset + self.evaluate(node.index, frame) * stride[0], stride
+
+    def eval_member(self, node, frame):
+        base, key = self.lvalue(node, frame)
+        if node.shared:
+            return convert(node.ctype, base[key])
+        return base[key]
+
+    # lvalues are (container, key) pairs
+    def lvalue(self, node, frame):
+        cls = node.__class__
+        if cls is Identifier:
+            if node.slot is not None:
+                return frame, node.slot
+            name = node.symbol or node.name
+            if name in self.globals:
+                return self.globals, name
+            raise CRuntimeError(f"undeclared identifier '{node.name}'")
+        if cls is ArraySubscript:
+            base, key, _ = self.element(node, frame)
+            return base, key
+        if cls is MemberAccess:
+            target = self.evaluate(node.target, frame)
+            if node.arrow:
+                target = deref(target)
+            if node.index is None:
+                raise CRuntimeError(f"cannot resolve member '{node.member}'")
+            return target, node.index
+        if cls is UnaryOp and node.op == "*":
+            pointer = self.evaluate(node.operand, frame)
+            if isinstance(pointer, Pointer):
+                return pointer.base, pointer.index
+            if isinstance(pointer, (list, array)):
+                return pointer, 0
+        raise CRuntimeError(f"expression is not assignable: {node}")
+
+    def store(self, node, base, key, value):
+        if node.__class__ is Identifier:
+            if node.slot is not None:
+                value = convert(self.layout.types[node.slot], value)
+            else:
+                value = convert(self.global_types[node.symbol or node.name], value)
+        elif node.ctype.__class__ is ScalarType:
+            # typed buffers only hold values already narrowed to the element type
+            value = convert(node.ctype, value)
+        base[key] = value
+        return value
+
+
+INCDEC = {"++pre", "--pre", "++post", "--post"}
+
+
+def run_source(code, entry="main", builtins=None):
+    return Interpreter(Parser(lexer(code)).parse(), builtins).run(entry)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8") as f:
+        result = run_source(f.read())
+    sys.exit(result if isinstance(result, int) else 0)
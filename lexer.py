@@ -46,7 +46,7 @@ TOKEN_SPEC = [
     
     ("STRING", r"\"([^\"\\]|\\.)*\""),
     ("CHAR_LITERAL", r"'([^'\\]|\\.)'"),
-    ("NUMBER", r"0[xX][0-9a-fA-F]+([uU]|[lL]{1,2})?|\b\d+(\.\d+)?([eE][+-]?\d+)?([uU]|[lL]{1,2})?\b"),
+    ("NUMBER", r"0[xX][0-9a-fA-F]+([uU][lL]{0,2}|[lL]{1,2}[uU]?)?|\b\d+(\.\d+)?([eE][+-]?\d+)?([uU][lL]{0,2}|[lL]{1,2}[uU]?)?\b"),
 
     
     ("PLUS_ASSIGN", r"\+="),
@@ -115,7 +115,7 @@ TOKEN_SPEC = [
 
 token_regex = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC))
 
-def lexer(code):
+def lexer(code, offsets=False):
     tokens = []
     for match in token_regex.finditer(code):
         kind = match.lastgroup
@@ -124,5 +124,8 @@ def lexer(code):
         if kind in {"SKIP", "COMMENT", "MULTI_COMMENT", "PREPROCESSOR"}:
             continue  
 
-        tokens.append((kind, value))
+        if offsets:
+            tokens.append((kind, value, match.start()))
+        else:
+            tokens.append((kind, value))
     return tokens
\ No newline at end of file
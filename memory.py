@@ -0,0 +1,157 @@
+from array import array
+from functools import lru_cache
+
+from type_registry import (PointerType, ArrayType, EnumType, CHAR, UCHAR, SHORT, USHORT, INT, UINT,
+                           LONG, ULONG, LONGLONG, ULONGLONG, FLOAT, DOUBLE, LONGDOUBLE)
+
+
+class CRuntimeError(Exception):
+    pass
+
+
+class Pointer:
+    # strides[0] is how many buffer slots one step of the pointer moves; a pointer to
+    # rows of a flattened multi-dimensional array keeps the strides of the levels below
+    __slots__ = ("base", "index", "strides")
+
+    def __init__(self, base, index=0, strides=(1,)):
+        self.base = base
+        self.index = index
+        self.strides = strides
+
+    def load(self):
+        if len(self.strides) > 1:
+            return Pointer(self.base, self.index, self.strides[1:])
+        return self.base[self.index]
+
+    def store(self, value):
+        self.base[self.index] = value
+
+    def __add__(self, n):
+        return Pointer(self.base, self.index + n * self.strides[0], self.strides)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Pointer):
+            return (self.index - other.index) // self.strides[0]
+        if isinstance(other, (list, array)):
+            return self.index // self.strides[0]
+        return Pointer(self.base, self.index - other * self.strides[0], self.strides)
+
+    def __eq__(self, other):
+        if isinstance(other, Pointer):
+            return other.base is self.base and other.index == self.index
+        return other is self.base and self.index == 0
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.index < other.index
+
+    def __le__(self, other):
+        return self.index <= other.index
+
+    def __gt__(self, other):
+        return self.index > other.index
+
+    def __ge__(self, other):
+        return self.index >= other.index
+
+    def __hash__(self):
+        return hash((id(self.base), self.index))
+
+    def __repr__(self):
+        return f"Pointer({type(self.base).__name__}@{id(self.base):x}, {self.index})"
+
+
+# arrays whose innermost element is one of these live in a single flat array.array
+TYPECODES = {
+    CHAR: "b", UCHAR: "B", SHORT: "h", USHORT: "H", INT: "i", UINT: "I", LONG: "q", ULONG: "Q",
+    LONGLONG: "q", ULONGLONG: "Q", FLOAT: "f", DOUBLE: "d", LONGDOUBLE: "d",
+}
+
+
+@lru_cache(maxsize=None)
+def typecode(ctype):
+    while isinstance(ctype, ArrayType):
+        ctype = ctype.element
+    if isinstance(ctype, EnumType):
+        return "i"
+    return TYPECODES.get(ctype)
+
+
+@lru_cache(maxsize=None)
+def strides(ctype):
+    # buffer slots per step at each level of an array (or of what a pointer points to);
+    # every array is one flat buffer in which a struct or pointer element takes one slot
+    if isinstance(ctype, PointerType):
+        ctype = ArrayType(ctype.target, None)
+    if not isinstance(ctype, ArrayType) or not isinstance(ctype.element, ArrayType):
+        return (1,)
+    inner = strides(ctype.element)
+    return (inner[0] * (ctype.element.length or 0),) + inner
+
+
+def load_element(array, index, stride):
+    if array.__class__ is Pointer:
+        stride = array.strides
+        array, index = array.base, array.index + index * stride[0]
+    else:
+        index *= stride[0]
+    if len(stride) > 1:
+        return Pointer(array, index, stride[1:])
+    return array[index]
+
+
+def element_lvalue(array, index, stride):
+    if array.__class__ is Pointer:
+        return array.base, array.index + index * array.strides[0]
+    return array, index * stride[0]
+
+
+def c_string(value):
+    # the bytes of a NUL-terminated char array, up to but not including the NUL
+    base, index = (value.base, value.index) if value.__class__ is Pointer else (value, 0)
+    if base.__class__ is not array or base.itemsize != 1:
+        raise CRuntimeError(f"expected a string, got {value!r}")
+    try:
+        end = base.index(0, index)
+    except ValueError:
+        raise CRuntimeError("string is not NUL-terminated") from None
+    return base[index:end].tobytes()
+
+
+def byte_view(pointer, name):
+    base, index = (pointer.base, pointer.index) if pointer.__class__ is Pointer else (pointer, 0)
+    if base.__class__ is not array:
+        raise CRuntimeError(f"{name}: only arrays of arithmetic type can be accessed byte by byte")
+    return memoryview(base).cast("B")[index * base.itemsize:]
+
+
+def c_memset(dest, c, n):
+    view = byte_view(dest, "memset")
+    if n > len(view):
+        raise CRuntimeError("memset: write past the end of the array")
+    view[:n] = bytes((c & 0xff,)) * n
+    return dest
+
+
+def c_memcpy(dest, src, n):
+    target, source = byte_view(dest, "memcpy"), byte_view(src, "memcpy")
+    if n > len(target) or n > len(source):
+        raise CRuntimeError("memcpy: access past the end of the array")
+    target[:n] = source[:n]
+    return dest
+
+
+def c_memcmp(a, b, n):
+    left, right = byte_view(a, "memcmp"), byte_view(b, "memcmp")
+    if n > len(left) or n > len(right):
+        raise CRuntimeError("memcmp: access past the end of the array")
+    left, right = left[:n].tobytes(), right[:n].tobytes()
+    return (left > right) - (left < right)
+
+
+MEMORY_BUILTINS = {"memset": c_memset, "memcpy": c_memcpy, "memmove": c_memcpy, "memcmp": c_memcmp}
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Any, Union
 import lexer
+from type_registry import TypeRegistry, ArrayType, PointerType, FunctionType, INT, UINT, LONG, ULONG
 
 
 
@@ -11,12 +12,14 @@ class Node:
 @dataclass
 class TranslationUnit(Node):
     external_declarations: List[Node]
+    types: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class FunctionDefinition(Node):
     specifiers: List[str]
     declarator: Any
     body: Any  
+    frame: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class Declaration(Node):
@@ -31,10 +34,25 @@ class Typedef(Node):
 class Declarator(Node):
     pointer: int
     direct_decl: Any  
+    dims: List[Any] = field(default_factory=list)
+    params: Optional[List[Any]] = None
+    variadic: bool = False
+    # the parenthesised part of int (*fp)(int): its pointers, dims and params derive
+    # from the type this declarator builds, so fp is a pointer to a function
+    nested: Optional["Declarator"] = None
+
+@dataclass
+class ParameterDeclaration(Node):
+    specifiers: List[str]
+    declarator: Optional[Declarator]
 
 @dataclass
 class Identifier(Node):
     name: str
+    offset: Optional[int] = field(default=None, compare=False, repr=False)
+    slot: Optional[int] = field(default=None, compare=False, repr=False)
+    symbol: Optional[str] = field(default=None, compare=False, repr=False)
+    ctype: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class CompoundStatement(Node):
@@ -94,53 +112,235 @@ class BinaryOp(Node):
     op: str
     left: Node
     right: Node
+    ctype: Any = field(default=None, compare=False, repr=False)
+    op_impl: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class UnaryOp(Node):
     op: str
     operand: Node
+    ctype: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class TernaryOp(Node):
     cond: Node
     if_true: Node
     if_false: Node
+    ctype: Any = field(default=None, compare=False, repr=False)
+    # set when a branch has to be converted to the common arithmetic type, as in c ? 1 : 2.0
+    converts: bool = field(default=False, compare=False, repr=False)
 
 @dataclass
 class Assignment(Node):
     op: str
     left: Node
     right: Node
+    ctype: Any = field(default=None, compare=False, repr=False)
+    op_impl: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class Call(Node):
     func: Node
     args: List[Node]
+    ctype: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class Constant(Node):
     value: Any
+    ctype: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class ArraySubscript(Node):
     array: Node
     index: Node
+    ctype: Any = field(default=None, compare=False, repr=False)
+    stride: Any = field(default=None, compare=False, repr=False)
 
 @dataclass
 class MemberAccess(Node):
     target: Node
     member: str
     arrow: bool  
+    offset: Optional[int] = field(default=None, compare=False, repr=False)
+    index: Optional[int] = field(default=None, compare=False, repr=False)
+    # a scalar union member: its slot holds whichever member was stored last
+    shared: bool = field(default=False, compare=False, repr=False)
+    ctype: Any = field(default=None, compare=False, repr=False)
+
+
+
+TYPE_SPECIFIER_KINDS = frozenset({"INT","FLOAT","CHAR","VOID","DOUBLE","LONG","SHORT","SIGNED","UNSIGNED"})
+STORAGE_CLASS_KINDS = frozenset({"TYPEDEF","STATIC","EXTERN","AUTO","REGISTER"})
+TYPE_QUALIFIER_KINDS = frozenset({"CONST","VOLATILE"})
+AGGREGATE_KINDS = frozenset({"STRUCT","UNION","ENUM"})
+SIMPLE_SPECIFIER_KINDS = TYPE_SPECIFIER_KINDS | STORAGE_CLASS_KINDS | TYPE_QUALIFIER_KINDS
+
+ASSIGNMENT_KINDS = frozenset({"ASSIGN","PLUS_ASSIGN","MINUS_ASSIGN","MUL_ASSIGN","DIV_ASSIGN","MOD_ASSIGN","BIT_AND_ASSIGN","BIT_OR_ASSIGN","BIT_XOR_ASSIGN","SHIFT_LEFT_ASSIGN","SHIFT_RIGHT_ASSIGN"})
+DECLARATOR_START_KINDS = frozenset({"ID","LPAREN","MULTIPLY"})
+CASE_BODY_FOLLOW = frozenset({"CASE", "DEFAULT", "RBRACE", "EOF"})
+
+
+# Statement/declaration layer of the grammar. Each alternative is listed by
+# its leading symbol only, which is all an LL(1) dispatch needs; the parse
+# method for nonterminal `x` is `Parser.parse_x`. Alternatives not covered by
+# any FIRST set fall through to `expression_statement`.
+STATEMENT_GRAMMAR = {
+    "block_item": ["case_statement", "statement"],
+    "statement": [
+        "compound_statement", "if_statement", "while_statement", "switch_statement",
+        "do_while_statement", "for_statement", "return_statement", "break_statement",
+        "continue_statement", "external_declaration",
+    ],
+    "for_init": ["external_declaration", "expression_statement"],
+    "compound_statement": ["LBRACE"],
+    "if_statement": ["IF"],
+    "while_statement": ["WHILE"],
+    "switch_statement": ["SWITCH"],
+    "do_while_statement": ["DO"],
+    "for_statement": ["FOR"],
+    "return_statement": ["RETURN"],
+    "break_statement": ["BREAK"],
+    "continue_statement": ["CONTINUE"],
+    "case_statement": ["CASE", "DEFAULT"],
+    "expression_statement": ["SEMICOLON"],
+    "external_declaration": ["decl_specifier"],
+    "decl_specifier": sorted(SIMPLE_SPECIFIER_KINDS | AGGREGATE_KINDS),
+}
+
 
+def first_sets(grammar):
+    first = {name: set() for name in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for symbol in alternatives:
+                new = first[symbol] if symbol in grammar else {symbol}
+                if not new <= first[name]:
+                    first[name] |= new
+                    changed = True
+    return first
+
+
+def dispatch_table(grammar, nonterminal, first=None):
+    # token kind -> parse method of the alternative whose FIRST set holds it
+    first = first or first_sets(grammar)
+    table = {}
+    for symbol in grammar[nonterminal]:
+        method = getattr(Parser, "parse_" + symbol)
+        for kind in first[symbol]:
+            if table.get(kind, method) is not method:
+                raise ValueError(f"Grammar is not LL(1): {kind} starts several {nonterminal} alternatives")
+            table[kind] = method
+    return table
 
 
 class ParseError(Exception):
     pass
 
+def evaluate_constant(node, constants=None):
+    if isinstance(node, Constant):
+        value = node.value
+        if isinstance(value, str) and value.startswith("'"):
+            body = value[1:-1]
+            return ord(ESCAPES.get(body, body[-1]))
+        if isinstance(value, (int, float)):
+            return value
+    elif isinstance(node, Identifier) and constants and node.name in constants:
+        return constants[node.name]
+    elif isinstance(node, UnaryOp) and node.op in CONSTANT_UNARY_OPS:
+        return CONSTANT_UNARY_OPS[node.op](evaluate_constant(node.operand, constants))
+    elif isinstance(node, BinaryOp) and node.op in CONSTANT_BINARY_OPS:
+        left = evaluate_constant(node.left, constants)
+        right = evaluate_constant(node.right, constants)
+        return CONSTANT_BINARY_OPS[node.op](left, right)
+    elif isinstance(node, TernaryOp):
+        if evaluate_constant(node.cond, constants):
+            return evaluate_constant(node.if_true, constants)
+        return evaluate_constant(node.if_false, constants)
+    raise ParseError(f"Expected constant expression, got {node}")
+
+
+def declarator_type(types, base, declarator):
+    dims = [None if dim is None else evaluate_constant(dim, types.enum_constants)
+            for dim in declarator.dims]
+    ctype = types.derive(base, declarator.pointer, dims)
+    if declarator.params is not None:
+        params = []
+        for param in declarator.params:
+            param_type = types.from_specifiers(param.specifiers)
+            if param.declarator is not None:
+                param_type = declarator_type(types, param_type, param.declarator)
+            if isinstance(param_type, ArrayType):
+                param_type = PointerType(param_type.element)
+            params.append(param_type)
+        ctype = FunctionType(ctype, tuple(params), declarator.variadic)
+    if declarator.nested is not None:
+        ctype = declarator_type(types, ctype, declarator.nested)
+    return ctype
+
+
+def innermost(declarator):
+    # the declarator whose suffixes bind to the identifier first: it holds the parameters
+    # of a declared function, and has none for a pointer to a function
+    while declarator.nested is not None:
+        declarator = declarator.nested
+    return declarator
+
+
+def declares_function(declarator):
+    return innermost(declarator).params is not None
+
+
+def integer_literal_type(text, value):
+    # the first type that can hold the value, from the list for the literal's suffix;
+    # hexadecimal literals may also be unsigned without a u suffix
+    suffix = text[len(text.rstrip("uUlL")):].lower()
+    candidates = [INT, UINT, LONG, ULONG] if "l" not in suffix else [LONG, ULONG]
+    if "u" in suffix:
+        candidates = [ctype for ctype in candidates if not ctype.signed]
+    elif not text.lower().startswith("0x"):
+        candidates = [ctype for ctype in candidates if ctype.signed]
+    for ctype in candidates:
+        if value < 1 << (8 * ctype.size - ctype.signed):
+            return ctype
+    return candidates[-1]
+
+
+def c_div(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return a / b
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def c_mod(a, b):
+    return a - b * c_div(a, b)
+
+
+ESCAPES = {"\\n": "\n", "\\t": "\t", "\\r": "\r", "\\0": "\0", "\\\\": "\\", "\\'": "'", '\\"': '"'}
+
+CONSTANT_UNARY_OPS = {
+    "+u": lambda a: a, "-u": lambda a: -a, "~": lambda a: ~a, "!": lambda a: int(not a),
+}
+
+CONSTANT_BINARY_OPS = {
+    "+": lambda a, b: a + b, "-": lambda a, b: a - b, "*": lambda a, b: a * b,
+    "/": c_div, "%": c_mod,
+    "<<": lambda a, b: a << b, ">>": lambda a, b: a >> b,
+    "&": lambda a, b: a & b, "|": lambda a, b: a | b, "^": lambda a, b: a ^ b,
+    "==": lambda a, b: int(a == b), "!=": lambda a, b: int(a != b),
+    "<": lambda a, b: int(a < b), ">": lambda a, b: int(a > b),
+    "<=": lambda a, b: int(a <= b), ">=": lambda a, b: int(a >= b),
+    "&&": lambda a, b: int(bool(a and b)), "||": lambda a, b: int(bool(a or b)),
+}
+
+
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, types=None):
         self.tokens = tokens
         self.pos = 0
+        self.types = types if types is not None else TypeRegistry()
 
     # utility
     def peek(self):
@@ -153,6 +353,9 @@ class Parser:
         self.pos += 1
         return tok
 
+    def offset_of(self, tok):
+        return tok[2] if len(tok) > 2 else None
+
     def accept(self, kind):
         if self.peek()[0] == kind:
             return self.next()
@@ -180,7 +383,7 @@ class Parser:
                     self.next() 
                 raise e
                 
-        return TranslationUnit(units)
+        return TranslationUnit(units, self.types)
 
     def parse_external_declaration(self):
         specifiers = self.parse_decl_specifiers()
@@ -221,33 +424,77 @@ class Parser:
             tok = self.peek()
             kind = tok[0]
             
-            if kind in {"INT","FLOAT","CHAR","VOID","DOUBLE","LONG","SHORT","SIGNED","UNSIGNED","TYPEDEF","STATIC","EXTERN","AUTO","REGISTER","CONST","VOLATILE"}:
+            if kind in SIMPLE_SPECIFIER_KINDS:
                 spec.append(self.next()[1])
                 
-            elif kind in {"STRUCT", "UNION", "ENUM"}:
-                spec.append(self.next()[1]) 
+            elif kind in AGGREGATE_KINDS:
+                keyword = self.next()[1]
+                spec.append(keyword) 
                 
                 if self.peek()[0] == "ID":
-                    spec.append(self.next()[1]) 
+                    tag = self.next()[1]
+                elif self.peek()[0] == "LBRACE":
+                    tag = self.types.anonymous_tag()
+                else:
+                    raise ParseError(f"Expected tag or body after {keyword}, got {self.peek()}")
+                spec.append(tag)
                 
                 if self.accept("LBRACE"):
-                    balance = 1
-                    while balance > 0 and self.peek()[0] != "EOF":
-                        next_tok = self.next()
-                        if next_tok[0] == "LBRACE":
-                            balance += 1
-                        elif next_tok[0] == "RBRACE":
-                            balance -= 1
-                    if balance != 0:
-                        raise ParseError("Unclosed structure/enum block")
+                    if kind == "ENUM":
+                        self.parse_enum_body(tag)
+                    else:
+                        self.parse_aggregate_body(keyword, tag)
                     
             else:
                 break
         return spec
 
+    def parse_aggregate_body(self, keyword, tag):
+        members = []
+        while not self.accept("RBRACE"):
+            if self.peek()[0] == "EOF":
+                raise ParseError("Unclosed structure/enum block")
+            specifiers = self.parse_decl_specifiers()
+            if not specifiers:
+                raise ParseError(f"Expected member declaration, got {self.peek()}")
+            base = self.types.from_specifiers(specifiers)
+            while True:
+                dec = self.parse_declarator()
+                if dec.direct_decl is None:
+                    raise ParseError(f"Expected member name in {keyword} {tag}")
+                ctype = self.declarator_type(base, dec)
+                if isinstance(ctype, FunctionType):
+                    ctype = PointerType(ctype)
+                members.append((dec.direct_decl.name, ctype))
+                if not self.accept("COMMA"):
+                    break
+            self.expect("SEMICOLON")
+        try:
+            self.types.define_aggregate(keyword, tag, members)
+        except TypeError as e:
+            raise ParseError(str(e)) from None
+
+    def parse_enum_body(self, tag):
+        constants = {}
+        value = 0
+        while not self.accept("RBRACE"):
+            name = self.expect("ID")[1]
+            if self.accept("ASSIGN"):
+                value = evaluate_constant(self.parse_conditional_expression(), self.types.enum_constants)
+            constants[name] = value
+            self.types.enum_constants[name] = value
+            value += 1
+            if not self.accept("COMMA"):
+                self.expect("RBRACE")
+                break
+        self.types.define_enum(tag, constants)
+
+    def declarator_type(self, base, declarator):
+        return declarator_type(self.types, base, declarator)
+
     def parse_declarator_optional(self):
         tok = self.peek()
-        if tok[0] in {"ID","LPAREN","MULTIPLY"}:
+        if tok[0] in DECLARATOR_START_KINDS:
             return self.parse_declarator()
         return None
 
@@ -256,14 +503,20 @@ class Parser:
         while self.accept("MULTIPLY"):
             pointer += 1
             
-        name = None
+        ident = None
+        nested = None
+        dims = []
+        params = None
+        variadic = False
         
         if self.peek()[0] == "ID":
-            name = self.next()[1]
+            tok = self.next()
+            ident = Identifier(tok[1], self.offset_of(tok))
         elif self.accept("LPAREN"):
             dec = self.parse_declarator()
             self.expect("RPAREN")
-            name = dec.direct_decl if isinstance(dec, Declarator) else None
+            ident = dec.direct_decl
+            nested = Declarator(dec.pointer, None, dec.dims, dec.params, dec.variadic, dec.nested)
         else:
              pass 
 
@@ -271,122 +524,129 @@ class Parser:
             if self.peek()[0] == "LPAREN":
                 self.expect("LPAREN")
                 
+                suffix_params = []
                 if self.peek()[0] != "RPAREN":
-                    self.parse_parameter_declaration()
+                    suffix_params.append(self.parse_parameter_declaration())
                     while self.accept("COMMA"):
-                        self.parse_parameter_declaration() 
+                        if self.accept("ELLIPSIS"):
+                            variadic = True
+                            break
+                        suffix_params.append(self.parse_parameter_declaration()) 
                 
                 self.expect("RPAREN")
+                if len(suffix_params) == 1 and suffix_params[0].specifiers == ["void"] and suffix_params[0].declarator is None:
+                    suffix_params = []
+                if params is None:
+                    params = suffix_params
             
             elif self.peek()[0] == "LBRACKET":
                 self.expect("LBRACKET")
+                dim = None
                 if self.peek()[0] != "RBRACKET":
-                     self.parse_expression()
+                     dim = self.parse_expression()
+                dims.append(dim)
                 self.expect("RBRACKET")
             else:
                 break
                 
-        return Declarator(pointer, Identifier(name) if name else None)
+        return Declarator(pointer, ident, dims, params, variadic, nested)
 
     def parse_parameter_declaration(self):
-        self.parse_decl_specifiers()
-        self.parse_declarator_optional()
+        specifiers = self.parse_decl_specifiers()
+        if not specifiers:
+            raise ParseError(f"Expected parameter declaration, got {self.peek()}")
+        declarator = None
+        if self.peek()[0] in DECLARATOR_START_KINDS or self.peek()[0] == "LBRACKET":
+            declarator = self.parse_declarator()
+        return ParameterDeclaration(specifiers, declarator)
 
     
     def parse_statement(self):
-        t = self.peek()
-        if t[0] == "LBRACE":
-            return self.parse_compound_statement()
-        if t[0] == "IF":
-            self.next()
-            self.expect("LPAREN")
-            cond = self.parse_expression()
-            self.expect("RPAREN")
-            then_stmt = self.parse_statement()
-            else_stmt = None
-            if self.accept("ELSE"):
-                else_stmt = self.parse_statement()
-            return IfStatement(cond, then_stmt, else_stmt)
-        if t[0] == "WHILE":
-            self.next()
-            self.expect("LPAREN")
-            cond = self.parse_expression()
-            self.expect("RPAREN")
-            body = self.parse_statement()
-            return WhileStatement(cond, body)
-        if t[0] == "SWITCH":
-            self.next()
-            self.expect("LPAREN")
-            cond = self.parse_expression()
-            self.expect("RPAREN")
-            body = self.parse_compound_statement() 
-            return SwitchStatement(cond, body)
-        if t[0] == "DO":
-            self.next()
-            body = self.parse_statement()
-            self.expect("WHILE")
-            self.expect("LPAREN")
-            cond = self.parse_expression()
-            self.expect("RPAREN")
-            self.expect("SEMICOLON")
-            return DoWhileStatement(body, cond)
-        if t[0] == "FOR":
-            self.next()
-            self.expect("LPAREN")
+        return self.STATEMENT_TABLE.get(self.peek()[0], Parser.parse_expression_statement)(self)
+
+    def parse_if_statement(self):
+        self.expect("IF")
+        self.expect("LPAREN")
+        cond = self.parse_expression()
+        self.expect("RPAREN")
+        then_stmt = self.parse_statement()
+        else_stmt = None
+        if self.accept("ELSE"):
+            else_stmt = self.parse_statement()
+        return IfStatement(cond, then_stmt, else_stmt)
+
+    def parse_while_statement(self):
+        self.expect("WHILE")
+        self.expect("LPAREN")
+        cond = self.parse_expression()
+        self.expect("RPAREN")
+        body = self.parse_statement()
+        return WhileStatement(cond, body)
+
+    def parse_switch_statement(self):
+        self.expect("SWITCH")
+        self.expect("LPAREN")
+        cond = self.parse_expression()
+        self.expect("RPAREN")
+        body = self.parse_compound_statement() 
+        return SwitchStatement(cond, body)
+
+    def parse_do_while_statement(self):
+        self.expect("DO")
+        body = self.parse_statement()
+        self.expect("WHILE")
+        self.expect("LPAREN")
+        cond = self.parse_expression()
+        self.expect("RPAREN")
+        self.expect("SEMICOLON")
+        return DoWhileStatement(body, cond)
+
+    def parse_for_statement(self):
+        self.expect("FOR")
+        self.expect("LPAREN")
+        init = self.FOR_INIT_TABLE.get(self.peek()[0], Parser.parse_expression_statement)(self)
+        if isinstance(init, ExpressionStatement) and init.expr is None:
             init = None
-            if self.peek()[0] != "SEMICOLON":
-                if self.peek()[0] in {"INT","FLOAT","CHAR","DOUBLE","LONG","VOID","SHORT"}:
-                    init = self.parse_external_declaration() 
-                else:
-                    init = self.parse_expression_statement()
-            else:
-                self.expect("SEMICOLON")
-                
-            cond = None
-            if self.peek()[0] != "SEMICOLON":
-                cond = self.parse_expression()
-            self.expect("SEMICOLON")
-            
-            post = None
-            if self.peek()[0] != "RPAREN":
-                post = self.parse_expression()
-            self.expect("RPAREN")
-            body = self.parse_statement()
-            return ForStatement(init, cond, post, body)
-        if t[0] == "RETURN":
-            self.next()
-            expr = None
-            if self.peek()[0] != "SEMICOLON":
-                expr = self.parse_expression()
-            self.expect("SEMICOLON")
-            return ReturnStatement(expr)
-        if t[0] == "BREAK":
-            self.next()
-            self.expect("SEMICOLON")
-            return BreakStatement()
-        if t[0] == "CONTINUE":
-            self.next()
-            self.expect("SEMICOLON")
-            return ContinueStatement()
-            
-        if t[0] in {"INT","FLOAT","CHAR","DOUBLE","LONG","SHORT","SIGNED","UNSIGNED","CONST","STATIC", "TYPEDEF", "STRUCT", "UNION", "ENUM", "VOID"}:
-            return self.parse_external_declaration()
             
-        return self.parse_expression_statement()
+        cond = None
+        if self.peek()[0] != "SEMICOLON":
+            cond = self.parse_expression()
+        self.expect("SEMICOLON")
+        
+        post = None
+        if self.peek()[0] != "RPAREN":
+            post = self.parse_expression()
+        self.expect("RPAREN")
+        body = self.parse_statement()
+        return ForStatement(init, cond, post, body)
+
+    def parse_return_statement(self):
+        self.expect("RETURN")
+        expr = None
+        if self.peek()[0] != "SEMICOLON":
+            expr = self.parse_expression()
+        self.expect("SEMICOLON")
+        return ReturnStatement(expr)
+
+    def parse_break_statement(self):
+        self.expect("BREAK")
+        self.expect("SEMICOLON")
+        return BreakStatement()
+
+    def parse_continue_statement(self):
+        self.expect("CONTINUE")
+        self.expect("SEMICOLON")
+        return ContinueStatement()
 
     def parse_compound_statement(self):
         self.expect("LBRACE")
         items = []
+        table = self.BLOCK_ITEM_TABLE
         while self.peek()[0] != "RBRACE":
-            if self.peek()[0] == "EOF":
+            kind = self.peek()[0]
+            if kind == "EOF":
                 raise ParseError("Unclosed compound statement")
-            
-            if self.peek()[0] == "CASE" or self.peek()[0] == "DEFAULT":
-                items.append(self.parse_case_statement())
-            elif self.peek()[0] in {"INT","FLOAT","CHAR","DOUBLE","LONG","SHORT","SIGNED","UNSIGNED","CONST","STATIC","TYPEDEF","STRUCT","UNION","ENUM", "VOID"}:
-                items.append(self.parse_external_declaration())
-            else:
-                items.append(self.parse_statement())
+            items.append(table.get(kind, Parser.parse_expression_statement)(self))
         self.expect("RBRACE")
         return CompoundStatement(items)
 
@@ -401,11 +661,9 @@ class Parser:
             raise ParseError(f"Expected CASE or DEFAULT, got {self.peek()}")
         
         body = []
-        while self.peek()[0] not in {"CASE", "DEFAULT", "RBRACE", "EOF"}:
-            if self.peek()[0] in {"INT","FLOAT","CHAR","DOUBLE","LONG","SHORT","SIGNED","UNSIGNED","CONST","STATIC","TYPEDEF","STRUCT","UNION","ENUM", "VOID"}:
-                body.append(self.parse_external_declaration())
-            else:
-                body.append(self.parse_statement())
+        table = self.STATEMENT_TABLE
+        while self.peek()[0] not in CASE_BODY_FOLLOW:
+            body.append(table.get(self.peek()[0], Parser.parse_expression_statement)(self))
         
         return CaseStatement(expr, body)
 
@@ -437,7 +695,7 @@ class Parser:
 
     def parse_assignment_expression(self):
         left = self.parse_conditional_expression()
-        if self.peek()[0] in {"ASSIGN","PLUS_ASSIGN","MINUS_ASSIGN","MUL_ASSIGN","DIV_ASSIGN","MOD_ASSIGN","BIT_AND_ASSIGN","BIT_OR_ASSIGN","BIT_XOR_ASSIGN","SHIFT_LEFT_ASSIGN","SHIFT_RIGHT_ASSIGN"}:
+        if self.peek()[0] in ASSIGNMENT_KINDS:
             op = self.next()[0]
             right = self.parse_assignment_expression()
             return Assignment(op, left, right)
@@ -617,10 +875,12 @@ class Parser:
             value_str = tok[1].lower().rstrip('ul')
             try:
                 if 'x' in value_str:
-                    return Constant(int(value_str, 16))
+                    value = int(value_str, 16)
+                    return Constant(value, integer_literal_type(tok[1], value))
                 if '.' in value_str or 'e' in value_str:
                     return Constant(float(value_str))
-                return Constant(int(value_str))
+                value = int(value_str)
+                return Constant(value, integer_literal_type(tok[1], value))
             except ValueError:
                 return Constant(tok[1])
                 
@@ -631,8 +891,8 @@ class Parser:
             self.next()
             return Constant(tok[1])
         if tok[0] == "ID":
-            name = self.next()[1]
-            return Identifier(name)
+            self.next()
+            return Identifier(tok[1], self.offset_of(tok))
         if tok[0] == "LPAREN":
             self.next()
             expr = self.parse_expression()
@@ -641,6 +901,12 @@ class Parser:
         raise ParseError(f"Unexpected primary token: {tok}")
 
 
+_FIRST = first_sets(STATEMENT_GRAMMAR)
+Parser.STATEMENT_TABLE = dispatch_table(STATEMENT_GRAMMAR, "statement", _FIRST)
+Parser.BLOCK_ITEM_TABLE = dispatch_table(STATEMENT_GRAMMAR, "block_item", _FIRST)
+Parser.FOR_INIT_TABLE = dispatch_table(STATEMENT_GRAMMAR, "for_init", _FIRST)
+
+
 LABEL_MAP = {
     'TranslationUnit': 'PROGRAM',
     'FunctionDefinition': 'FUNC_DEF',
@@ -661,6 +927,10 @@ def pretty_compact(node):
    
     if node is None:
         return ""
+    if isinstance(node, str):
+        return f"'{node}'"
+    if isinstance(node, list):
+        return f"[{', '.join(pretty_compact(item) for item in node)}]"
 
     node_type = type(node).__name__
     label = LABEL_MAP.get(node_type, node_type.upper())
@@ -673,7 +943,8 @@ def pretty_compact(node):
     elif isinstance(node, FunctionDefinition):
         func_name = node.declarator.direct_decl.name if node.declarator and node.declarator.direct_decl else "Anon"
         
-        params = '[]' 
+        params = [p.declarator.direct_decl.name if p.declarator and p.declarator.direct_decl else "Anon"
+                  for p in (innermost(node.declarator).params or [])] if node.declarator else []
         
         children.append(func_name)
         children.append(params) 
@@ -744,7 +1015,7 @@ def pretty_compact(node):
     else:
         
         if isinstance(node, BinaryOp):
-            return f"('{label}', '{child_results[0]}', {child_results[1]}, {child_results[2]})"
+            return f"('{label}', {child_results[0]}, {child_results[1]}, {child_results[2]})"
             
         
         return f"('{label}', {', '.join(child_results)})"
\ No newline at end of file
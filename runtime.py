@@ -0,0 +1,425 @@
+import atexit
+import re
+import sys
+from array import array
+
+from memory import CRuntimeError, Pointer, c_string
+
+
+CONVERSION = re.compile(rb"%([-+ #0]*)(\*|\d+)?(?:\.(\*|\d*))?(hh|h|ll|l|j|z|t|L)?([diouxXeEfFgGcsp%])")
+SCAN_CONVERSION = re.compile(rb"%(\*)?(\d+)?(hh|h|ll|l|j|z|t|L)?([diouxXeEfFgGcsn%])")
+
+# C conversion -> conversion of Python's bytes %-formatting
+PY_CONVERSIONS = {
+    b"d": b"d", b"i": b"d", b"u": b"d", b"o": b"o", b"x": b"x", b"X": b"X", b"c": b"c", b"s": b"s", b"p": b"s",
+    b"e": b"e", b"E": b"E", b"f": b"f", b"F": b"F", b"g": b"g", b"G": b"G",
+}
+
+LENGTH_BITS = {None: 32, b"hh": 8, b"h": 16, b"l": 64, b"ll": 64, b"j": 64, b"z": 64, b"t": 64, b"L": 64}
+
+WHITESPACE = frozenset(b" \t\n\r\v\f")
+NOT_WHITESPACE = frozenset(range(256)) - WHITESPACE
+ANY_BYTE = frozenset(range(256))
+SIGNS = frozenset(b"+-")
+HEX_PREFIX = frozenset(b"xX")
+DIGITS = {8: frozenset(b"01234567"), 10: frozenset(b"0123456789"), 16: frozenset(b"0123456789abcdefABCDEF")}
+INT_BASES = {b"d": 10, b"u": 10, b"o": 8, b"x": 16, b"X": 16}
+FLOAT_CHARS = frozenset(b"0123456789+-.eEinfatyINFATY")
+
+
+def unsigned(bits):
+    mask = (1 << bits) - 1
+    return lambda value: value & mask
+
+
+def signed(bits):
+    mask, half = (1 << bits) - 1, 1 << (bits - 1)
+    return lambda value: ((value + half) & mask) - half
+
+
+def pointer_text(value):
+    if value.__class__ is Pointer:
+        return f"0x{id(value.base) + value.index * getattr(value.base, 'itemsize', 8):x}".encode()
+    if not value:
+        return b"(nil)"
+    return f"0x{id(value):x}".encode()
+
+
+def converter(conv, length):
+    # None means the argument goes to the %-template unchanged
+    if conv in b"di":
+        return signed(LENGTH_BITS[length]) if length in (b"hh", b"h") else None
+    if conv in b"uoxX":
+        return unsigned(LENGTH_BITS[length])
+    if conv == b"c":
+        return unsigned(8)
+    if conv == b"s":
+        return c_string
+    if conv == b"p":
+        return pointer_text
+    return None
+
+
+def alternate_form(flags, width, precision, conv, length):
+    # C's # flag for o, x and X, which Python spells differently: 0x/0X only before a
+    # nonzero value, and for octal one leading 0 (by raising the precision) unless the
+    # digits already start with one, where Python writes 0o
+    flags = flags.replace(b"#", b"")
+    width = b"" if width in (None, b"*") else width
+    precision = b"" if precision is None else b"." + precision
+    plain = b"%" + flags + width + precision + conv
+    to_unsigned = unsigned(LENGTH_BITS[length])
+    if conv == b"o":
+        digits = b"%" + precision + b"o"
+
+        def render(value):
+            value = to_unsigned(value)
+            text = digits % value
+            if text.startswith(b"0"):
+                return plain % value
+            return (b"%" + flags + width + b".%do" % (len(text) + 1)) % value
+        return render
+    prefixed = b"%#" + flags + width + precision + conv
+
+    def render(value):
+        value = to_unsigned(value)
+        return (prefixed if value else plain) % value
+    return render
+
+
+class Format:
+    # a printf format compiled once into a bytes %-template plus one converter per argument
+    __slots__ = ("template", "converters", "count", "literal")
+
+    def __init__(self, fmt):
+        parts, converters = [], []
+        pos = 0
+        while True:
+            start = fmt.find(b"%", pos)
+            if start < 0:
+                break
+            match = CONVERSION.match(fmt, start)
+            if match is None:
+                raise CRuntimeError(f"unsupported conversion in format {fmt!r}")
+            flags, width, precision, length, conv = match.groups()
+            parts.append(fmt[pos:start])
+            if conv == b"%":
+                parts.append(b"%%")
+            else:
+                if width == b"*":
+                    converters.append(int)
+                if precision == b"*":
+                    converters.append(int)
+                if b"#" in flags and conv in b"oxX":
+                    if precision == b"*":
+                        raise CRuntimeError(f"unsupported conversion in format {fmt!r}")
+                    # the number is rendered by its converter; only a * width is left to %s
+                    parts.append(b"%" + (b"-" if b"-" in flags else b"") + (b"*" if width == b"*" else b"") + b"s")
+                    converters.append(alternate_form(flags, width, precision, conv, length))
+                else:
+                    parts.append(b"%" + flags + (width or b"") + (b"" if precision is None else b"." + precision)
+                                 + PY_CONVERSIONS[conv])
+                    converters.append(converter(conv, length))
+            pos = match.end()
+        parts.append(fmt[pos:])
+        self.template = b"".join(parts)
+        self.count = len(converters)
+        self.converters = None if all(c is None for c in converters) else tuple(converters)
+        self.literal = self.template % () if not converters else None
+
+    def render(self, args):
+        if self.literal is not None:
+            return self.literal
+        if len(args) < self.count:
+            raise CRuntimeError(f"too few arguments for format {self.template!r}")
+        try:
+            if self.converters is None:
+                return self.template % tuple(args[:self.count])
+            return self.template % tuple([value if convert is None else convert(value)
+                                          for convert, value in zip(self.converters, args)])
+        except TypeError as error:
+            raise CRuntimeError(f"bad argument for format {self.template!r}: {error}") from None
+
+
+class OutputBuffer:
+    # stdout as C has it: writes pile up in one bytearray and reach the stream in bulk
+    def __init__(self, stream=None, capacity=1 << 16):
+        self.stream = stream
+        self.capacity = capacity
+        self.buffer = bytearray()
+
+    def write(self, data):
+        buffer = self.buffer
+        buffer += data
+        if len(buffer) >= self.capacity:
+            self.flush()
+
+    def put(self, byte):
+        buffer = self.buffer
+        buffer.append(byte)
+        if len(buffer) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        stream = self.stream if self.stream is not None else sys.stdout
+        binary = getattr(stream, "buffer", stream)
+        try:
+            binary.write(self.buffer)
+        except TypeError:
+            stream.write(self.buffer.decode("utf-8", "replace"))
+        stream.flush()
+        del self.buffer[:]
+
+
+class InputReader:
+    def __init__(self, stream=None, output=None):
+        self.stream = stream
+        self.output = output
+        self.data = b""
+        self.pos = 0
+        self.offset = 0
+
+    def tell(self):
+        return self.offset + self.pos
+
+    def fill(self):
+        # about to block on input: anything printed so far (a prompt, say) goes out first
+        if self.output is not None:
+            self.output.flush()
+        stream = self.stream if self.stream is not None else sys.stdin
+        stream = getattr(stream, "buffer", stream)
+        read = getattr(stream, "read1", stream.read)
+        self.offset += len(self.data)
+        self.data = read(1 << 16)
+        if isinstance(self.data, str):
+            self.data = self.data.encode("utf-8")
+        self.pos = 0
+        return bool(self.data)
+
+    def peek(self):
+        if self.pos >= len(self.data) and not self.fill():
+            return -1
+        return self.data[self.pos]
+
+    def getc(self):
+        c = self.peek()
+        if c >= 0:
+            self.pos += 1
+        return c
+
+    def skip_whitespace(self):
+        while self.peek() in WHITESPACE:
+            self.pos += 1
+
+    def take(self, allowed, width):
+        out = bytearray()
+        while len(out) < width:
+            c = self.peek()
+            if c not in allowed:
+                break
+            out.append(c)
+            self.pos += 1
+        return bytes(out)
+
+
+def store_through(pointer, value):
+    if pointer.__class__ is Pointer:
+        pointer.base[pointer.index] = value
+    elif isinstance(pointer, (list, array)):
+        pointer[0] = value
+    else:
+        raise CRuntimeError(f"expected a pointer, got {pointer!r}")
+
+
+def store_bytes(pointer, data):
+    base, index = (pointer.base, pointer.index) if pointer.__class__ is Pointer else (pointer, 0)
+    if base.__class__ is not array or base.itemsize != 1:
+        raise CRuntimeError(f"expected a char array, got {pointer!r}")
+    if index + len(data) > len(base):
+        raise CRuntimeError("write past the end of the array")
+    base[index:index + len(data)] = array(base.typecode, data)
+
+
+class Scan:
+    # a scanf format compiled once into a list of steps
+    __slots__ = ("steps",)
+
+    def __init__(self, fmt):
+        self.steps = []
+        pos = 0
+        while pos < len(fmt):
+            c = fmt[pos]
+            if c in WHITESPACE:
+                self.steps.append(("space",))
+                while pos < len(fmt) and fmt[pos] in WHITESPACE:
+                    pos += 1
+                continue
+            if c != ord("%"):
+                self.steps.append(("literal", c))
+                pos += 1
+                continue
+            match = SCAN_CONVERSION.match(fmt, pos)
+            if match is None:
+                raise CRuntimeError(f"unsupported conversion in format {fmt!r}")
+            suppress, width, length, conv = match.groups()
+            if conv == b"%":
+                self.steps.append(("space",))
+                self.steps.append(("literal", ord("%")))
+            else:
+                self.steps.append(("convert", suppress is not None, int(width) if width else None, length, conv))
+            pos = match.end()
+
+    def run(self, reader, args):
+        args = iter(args)
+        assigned = 0
+        start = reader.tell()
+        for step in self.steps:
+            kind = step[0]
+            if kind == "space":
+                reader.skip_whitespace()
+                continue
+            if kind == "literal":
+                c = reader.peek()
+                if c != step[1]:
+                    return -1 if c < 0 and assigned == 0 else assigned
+                reader.pos += 1
+                continue
+            _, suppress, width, length, conv = step
+            if conv == b"n":
+                if not suppress:
+                    store_through(next(args), reader.tell() - start)
+                continue
+            if conv != b"c":
+                reader.skip_whitespace()
+            if reader.peek() < 0:
+                return -1 if assigned == 0 else assigned
+            value = self.read(reader, conv, width or (1 if conv == b"c" else 1 << 30))
+            if value is None:
+                return assigned
+            if suppress:
+                continue
+            target = next(args, None)
+            if target is None:
+                raise CRuntimeError("too few arguments for format")
+            if conv == b"s":
+                store_bytes(target, value + b"\0")
+            elif conv == b"c":
+                if len(value) > 1:
+                    store_bytes(target, value)
+                else:
+                    store_through(target, value[0] - 256 if value[0] > 127 else value[0])
+            else:
+                store_through(target, value)
+            assigned += 1
+        return assigned
+
+    @staticmethod
+    def read(reader, conv, width):
+        if conv == b"c":
+            return reader.take(ANY_BYTE, width) or None
+        if conv == b"s":
+            return reader.take(NOT_WHITESPACE, width)
+        if conv in b"eEfFgG":
+            try:
+                return float(reader.take(FLOAT_CHARS, width))
+            except ValueError:
+                return None
+        sign = reader.take(SIGNS, 1)
+        width -= len(sign)
+        base = INT_BASES.get(conv, 0)
+        digits = reader.take(DIGITS[10] if base == 0 else DIGITS[base], width)
+        if digits == b"0" and base in (0, 16) and width > 2 and reader.peek() in HEX_PREFIX:
+            reader.pos += 1
+            digits, base = reader.take(DIGITS[16], width - 2), 16
+        elif base == 0:
+            base = 8 if digits[:1] == b"0" else 10
+        try:
+            return int(sign + digits, base)
+        except ValueError:
+            return None
+
+
+class FormatFunction:
+    # a printf/scanf-style builtin; at a call site whose format is a string literal the
+    # interpreter asks bind() for a function with the format already compiled
+    def __init__(self, call, bind):
+        self.call = call
+        self.bind = bind
+
+    def __call__(self, *args):
+        return self.call(*args)
+
+
+class Runtime:
+    # the standard I/O functions of one C process
+    def __init__(self, stdout=None, stdin=None, capacity=1 << 16):
+        self.output = OutputBuffer(stdout, capacity)
+        self.input = InputReader(stdin, self.output)
+        self.formats = {}
+        self.scans = {}
+        self.builtins = {
+            "printf": FormatFunction(self.printf, self.bind_printf),
+            "scanf": FormatFunction(self.scanf, self.bind_scanf),
+            "sprintf": self.sprintf, "puts": self.puts, "putchar": self.putchar,
+            "getchar": self.getchar, "fflush": self.fflush,
+        }
+
+    def format(self, fmt):
+        compiled = self.formats.get(fmt)
+        if compiled is None:
+            compiled = self.formats[fmt] = Format(fmt)
+        return compiled
+
+    def scan(self, fmt):
+        compiled = self.scans.get(fmt)
+        if compiled is None:
+            compiled = self.scans[fmt] = Scan(fmt)
+        return compiled
+
+    def printf(self, fmt, *args):
+        data = self.format(c_string(fmt)).render(args)
+        self.output.write(data)
+        return len(data)
+
+    def bind_printf(self, fmt):
+        render, write = self.format(fmt).render, self.output.write
+
+        def printf(*args):
+            data = render(args)
+            write(data)
+            return len(data)
+        return printf
+
+    def sprintf(self, dest, fmt, *args):
+        data = self.format(c_string(fmt)).render(args)
+        store_bytes(dest, data + b"\0")
+        return len(data)
+
+    def puts(self, s):
+        self.output.write(c_string(s))
+        self.output.put(10)
+        return 0
+
+    def putchar(self, c):
+        self.output.put(c & 0xff)
+        return c & 0xff
+
+    def getchar(self):
+        return self.input.getc()
+
+    def scanf(self, fmt, *args):
+        return self.scan(c_string(fmt)).run(self.input, args)
+
+    def bind_scanf(self, fmt):
+        run, reader = self.scan(fmt).run, self.input
+        return lambda *args: run(reader, args)
+
+    def fflush(self, stream=0):
+        self.output.flush()
+        return 0
+
+
+STDIO = Runtime()
+atexit.register(STDIO.output.flush)
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import lexer
+from parser import Parser, ParseError, FunctionDefinition, pretty_compact
+from typecheck import check_types, TypeCheckError
+
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"compilador-{os.getuid()}.sock")
+OPERATIONS = {"lex", "parse", "check"}
+CACHE_SIZE = 1024
+
+
+class RequestError(Exception):
+    pass
+
+
+def remember(cache, key, value, limit=CACHE_SIZE):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > limit:
+        cache.popitem(last=False)
+    return value
+
+
+# worker processes: each keeps the ASTs it has built, keyed by the digest of the source
+trees = OrderedDict()
+
+
+def warm_up():
+    Parser(lexer("int main() { return 0; }", offsets=True)).parse()
+
+
+def parse_tree(digest, code):
+    tree = trees.get(digest)
+    if tree is None:
+        return remember(trees, digest, Parser(lexer(code, offsets=True)).parse(), 256)
+    trees.move_to_end(digest)
+    return tree
+
+
+def work(op, digest, code, with_tree):
+    try:
+        if op == "lex":
+            return {"ok": True, "tokens": [list(token) for token in lexer(code, offsets=True)]}
+        tree = parse_tree(digest, code)
+        if op == "parse":
+            result = {"ok": True, "functions": [ext.declarator.direct_decl.name for ext in tree.external_declarations
+                                                if isinstance(ext, FunctionDefinition)]}
+            if with_tree:
+                result["ast"] = pretty_compact(tree)
+            return result
+        check_types(tree)
+        return {"ok": True}
+    except ParseError as e:
+        return {"ok": False, "kind": "parse", "error": str(e)}
+    except TypeCheckError as e:
+        return {"ok": False, "kind": "type", "error": str(e)}
+
+
+class CompileServer:
+    # asyncio front end on a Unix socket, one JSON request/response per line; parsing and
+    # checking run in a process pool, and answers are cached by the digest of the source
+    def __init__(self, path=DEFAULT_SOCKET, workers=None):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.results = OrderedDict()
+        self.files = OrderedDict()
+        self.pending = {}
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "clients": 0}
+
+    async def serve(self):
+        self.claim_socket()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=warm_up)
+        loop = asyncio.get_running_loop()
+        # start every worker now so the first requests do not pay for the fork and imports
+        await asyncio.gather(*(loop.run_in_executor(self.pool, warm_up) for _ in range(self.workers)))
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+        server = await asyncio.start_unix_server(self.client, path=self.path)
+        print(f"servidor ouvindo em {self.path} ({self.workers} processo(s))", flush=True)
+        try:
+            async with server:
+                await stop
+        finally:
+            os.unlink(self.path)
+            self.pool.shutdown(cancel_futures=True)
+
+    def claim_socket(self):
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"já existe um servidor em {self.path}")
+
+    async def client(self, reader, writer):
+        self.stats["clients"] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, line):
+        try:
+            request = json.loads(line)
+            op = request["op"]
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "kind": "request", "error": "pedido inválido"}
+        if not isinstance(op, str):
+            return {"ok": False, "kind": "request", "error": "pedido inválido"}
+        if op == "ping":
+            response = {"ok": True}
+        elif op == "stats":
+            response = {"ok": True, **self.stats, "cached": len(self.results)}
+        elif op not in OPERATIONS:
+            response = {"ok": False, "kind": "request", "error": f"operação desconhecida: {op}"}
+        else:
+            self.stats["requests"] += 1
+            try:
+                response = await self.compile(op, request)
+            except RequestError as e:
+                response = {"ok": False, "kind": "request", "error": str(e)}
+            except OSError as e:
+                response = {"ok": False, "kind": "io", "error": str(e)}
+        if "id" in request:
+            response = {**response, "id": request["id"]}
+        return response
+
+    async def compile(self, op, request):
+        code, digest = self.source(request)
+        key = (op, digest, bool(request.get("tree")))
+        response = self.results.get(key)
+        if response is not None:
+            self.stats["hits"] += 1
+            self.results.move_to_end(key)
+            return response
+        # identical requests arriving together share one computation
+        future = self.pending.get(key)
+        if future is None:
+            self.stats["misses"] += 1
+            future = self.pending[key] = asyncio.ensure_future(self.run_work(key, code))
+        return await future
+
+    async def run_work(self, key, code):
+        op, digest, with_tree = key
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                self.pool, work, op, digest, code, with_tree)
+        except Exception as e:
+            return {"ok": False, "kind": "internal", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            del self.pending[key]
+        return remember(self.results, key, response)
+
+    def source(self, request):
+        code, path = request.get("code"), request.get("path")
+        if code is not None:
+            if not isinstance(code, str):
+                raise RequestError("'code' precisa ser texto")
+            return code, hashlib.sha1(code.encode("utf-8", errors="surrogatepass")).hexdigest()
+        if not isinstance(path, str) or not path or "\0" in path:
+            raise RequestError("o pedido precisa de 'code' ou de um 'path' válido")
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        entry = self.files.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self.files.move_to_end(path)
+            return entry[2], entry[3]
+        with open(path, "rb") as f:
+            data = f.read()
+        code = data.decode("utf-8", errors="replace")
+        remember(self.files, path, (st.st_mtime_ns, st.st_size, code, hashlib.sha1(data).hexdigest()))
+        return code, self.files[path][3]
+
+
+def main(argv):
+    path, workers = DEFAULT_SOCKET, None
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--socket" and args:
+            path = args.pop(0)
+        elif arg == "--workers" and args and args[0].isdigit():
+            workers = int(args.pop(0))
+        else:
+            print("uso: server.py [--socket CAMINHO] [--workers N]")
+            return 1
+    try:
+        asyncio.run(CompileServer(path, workers).serve())
+    except RuntimeError as e:
+        print(f"ERRO: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+import sys
+
+from lexer import lexer
+from parser import Parser, FunctionDefinition, ReturnStatement, Call, Identifier
+from interpreter import Interpreter, CRuntimeError, Pointer, convert
+from tiered import PythonCompiler
+
+
+class TailCall:
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+
+class GeneratorCompiler(PythonCompiler):
+    # calls to C functions become "yield (function, args)"; the value of the call is
+    # whatever the trampoline sends back, so no host stack frame is held across a call
+    def __init__(self, interp, layout):
+        super().__init__(interp, layout)
+        self.env["TailCall"] = TailCall
+        self.yields = 0
+
+    def statement(self, node, depth):
+        if node.__class__ is ReturnStatement and self.is_tail_call(node.expr):
+            call = node.expr
+            fn = self.constant(self.interp.functions[call.func.name])
+            args = ", ".join(self.expression(arg) for arg in call.args)
+            self.emit(depth, f"return TailCall({fn}, [{args}])")
+            return
+        super().statement(node, depth)
+
+    def is_tail_call(self, expr):
+        # the callee's result can be handed straight to our caller only if it needs no conversion
+        if (expr.__class__ is not Call or not isinstance(expr.func, Identifier) or expr.func.slot is not None
+                or expr.func.symbol is not None):
+            return False
+        fn = self.interp.functions.get(expr.func.name)
+        return fn is not None and fn.frame.return_type == self.layout.return_type
+
+    def call(self, node):
+        func = node.func
+        if func.__class__ is Identifier and func.slot is None and func.symbol is None:
+            fn = self.interp.functions.get(func.name)
+            if fn is None:
+                builtin = self.interp.builtins.get(func.name)
+                return self.delegate(node) if builtin is None else self.builtin_call(node, builtin)
+            target = self.constant(fn)
+        else:
+            target = self.expression(func)
+        args = ", ".join(self.expression(arg) for arg in node.args)
+        self.yields += 1
+        return f"(yield ({target}, [{args}]))"
+
+
+class StacklessInterpreter(Interpreter):
+    # every C activation is a generator (or, for functions that call nothing, a plain
+    # Python call) kept on an explicit list, so recursion depth is bounded by memory only
+    def __init__(self, tu, builtins=None):
+        super().__init__(tu, builtins)
+        self.code = {}
+        self.max_depth = 0
+
+    def compiled(self, fn):
+        entry = self.code.get(fn.frame.name)
+        if entry is None:
+            compiler = GeneratorCompiler(self, fn.frame)
+            code, _ = compiler.compile_function(fn)
+            entry = self.code[fn.frame.name] = (code, compiler.yields > 0)
+        return entry
+
+    def start(self, fn, args):
+        # returns (generator, None) for an activation that has to go on the stack, or
+        # (None, value) when the call already finished; tail calls are followed here
+        while True:
+            if fn.__class__ is not FunctionDefinition:
+                fn = fn.load() if isinstance(fn, Pointer) else fn
+                if fn.__class__ is not FunctionDefinition:
+                    raise CRuntimeError("called object is not a function")
+            layout = fn.frame
+            count = layout.param_count
+            if len(args) != count and not (layout.variadic and len(args) > count):
+                raise CRuntimeError(f"{layout.name} expects {count} argument(s), got {len(args)}")
+            frame = [None] * layout.size
+            types = layout.types
+            for i in range(count):
+                frame[i] = convert(types[i], args[i])
+            code, suspends = self.compiled(fn)
+            if suspends:
+                return (code(frame), layout), None
+            previous = self.layout
+            self.layout = layout
+            try:
+                value = code(frame)
+            finally:
+                self.layout = previous
+            if value.__class__ is not TailCall:
+                return None, value
+            fn, args = value.fn, value.args
+
+    def call_function(self, fn, args):
+        previous = self.layout
+        try:
+            return self.trampoline(fn, args)
+        except ZeroDivisionError:
+            raise CRuntimeError("division by zero") from None
+        finally:
+            self.layout = previous
+
+    def trampoline(self, fn, args):
+        activation, value = self.start(fn, args)
+        if activation is None:
+            return value
+        stack = [activation]
+        self.max_depth = max(self.max_depth, 1)
+        start = self.start
+        while True:
+            generator, self.layout = stack[-1]
+            try:
+                callee, args = generator.send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+                if value.__class__ is TailCall:
+                    activation, value = start(value.fn, value.args)
+                    if activation is not None:
+                        stack.append(activation)
+                        continue
+                if not stack:
+                    return value
+                continue
+            activation, value = start(callee, args)
+            if activation is not None:
+                stack.append(activation)
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+
+
+def run_source(code, entry="main", builtins=None):
+    return StacklessInterpreter(Parser(lexer(code)).parse(), builtins).run(entry)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8") as f:
+        result = run_source(f.read())
+    sys.exit(result if isinstance(result, int) else 0)
@@ -0,0 +1,69 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+
+# the compiler modules live flat at the top of the repository
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import lexer  # noqa: E402
+from parser import Parser  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from tiered import TieredInterpreter  # noqa: E402
+from stackless import StacklessInterpreter  # noqa: E402
+from runtime import Runtime  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: takes several seconds (deselect with -m 'not slow')")
+
+
+ENGINES = {
+    "interpreter": Interpreter,
+    # thresholds of 0 send every function and loop through the tier-1 compiler
+    "tiered": lambda tu, builtins=None: TieredInterpreter(tu, builtins, call_threshold=0, loop_threshold=0),
+    "stackless": StacklessInterpreter,
+}
+
+
+@pytest.fixture(params=list(ENGINES))
+def run_c(request):
+    # run_c(code, entry, args, builtins) on each execution engine in turn
+    engine = ENGINES[request.param]
+
+    def run(code, entry="main", args=(), builtins=None):
+        return engine(Parser(lexer(code)).parse(), builtins).run(entry, args)
+    return run
+
+
+@pytest.fixture
+def run_printing(run_c):
+    # run_printing(code) -> (exit status, stdout bytes) on each engine, as gcc(code) reports them
+    def run(code):
+        stdout = io.BytesIO()
+        runtime = Runtime(stdout)
+        status = run_c(code, builtins=runtime.builtins)
+        runtime.output.flush()
+        return status & 0xFF, stdout.getvalue()
+    return run
+
+
+@pytest.fixture
+def gcc(tmp_path):
+    # gcc(code) -> (exit status, stdout bytes) of the program built by the system compiler
+    cc = shutil.which("gcc") or shutil.which("cc")
+    if cc is None:
+        pytest.skip("no C compiler available")
+
+    def run(code, stdin=b""):
+        source, program = tmp_path / "ref.c", tmp_path / "ref"
+        source.write_text(code)
+        subprocess.run([cc, "-w", "-o", str(program), str(source)], check=True)
+        result = subprocess.run([str(program)], input=stdin, capture_output=True, timeout=60)
+        return result.returncode, result.stdout
+    return run
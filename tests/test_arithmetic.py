@@ -0,0 +1,144 @@
+import subprocess
+
+import pytest
+
+from codegen_x86 import compile_source, build_executable
+
+
+# each program prints its results, so a difference shows up as the first line that differs
+UNSIGNED = {
+    "wraparound": """
+        int main() {
+            unsigned u = 0;
+            unsigned big = 4000000000u;
+            unsigned long ul = 0;
+            printf("%u %u %u\\n", u - 1, big + big, big * 3);
+            printf("%lu %d\\n", ul - 1, ul - 1 > 0);
+            printf("%u %u\\n", -u - 1, ~u);
+            return u - 1 > 5;
+        }
+    """,
+    "mixed_signedness_compares": """
+        int main() {
+            unsigned u = 0;
+            int n = -7;
+            unsigned char uc = 200;
+            printf("%d %d %d %d\\n", -1 < 0u, n < u, n > 5u, uc * 2 > 300);
+            printf("%d %d\\n", 0xFFFFFFFF > -1, 2147483648 > -1);
+            if (n < u) return 1;
+            return 2;
+        }
+    """,
+    "division_and_shifts": """
+        int main() {
+            unsigned big = 4000000000u;
+            int n = -7;
+            unsigned u = 0;
+            printf("%u %u %u\\n", big / 3, big % 7, n / 2u);
+            printf("%u %u %d\\n", big >> 4, (u - 1) >> 28, n >> 1);
+            u = u - 1;
+            u /= 16;
+            u >>= 2;
+            u %= 1000;
+            printf("%u\\n", u);
+            return n / 2u > 1000;
+        }
+    """,
+    "loop_counting_down": """
+        int main() {
+            unsigned i;
+            unsigned long total = 0;
+            for (i = 10; i < 100; i--) total = total * 3 + i;
+            printf("%u %lu\\n", i, total);
+            return total % 256;
+        }
+    """,
+}
+
+
+@pytest.mark.parametrize("name", UNSIGNED)
+def test_unsigned_arithmetic_matches_gcc(name, run_printing, gcc):
+    code = UNSIGNED[name]
+    assert run_printing(code) == gcc(code)
+
+
+@pytest.mark.parametrize("name", UNSIGNED)
+def test_unsigned_arithmetic_in_native_code_matches_gcc(name, gcc, tmp_path):
+    code = UNSIGNED[name]
+    program = build_executable(compile_source(code), str(tmp_path / "native"))
+    result = subprocess.run([program], capture_output=True, timeout=60)
+    assert (result.returncode, result.stdout) == gcc(code)
+
+
+FLOAT_STORAGE = """
+struct S { float x; double d; };
+float g = 0.1;
+float third(float v) { return v / 3; }
+int main() {
+    float f = 0.1;
+    float acc = 0;
+    struct S s;
+    float arr[2];
+    int i;
+    s.x = 0.1;
+    s.d = 0.1;
+    arr[0] = 0.1;
+    for (i = 0; i < 10; i++) acc += f;
+    f *= 3;
+    printf("%.10f %.10f %.10f %.10f %.10f\\n", f, g, s.x, s.d, arr[0]);
+    printf("%.10f %.10f %d\\n", acc, third(1.0), f == arr[0] * 3);
+    return 0;
+}
+"""
+
+FLOAT_SCALARS = """
+float g = 0.1;
+float scale(float v, int k) { return v * k + g; }
+int main() {
+    float f = 0.1;
+    float acc = 0;
+    double d = 0.1;
+    int i;
+    for (i = 0; i < 10; i++) acc += f;
+    printf("%.10f %.10f %.10f %.10f\\n", f, acc, scale(0.7, 3), d);
+    printf("%d %d\\n", f * 3 == 0.3, acc == 1.0);
+    return 0;
+}
+"""
+
+
+def test_float_objects_are_single_precision_wherever_stored(run_printing, gcc):
+    assert run_printing(FLOAT_STORAGE) == gcc(FLOAT_STORAGE)
+
+
+def test_float_arithmetic_in_native_code_matches_gcc(run_printing, gcc, tmp_path):
+    expected = gcc(FLOAT_SCALARS)
+    assert run_printing(FLOAT_SCALARS) == expected
+    program = build_executable(compile_source(FLOAT_SCALARS), str(tmp_path / "native"))
+    result = subprocess.run([program], capture_output=True, timeout=60)
+    assert (result.returncode, result.stdout) == expected
+
+
+# both branches of ?: take the common arithmetic type, whichever one is chosen
+TERNARY_TYPES = """
+int half(int c) { return (c ? 7 : 2.0) / 2 * 10; }
+int main() {
+    int c = 1, k = 0;
+    unsigned u = 3;
+    long l = k ? u : -1;
+    long m = c ? -1 : u;
+    double q = (c ? 1 : 2.0) / 4;
+    printf("%f %f\\n", c ? 1 : 2.0, k ? 2.5 : 3);
+    printf("%ld %ld %f %d\\n", l, m, q, half(1));
+    printf("%d\\n", (c ? 5 : 2.5) == 5.0);
+    return half(1);
+}
+"""
+
+
+def test_conditional_branches_convert_to_the_common_type(run_printing, gcc, tmp_path):
+    expected = gcc(TERNARY_TYPES)
+    assert run_printing(TERNARY_TYPES) == expected
+    program = build_executable(compile_source(TERNARY_TYPES), str(tmp_path / "native"))
+    result = subprocess.run([program], capture_output=True, timeout=60)
+    assert (result.returncode, result.stdout) == expected
@@ -0,0 +1,171 @@
+from textwrap import dedent
+
+from lexer import lexer
+from parser import Parser
+from cfg import build_cfgs, dump, liveness, optimize, remove_dead_stores, remove_unreachable
+
+
+FALLTHROUGH = """
+int f(int x) {
+    int r = 0;
+    switch (x) {
+    case 1: r = r + 1;
+    case 2: r = r + 2; break;
+    default: r = 9;
+    }
+    return r;
+}
+"""
+
+SWITCH_IN_LOOP = """
+int g(int n) {
+    int i, s = 0;
+    for (i = 0; i < n; i++) {
+        switch (i) {
+        case 0: continue;
+        case 3: break;
+        }
+        s = s + i;
+    }
+    return s;
+}
+"""
+
+DEAD_STORES = """
+int h(int a) {
+    int x = a * 2;
+    int y = a + 1;
+    int *p = &y;
+    x = 5;
+    return a;
+    a = 7;
+}
+"""
+
+
+def cfg_of(code):
+    return build_cfgs(Parser(lexer(code)).parse())[0]
+
+
+def expected(text):
+    return dedent(text).strip("\n")
+
+
+def test_switch_cases_fall_through_and_break_leaves_the_switch():
+    cfg = cfg_of(FALLTHROUGH)
+    optimize(cfg)
+    # case 1 (B2) runs on into case 2 (B3), whose break jumps to the block after the switch (B1)
+    assert dump(cfg) == expected("""
+        function f(x)
+          B0:  ; live-in: x
+            r = 0
+            %t1 = x == 1
+            branch %t1 ? B2 : B5
+          B1:  ; live-in: r
+            ret r
+          B2:  ; live-in: r
+            r = r + 1
+            jump B3
+          B3:  ; live-in: r
+            r = r + 2
+            jump B1
+          B4:  ; live-in: -
+            r = 9
+            jump B1
+          B5:  ; live-in: r, x
+            %t2 = x == 2
+            branch %t2 ? B3 : B6
+          B6:  ; live-in: -
+            jump B4
+    """)
+
+
+def test_break_and_continue_in_a_switch_inside_a_loop():
+    cfg = cfg_of(SWITCH_IN_LOOP)
+    optimize(cfg)
+    # continue (B6) goes to the loop's post block B3; break (B7) only leaves the switch, to B5
+    assert dump(cfg) == expected("""
+        function g(n)
+          B0:  ; live-in: n
+            s = 0
+            i = 0
+            jump B1
+          B1:  ; live-in: i, n, s
+            %t1 = i < n
+            branch %t1 ? B2 : B4
+          B2:  ; live-in: i, n, s
+            %t2 = i == 0
+            branch %t2 ? B6 : B8
+          B3:  ; live-in: i, n, s
+            i = i + 1
+            jump B1
+          B4:  ; live-in: s
+            ret s
+          B5:  ; live-in: i, n, s
+            s = s + i
+            jump B3
+          B6:  ; live-in: i, n, s
+            jump B3
+          B7:  ; live-in: i, n, s
+            jump B5
+          B8:  ; live-in: i, n, s
+            %t3 = i == 3
+            branch %t3 ? B7 : B9
+          B9:  ; live-in: i, n, s
+            jump B5
+    """)
+
+
+def test_liveness_follows_loop_back_edges():
+    cfg = cfg_of(SWITCH_IN_LOOP)
+    live_in, live_out = liveness(cfg)
+    assert live_in["B0"] == {"n"}
+    assert live_in["B1"] == live_out["B3"] == {"i", "n", "s"}
+    assert live_out["B1"] == {"i", "n", "s"}
+    assert live_in["B4"] == {"s"} and live_out["B4"] == set()
+
+
+def test_addresses_taken_and_globals_stay_live():
+    cfg = cfg_of("int g; int k(int a) { int y = a; int *p = &y; g = a; return 0; }")
+    _, live_out = liveness(cfg)
+    assert cfg.pinned == {"y", "g"}
+    assert {"y", "g"} <= live_out["B0"]
+
+
+def test_remove_unreachable_drops_blocks_after_return_break_and_continue():
+    cfg = cfg_of(SWITCH_IN_LOOP)
+    before = set(cfg.blocks)
+    assert remove_unreachable(cfg) == (4, 4)
+    assert before - set(cfg.blocks) == {"B10", "B11", "B12", "B13"}
+    assert remove_unreachable(cfg) == (0, 0)
+
+
+def test_remove_dead_stores_keeps_pinned_variables_and_side_effects():
+    cfg = cfg_of(DEAD_STORES)
+    remove_unreachable(cfg)
+    # x is overwritten unused twice and p is never read; y had its address taken
+    assert remove_dead_stores(cfg) == 3
+    assert dump(cfg) == expected("""
+        function h(a)
+          B0:  ; live-in: a
+            y = a + 1
+            ret a
+    """)
+    cfg = cfg_of("int put(int c); int m() { int unused = put(65); return 0; }")
+    assert remove_dead_stores(cfg) == 0
+    assert [instr.op for instr in cfg.blocks["B0"].instrs] == ["call"]
+
+
+def test_dead_stores_are_removed_until_nothing_changes():
+    # b feeds only a, and a is never read: removing a makes b's store dead in the next round
+    cfg = cfg_of("int d(int n) { int b = n + 1; int a = b * 2; return n; }")
+    assert remove_dead_stores(cfg) == 2
+
+
+def test_optimize_reports_what_it_removed():
+    assert optimize(cfg_of(DEAD_STORES)) == {
+        "before": 7, "after": 2, "unreachable_blocks": 1, "unreachable_instrs": 2, "dead_stores": 3}
+    assert optimize(cfg_of(FALLTHROUGH)) == {
+        "before": 16, "after": 13, "unreachable_blocks": 3, "unreachable_instrs": 3, "dead_stores": 0}
+    assert optimize(cfg_of(SWITCH_IN_LOOP)) == {
+        "before": 22, "after": 17, "unreachable_blocks": 4, "unreachable_instrs": 4, "dead_stores": 1}
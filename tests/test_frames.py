@@ -0,0 +1,74 @@
+import shutil
+import subprocess
+
+import pytest
+
+from lexer import lexer
+from parser import Parser
+from frames import layout_frames
+from cfg import build_cfgs
+from codegen_x86 import compile_source, build_executable
+
+
+STATIC_LOCALS = """
+int total = 100;
+
+int counter() {
+    static int n = 0;
+    return ++n;
+}
+
+int twice() {
+    static int n = 10, calls;
+    calls++;
+    n = n + calls;
+    {
+        static int n = 1000;
+        n++;
+        if (calls == 3) return n;
+    }
+    return n;
+}
+
+int bump() {
+    extern int total;
+    total += 5;
+    return total;
+}
+
+int main() {
+    int a = 0;
+    counter(); counter();
+    a = counter();
+    twice(); twice();
+    a = a * 10000 + twice() * 10;
+    bump();
+    return (a + bump()) % 256;
+}
+"""
+
+
+def test_static_locals_keep_their_value_between_calls(run_c):
+    # 3 * 10000 + 1003 * 10 + 110, as a gcc build computes it
+    assert run_c(STATIC_LOCALS) == (30000 + 10030 + 110) % 256
+
+
+def test_static_and_extern_locals_get_no_frame_slot():
+    layouts = layout_frames(Parser(lexer(STATIC_LOCALS)).parse())
+    assert layouts["counter"].size == 0
+    assert layouts["bump"].size == 0
+    assert layouts["main"].names == ["a"]
+    symbols = [dec.direct_decl.symbol for decl in layouts["twice"].statics for dec, _ in decl.init_declarators]
+    assert symbols == ["twice.n", "twice.calls", "twice.n.2"]
+
+
+def test_cfg_does_not_reinitialise_static_locals():
+    counter = build_cfgs(Parser(lexer(STATIC_LOCALS)).parse())[0]
+    copies = [str(instr) for block in counter.blocks.values() for instr in block.instrs]
+    assert not any(line.startswith("counter.n = 0") for line in copies)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="no C compiler available")
+def test_static_locals_in_native_code(tmp_path):
+    program = build_executable(compile_source(STATIC_LOCALS), str(tmp_path / "statics"))
+    assert subprocess.run([program]).returncode == (30000 + 10030 + 110) % 256
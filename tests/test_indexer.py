@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+import indexer
+from indexer import Index
+
+
+SOURCE = """int total;
+int add(int a, int b) { return a + b; }
+int main() { total = add(1, 2); return total; }
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    with Index(str(tmp_path / "xref.db")) as index:
+        yield index
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # the sources handed to the parser, one per file that was really re-indexed
+    seen = []
+    parse_source = indexer.parse_source
+
+    def counting(code):
+        seen.append(code)
+        return parse_source(code)
+    monkeypatch.setattr(indexer, "parse_source", counting)
+    return seen
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def stored(index, path):
+    return index.db.execute("SELECT mtime_ns, size, digest FROM files WHERE path = ?",
+                            (os.path.abspath(path),)).fetchone()
+
+
+def symbol_rows(index):
+    return index.db.execute("SELECT rowid, name, kind, scope, line FROM symbols ORDER BY rowid").fetchall()
+
+
+def test_unchanged_mtime_and_size_skip_the_file(tmp_path, index, parses):
+    source = tmp_path / "a.c"
+    write(source, SOURCE, 10**18)
+    assert index.update([str(source)]) == 1
+    rows = symbol_rows(index)
+    assert index.update([str(source)]) == 0
+    assert len(parses) == 1
+    assert symbol_rows(index) == rows
+    assert [(line, scope) for _, line, _, _, scope in index.callers("add")] == [(3, "main")]
+
+
+def test_a_touched_file_with_the_same_digest_is_not_reparsed(tmp_path, index, parses):
+    source = tmp_path / "a.c"
+    write(source, SOURCE, 10**18)
+    index.update([str(source)])
+    rows = symbol_rows(index)
+    _, size, digest = stored(index, source)
+    write(source, SOURCE, 2 * 10**18)
+    assert index.update_file(str(source)) is False
+    assert len(parses) == 1
+    # the new mtime is recorded, so the next update stops at the stat check
+    assert stored(index, source) == (2 * 10**18, size, digest)
+    assert symbol_rows(index) == rows
+
+
+def test_an_edited_file_is_reindexed(tmp_path, index, parses):
+    source = tmp_path / "a.c"
+    write(source, SOURCE, 10**18)
+    index.update([str(source)])
+    _, _, digest = stored(index, source)
+    # same size and mtime would hide the edit, so the size changes here
+    write(source, SOURCE.replace("add", "plus"), 10**18)
+    assert index.update([str(source)]) == 1
+    assert len(parses) == 2
+    assert stored(index, source)[2] != digest
+    assert index.definitions("add") == []
+    assert [(line, kind) for _, line, _, kind, _ in index.references("plus")] == [(3, "call")]
+    assert index.db.execute("SELECT COUNT(*) FROM files").fetchone() == (1,)
+
+
+def test_a_file_that_stops_parsing_keeps_no_symbols(tmp_path, index):
+    source = tmp_path / "a.c"
+    write(source, SOURCE, 10**18)
+    index.update([str(source)])
+    write(source, "int main( {", 2 * 10**18)
+    assert index.update([str(source)]) == 1
+    assert symbol_rows(index) == []
+    assert [path for path, _ in index.errors()] == [str(source)]
+
+
+def test_prune_removes_the_rows_of_deleted_files(tmp_path, index):
+    kept, deleted = tmp_path / "kept.c", tmp_path / "deleted.c"
+    write(kept, SOURCE, 10**18)
+    write(deleted, "int other() { return add(3, 4); }\n", 10**18)
+    assert index.update([str(kept), str(deleted)]) == 2
+    assert len(index.callers("add")) == 2
+    deleted.unlink()
+    assert index.prune() == 1
+    assert index.prune() == 0
+    assert [path for path, *_ in index.callers("add")] == [str(kept)]
+    assert index.definitions("other") == []
+    # the symbols go with the file row through ON DELETE CASCADE
+    assert index.db.execute("SELECT COUNT(DISTINCT file_id) FROM symbols").fetchone() == (1,)
@@ -0,0 +1,123 @@
+import pytest
+
+
+FUNCTION_POINTERS = """
+int twice(int x) { return 2 * x; }
+int square(int x) { return x * x; }
+int (*global_op)(int) = square;
+
+int apply(int (*f)(int), int x) { return f(x); }
+int apply_star(int (*f)(int), int x) { return (*f)(x); }
+
+int (*pick(int which))(int) {
+    if (which) return twice;
+    return square;
+}
+
+int main() {
+    int (*fp)(int) = twice;
+    int (*table[2])(int);
+    int total = fp(5);
+    fp = square;
+    total = total + fp(3);
+    table[0] = twice;
+    table[1] = &square;
+    total = total + table[1](4) + table[0](1);
+    total = total + apply(twice, 7) + apply_star(square, 2);
+    total = total + pick(1)(10) + pick(0)(3) + global_op(2);
+    return total;
+}
+"""
+
+
+def test_function_pointer_locals_parameters_and_calls(run_c, gcc):
+    status, _ = gcc(FUNCTION_POINTERS)
+    assert run_c(FUNCTION_POINTERS) == status == 88
+
+
+def test_function_pointer_parameter_called_in_a_loop(run_c):
+    code = """
+    int inc(int x) { return x + 1; }
+    int dec(int x) { return x - 1; }
+    int repeat(int (*step)(int), int n, int x) {
+        int i;
+        for (i = 0; i < n; i++) x = step(x);
+        return x;
+    }
+    int main() { return repeat(inc, 50, 0) + repeat(dec, 8, 0); }
+    """
+    assert run_c(code) == 42
+
+
+TWO_DIMENSIONAL = {
+    "struct": """
+        struct P { int x; double y; };
+        int main() {
+            struct P m[2][3];
+            struct P *row;
+            int i, j;
+            for (i = 0; i < 2; i++)
+                for (j = 0; j < 3; j++) {
+                    m[i][j].x = i * 10 + j;
+                    m[i][j].y = i + j * 0.5;
+                }
+            m[1][2].x = 5;
+            row = m[1];
+            return m[1][2].x + m[0][2].x * 2 + row[1].x * 3 + (m[1][1].y > 1.2);
+        }
+    """,
+    "pointer": """
+        int main() {
+            int *m[3][2];
+            int a = 1, b = 2, c = 3;
+            m[0][0] = &a;
+            m[2][1] = &b;
+            m[1][0] = &c;
+            *m[2][1] = 20;
+            return *m[0][0] + *m[2][1] * 2 + *m[1][0] + b;
+        }
+    """,
+    "double": """
+        int main() {
+            double m[4][5];
+            double sum = 0.0;
+            int i, j;
+            for (i = 0; i < 4; i++)
+                for (j = 0; j < 5; j++)
+                    m[i][j] = i * j * 0.25;
+            for (i = 0; i < 4; i++)
+                sum = sum + m[i][4] - m[3][i];
+            return sum * 4 + m[3][4];
+        }
+    """,
+}
+
+
+@pytest.mark.parametrize("element", TWO_DIMENSIONAL)
+def test_two_dimensional_arrays_of_any_element_type(element, run_c, gcc):
+    code = TWO_DIMENSIONAL[element]
+    status, _ = gcc(code)
+    assert run_c(code) & 0xFF == status
+
+
+UNION_MEMBERS = """
+union V { int i; char c; unsigned char b; short s; };
+struct H { int tag; union V v; };
+int main() {
+    union V v;
+    struct H h;
+    union V *p = &v;
+    v.i = 321;
+    printf("%d %d %d\\n", v.c, p->b, v.s);
+    v.i = 70000;
+    printf("%d %d %d\\n", v.s, p->c, v.b);
+    h.v.i = -1;
+    h.v.c = 5;
+    printf("%d %d\\n", h.v.b, h.v.c);
+    return v.c;
+}
+"""
+
+
+def test_union_member_loads_read_the_member_type(run_printing, gcc):
+    assert run_printing(UNION_MEMBERS) == gcc(UNION_MEMBERS)
@@ -0,0 +1,236 @@
+from dataclasses import fields
+
+import pytest
+
+from lexer import lexer
+from parser import (Parser, ParseError, Node, Declarator, Identifier, Constant, BinaryOp, UnaryOp, TernaryOp,
+                    Assignment, Call, ArraySubscript, MemberAccess, dispatch_table, declarator_type,
+                    declares_function)
+
+
+INLINE = (Declarator, Identifier, Constant, BinaryOp, UnaryOp, TernaryOp, Assignment, Call, ArraySubscript, MemberAccess)
+
+
+def values(node):
+    return [getattr(node, f.name) for f in fields(node) if f.compare]
+
+
+def is_statement(value):
+    return isinstance(value, Node) and not isinstance(value, INLINE)
+
+
+def inline(value):
+    if isinstance(value, Declarator):
+        # only what every version of the parser has recorded for a declarator
+        name = value.direct_decl.name if value.direct_decl is not None else None
+        return f"(Declarator {value.pointer} {name})"
+    if isinstance(value, Node):
+        return "(" + " ".join([type(value).__name__] + [inline(v) for v in values(value)]) + ")"
+    if isinstance(value, (list, tuple)):
+        return "[" + " ".join(inline(item) for item in value) + "]"
+    return repr(value)
+
+
+def dump(node, indent=""):
+    # a statement, then the statements below it one per line and indented; the other
+    # fields (expressions, declarators, specifiers) stay on the statement's own line
+    head, body = [type(node).__name__], []
+    for value in values(node):
+        items = value if isinstance(value, list) and any(is_statement(item) for item in value) else [value]
+        if is_statement(items[0]) or len(items) > 1:
+            body.extend(dump(item, indent + "  ") for item in items)
+        else:
+            head.append(inline(value))
+    return "".join([indent, " ".join(head)] + ["\n" + line for line in body])
+
+
+# expected trees as printed by the hand-written statement parser this one replaced
+CONFORMANCE = {
+    "declarations": (
+        'int g = 1, *p, h; static long k; typedef int size; int f(int a, char *b);',
+        """\
+TranslationUnit
+  Declaration ['int'] [[(Declarator 0 g) (Constant 1)] [(Declarator 1 p) None] [(Declarator 0 h) None]]
+  Declaration ['static' 'long'] [[(Declarator 0 k) None]]
+  Declaration ['typedef' 'int'] [[(Declarator 0 size) None]]
+  Declaration ['int'] [[(Declarator 0 f) None]]
+"""),
+    "if_else_chain": (
+        'int f(int x) { if (x < 0) return -1; else if (x == 0) return 0; else { x = x * 2; } return x; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      IfStatement (BinaryOp '<' (Identifier 'x') (Constant 0))
+        ReturnStatement (UnaryOp '-u' (Constant 1))
+        IfStatement (BinaryOp '==' (Identifier 'x') (Constant 0))
+          ReturnStatement (Constant 0)
+          CompoundStatement
+            ExpressionStatement (Assignment 'ASSIGN' (Identifier 'x') (BinaryOp '*' (Identifier 'x') (Constant 2)))
+      ReturnStatement (Identifier 'x')
+"""),
+    "loops": (
+        'void f(int n) { int i = 0; while (i < n) { i++; if (i == 3) continue; if (i > 7) break; } do i--; while (i > 0); }',
+        """\
+TranslationUnit
+  FunctionDefinition ['void'] (Declarator 0 f)
+    CompoundStatement
+      Declaration ['int'] [[(Declarator 0 i) (Constant 0)]]
+      WhileStatement (BinaryOp '<' (Identifier 'i') (Identifier 'n'))
+        CompoundStatement
+          ExpressionStatement (UnaryOp '++post' (Identifier 'i'))
+          IfStatement (BinaryOp '==' (Identifier 'i') (Constant 3)) None
+            ContinueStatement
+          IfStatement (BinaryOp '>' (Identifier 'i') (Constant 7)) None
+            BreakStatement
+      DoWhileStatement (BinaryOp '>' (Identifier 'i') (Constant 0))
+        ExpressionStatement (UnaryOp '--post' (Identifier 'i'))
+"""),
+    "for_forms": (
+        'int f(int n) { int s = 0, i; for (i = 0; i < n; i++) s += i; for (int j = n; j; j--) ; for (;;) { break; } for (long k = 0, m = 1; k < m; k++) m--; return s; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      Declaration ['int'] [[(Declarator 0 s) (Constant 0)] [(Declarator 0 i) None]]
+      ForStatement (BinaryOp '<' (Identifier 'i') (Identifier 'n')) (UnaryOp '++post' (Identifier 'i'))
+        ExpressionStatement (Assignment 'ASSIGN' (Identifier 'i') (Constant 0))
+        ExpressionStatement (Assignment 'PLUS_ASSIGN' (Identifier 's') (Identifier 'i'))
+      ForStatement (Identifier 'j') (UnaryOp '--post' (Identifier 'j'))
+        Declaration ['int'] [[(Declarator 0 j) (Identifier 'n')]]
+        ExpressionStatement None
+      ForStatement None None None
+        CompoundStatement
+          BreakStatement
+      ForStatement (BinaryOp '<' (Identifier 'k') (Identifier 'm')) (UnaryOp '++post' (Identifier 'k'))
+        Declaration ['long'] [[(Declarator 0 k) (Constant 0)] [(Declarator 0 m) (Constant 1)]]
+        ExpressionStatement (UnaryOp '--post' (Identifier 'm'))
+      ReturnStatement (Identifier 's')
+"""),
+    "switch": (
+        'int f(int c) { switch (c) { case 1: return 10; case 2: { int t = c * 2; return t; } case 3: int u = 4; u++; break; default: c = -c; } return c; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      SwitchStatement (Identifier 'c')
+        CompoundStatement
+          CaseStatement (Constant 1)
+            ReturnStatement (Constant 10)
+          CaseStatement (Constant 2)
+            CompoundStatement
+              Declaration ['int'] [[(Declarator 0 t) (BinaryOp '*' (Identifier 'c') (Constant 2))]]
+              ReturnStatement (Identifier 't')
+          CaseStatement (Constant 3)
+            Declaration ['int'] [[(Declarator 0 u) (Constant 4)]]
+            ExpressionStatement (UnaryOp '++post' (Identifier 'u'))
+            BreakStatement
+          CaseStatement None
+            ExpressionStatement (Assignment 'ASSIGN' (Identifier 'c') (UnaryOp '-u' (Identifier 'c')))
+      ReturnStatement (Identifier 'c')
+"""),
+    "blocks": (
+        'int main() { ; { int a = 1; { const int b = a + 1; a = b; } } return 0; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 main)
+    CompoundStatement
+      ExpressionStatement None
+      CompoundStatement
+        Declaration ['int'] [[(Declarator 0 a) (Constant 1)]]
+        CompoundStatement
+          Declaration ['const' 'int'] [[(Declarator 0 b) (BinaryOp '+' (Identifier 'a') (Constant 1))]]
+          ExpressionStatement (Assignment 'ASSIGN' (Identifier 'a') (Identifier 'b'))
+      ReturnStatement (Constant 0)
+"""),
+    "expressions": (
+        'int f(int a, int b) { a += b <<= 2; a = a ? b : a % 3; f(a, b)[0]; return !a && (b || ~a); }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      ExpressionStatement (Assignment 'PLUS_ASSIGN' (Identifier 'a') (Assignment 'SHIFT_LEFT_ASSIGN' (Identifier 'b') (Constant 2)))
+      ExpressionStatement (Assignment 'ASSIGN' (Identifier 'a') (TernaryOp (Identifier 'a') (Identifier 'b') (BinaryOp '%' (Identifier 'a') (Constant 3))))
+      ExpressionStatement (ArraySubscript (Call (Identifier 'f') [(Identifier 'a') (Identifier 'b')]) (Constant 0))
+      ReturnStatement (BinaryOp '&&' (UnaryOp '!' (Identifier 'a')) (BinaryOp '||' (Identifier 'b') (UnaryOp '~' (Identifier 'a'))))
+"""),
+}
+
+# for-init declarations the old parser rejected: it only recognised a few type keywords there
+FOR_INIT = {
+    "for_init_unsigned": (
+        'int f() { int s = 0; for (unsigned i = 0; i < 4; i++) s += i; return s; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      Declaration ['int'] [[(Declarator 0 s) (Constant 0)]]
+      ForStatement (BinaryOp '<' (Identifier 'i') (Constant 4)) (UnaryOp '++post' (Identifier 'i'))
+        Declaration ['unsigned'] [[(Declarator 0 i) (Constant 0)]]
+        ExpressionStatement (Assignment 'PLUS_ASSIGN' (Identifier 's') (Identifier 'i'))
+      ReturnStatement (Identifier 's')
+"""),
+    "for_init_qualified": (
+        'int f() { int s = 0; for (const int n = 3, *p = 0; s < n; s++) ; for (signed char c = 0; c < 2; c++) s++; return s; }',
+        """\
+TranslationUnit
+  FunctionDefinition ['int'] (Declarator 0 f)
+    CompoundStatement
+      Declaration ['int'] [[(Declarator 0 s) (Constant 0)]]
+      ForStatement (BinaryOp '<' (Identifier 's') (Identifier 'n')) (UnaryOp '++post' (Identifier 's'))
+        Declaration ['const' 'int'] [[(Declarator 0 n) (Constant 3)] [(Declarator 1 p) (Constant 0)]]
+        ExpressionStatement None
+      ForStatement (BinaryOp '<' (Identifier 'c') (Constant 2)) (UnaryOp '++post' (Identifier 'c'))
+        Declaration ['signed' 'char'] [[(Declarator 0 c) (Constant 0)]]
+        ExpressionStatement (UnaryOp '++post' (Identifier 's'))
+      ReturnStatement (Identifier 's')
+"""),
+}
+
+
+def parse(code):
+    return Parser(lexer(code)).parse()
+
+
+@pytest.mark.parametrize("name", CONFORMANCE)
+def test_same_tree_as_previous_parser(name):
+    code, expected = CONFORMANCE[name]
+    assert dump(parse(code)) + "\n" == expected
+
+
+@pytest.mark.parametrize("name", FOR_INIT)
+def test_for_init_accepts_every_declaration_specifier(name):
+    code, expected = FOR_INIT[name]
+    assert dump(parse(code)) + "\n" == expected
+
+
+def test_unclosed_block_is_a_parse_error():
+    with pytest.raises(ParseError):
+        parse("int main() { if (1) { return 0; }")
+
+
+def test_grammar_that_is_not_ll1_is_rejected():
+    grammar = {"statement": ["while_statement", "do_while_statement"],
+               "while_statement": ["WHILE"], "do_while_statement": ["WHILE"]}
+    with pytest.raises(ValueError):
+        dispatch_table(grammar, "statement")
+
+
+DECLARATOR_TYPES = {
+    "int *fp(int);": ("int*(int)", True),
+    "int (*fp)(int);": ("int(int)*", False),
+    "int (*fp[2])(int);": ("int(int)*[2]", False),
+    "int *(*fp)(double, char);": ("int*(double, char)*", False),
+    "int (*fp(int))(int);": ("int(int)*(int)", True),
+    "int (**fp)(void);": ("int()**", False),
+}
+
+
+@pytest.mark.parametrize("code", DECLARATOR_TYPES)
+def test_parenthesised_declarator_binds_before_the_suffixes(code):
+    tu = parse(code)
+    decl = tu.external_declarations[0]
+    dec = decl.init_declarators[0][0]
+    ctype = declarator_type(tu.types, tu.types.from_specifiers(decl.specifiers), dec)
+    assert (str(ctype), declares_function(dec)) == DECLARATOR_TYPES[code]
+    assert dec.direct_decl.name == "fp"
@@ -0,0 +1,44 @@
+from array import array
+
+import pytest
+
+from runtime import Format
+
+
+# (format, arguments, what a gcc build of printf(format, arguments...) prints)
+GCC_PRINTF = [
+    (b"%d|%5d|%-5d|%05d|%+d", (42, 42, 42, 42, 42), b"42|   42|42   |00042|+42"),
+    (b"%u %x %X %o", (-1, 255, 255, 8), b"4294967295 ff FF 10"),
+    (b"%hhd %hd %lu", (300, 70000, -1), b"44 4464 18446744073709551615"),
+    (b"%.2f %8.3f %e %g", (3.14159, 2.5, 1234.5, 0.0001), b"3.14    2.500 1.234500e+03 0.0001"),
+    (b"%c%s%%", (65, b"bc\0"), b"Abc%"),
+    (b"[%#o] [%#o] [%#o]", (8, 0, 511), b"[010] [0] [0777]"),
+    (b"[%#x] [%#X] [%#x]", (255, 255, 0), b"[0xff] [0XFF] [0]"),
+    (b"[%#6o] [%#-6o] [%#06o] [%#.5o] [%#.1o]", (8, 8, 8, 8, 8), b"[   010] [010   ] [000010] [00010] [010]"),
+    (b"[%#8x] [%#-8x] [%#08x] [%#.4x] [%#6x]", (255, 255, 255, 255, 0),
+     b"[    0xff] [0xff    ] [0x0000ff] [0x00ff] [     0]"),
+    (b"[%#*x] [%#*o] [%#lx] [%#hhx]", (8, 255, -6, 9, 1 << 32, 511), b"[    0xff] [011   ] [0x100000000] [0xff]"),
+    (b"[%#x] [%#o] [%#.3g] [%#.0f]", (-1, -1, 1.0, 3.0), b"[0xffffffff] [037777777777] [1.00] [3.]"),
+]
+
+
+def c_args(args):
+    # strings reach printf as NUL-terminated char buffers
+    return tuple(array("b", arg) if isinstance(arg, bytes) else arg for arg in args)
+
+
+@pytest.mark.parametrize("fmt, args, expected", GCC_PRINTF)
+def test_printf_output_is_what_gcc_prints(fmt, args, expected):
+    assert Format(fmt).render(c_args(args)) == expected
+
+
+def test_alternate_forms_match_gcc(run_printing, gcc):
+    code = """
+    int main() {
+        int i;
+        for (i = 0; i < 20; i = i * 3 + 1)
+            printf("%#o %#x %#X %#5o|%#-7x|\\n", i, i, i * 1000, i, i);
+        return 0;
+    }
+    """
+    assert run_printing(code) == gcc(code)
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+
+from server import CompileServer
+
+
+BAD_REQUESTS = [
+    {"op": "parse"},
+    {"op": "check", "code": 42},
+    {"op": "lex", "code": None, "path": ["a.c"]},
+    {"op": "parse", "path": "a\0.c"},
+    {"op": ["parse"]},
+    [1, 2],
+]
+
+
+async def exchange(path, requests):
+    # one connection, one request per line, answers read back in order
+    server = CompileServer(path)
+    listener = await asyncio.start_unix_server(server.client, path=path)
+    async with listener:
+        reader, writer = await asyncio.open_unix_connection(path)
+        answers = []
+        for request in requests:
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            answers.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+    return answers
+
+
+@pytest.mark.parametrize("request_", BAD_REQUESTS)
+def test_bad_request_gets_an_answer_and_keeps_the_connection(request_, tmp_path):
+    bad, ping = asyncio.run(exchange(str(tmp_path / "s"), [request_, {"op": "ping", "id": 7}]))
+    assert bad["ok"] is False and bad["kind"] == "request"
+    assert ping == {"ok": True, "id": 7}
+
+
+def test_good_requests_after_a_bad_one(tmp_path):
+    missing = str(tmp_path / "missing.c")
+    answers = asyncio.run(exchange(str(tmp_path / "s"), [
+        {"op": "check"},
+        {"op": "parse", "code": "int main() { return 0; }"},
+        {"op": "check", "path": missing},
+    ]))
+    assert [answer["kind"] for answer in (answers[0], answers[2])] == ["request", "io"]
+    assert answers[1] == {"ok": True, "functions": ["main"]}
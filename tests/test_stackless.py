@@ -0,0 +1,61 @@
+import pytest
+
+from lexer import lexer
+from parser import Parser
+from stackless import GeneratorCompiler, StacklessInterpreter
+
+
+RECURSION = """
+long sum(int n) {
+    if (n == 0) return 0;
+    return n + sum(n - 1);
+}
+"""
+
+MUTUAL_TAIL_CALLS = """
+int is_odd(int n);
+int is_even(int n) {
+    if (n == 0) return 1;
+    return is_odd(n - 1);
+}
+int is_odd(int n) {
+    if (n == 0) return 0;
+    return is_even(n - 1);
+}
+"""
+
+
+def interpreter(code):
+    return StacklessInterpreter(Parser(lexer(code)).parse())
+
+
+def test_recursion_deeper_than_the_python_stack():
+    interp = interpreter(RECURSION)
+    assert interp.run("sum", (20000,)) == 20000 * 20001 // 2
+    assert interp.max_depth == 20001
+
+
+@pytest.mark.slow
+def test_recursion_a_million_calls_deep():
+    interp = interpreter(RECURSION)
+    assert interp.run("sum", (10**6,)) == 10**6 * (10**6 + 1) // 2
+    assert interp.max_depth == 10**6 + 1
+
+
+@pytest.mark.slow
+def test_mutual_tail_calls_a_million_deep_run_in_constant_stack():
+    interp = interpreter(MUTUAL_TAIL_CALLS)
+    assert interp.run("is_even", (10**6,)) == 1
+    assert interp.run("is_odd", (10**6 + 1,)) == 1
+    assert interp.max_depth <= 1
+
+
+def test_a_delegated_statement_that_returns_hands_back_the_converted_value():
+    interp = interpreter("char pick(int n) { if (n) return 300; return 2; }")
+    fn = interp.functions["pick"]
+    compiler = GeneratorCompiler(interp, fn.frame)
+    compiler.delegate_statement(fn.body, 1)
+    compiler.emit(1, "return None")
+    interp.code["pick"] = (compiler.build("pick")[0], False)
+    assert interp.run("pick", (1,)) == 44
+    assert interp.run("pick", (0,)) == 2
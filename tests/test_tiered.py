@@ -0,0 +1,128 @@
+import io
+
+import pytest
+
+from lexer import lexer
+from parser import Parser
+from interpreter import Interpreter
+from runtime import Runtime
+from tiered import TieredInterpreter
+
+
+SQUARES = """
+int square(int x) { return x * x; }
+int main() {
+    int i, total = 0;
+    for (i = 0; i < 10; i++) total = total + square(i);
+    return total;
+}
+"""
+
+# every kind of loop, each with locals of a different type live across the promotion point
+LIVE_LOCALS = """
+int main() {
+    int i = 0, n = 0;
+    char c = 100;
+    double acc = 0.5;
+    int a[10];
+    int *p = a;
+    unsigned u = 4000000000u;
+    while (i < 10) {
+        a[i] = i * i - c;
+        c = c + 9;
+        acc = acc * 1.5 + i;
+        u = u + 100000000;
+        i++;
+    }
+    do {
+        n = n + *p;
+        p++;
+    } while (p < a + 10);
+    for (i = 0; i < 10; i++) {
+        if (i == 5) continue;
+        n = n + a[i] % 7;
+    }
+    printf("%d %d %d %.3f %u\\n", i, n, c, acc, u);
+    return n & 127;
+}
+"""
+
+SEARCH = """
+int find(int *a, int n, int key) {
+    int i = 0;
+    while (i < n) {
+        if (a[i] == key) return i;
+        i++;
+    }
+    return -1;
+}
+int main() {
+    int a[4];
+    int k, total = 0;
+    for (k = 0; k < 4; k++) a[k] = k * 3;
+    for (k = 0; k < 6; k++) total = total * 10 + find(a, 4, k * 3) + 1;
+    return total % 251;
+}
+"""
+
+
+def tiered(code, builtins=None, **thresholds):
+    return TieredInterpreter(Parser(lexer(code)).parse(), builtins, **thresholds)
+
+
+def events(interp):
+    return [(e.kind, e.name, e.calls, e.back_edges) for e in interp.events]
+
+
+def run_printing(engine, code):
+    stdout = io.BytesIO()
+    runtime = Runtime(stdout)
+    status = engine(Parser(lexer(code)).parse(), runtime.builtins).run("main", ())
+    runtime.output.flush()
+    return status & 0xFF, stdout.getvalue()
+
+
+def test_a_function_is_promoted_once_its_calls_pass_the_threshold():
+    interp = tiered(SQUARES, call_threshold=3, loop_threshold=1000)
+    assert interp.run("main", ()) == 285
+    assert events(interp) == [("function", "square", 4, 0)]
+    assert interp.profiles["square"].tier == 1
+    assert interp.profiles["main"].tier == 0
+
+
+def test_a_hot_loop_is_promoted_without_promoting_its_function():
+    interp = tiered(SQUARES, call_threshold=1000, loop_threshold=5)
+    assert interp.run("main", ()) == 285
+    assert events(interp) == [("loop", "main", 1, 5)]
+    assert interp.profiles["main"].tier == 0
+
+
+def test_zero_thresholds_promote_every_function_on_its_first_call():
+    interp = tiered(SQUARES, call_threshold=0, loop_threshold=0)
+    assert interp.run("main", ()) == 285
+    assert events(interp) == [("function", "main", 1, 0), ("function", "square", 1, 0)]
+    assert all(event.delegated == 0 for event in interp.events)
+
+
+@pytest.mark.parametrize("threshold", [1, 2, 7])
+def test_loops_entered_mid_iteration_keep_their_live_locals(threshold, gcc):
+    engine = lambda tu, builtins: TieredInterpreter(tu, builtins, call_threshold=1000, loop_threshold=threshold)
+    result = run_printing(engine, LIVE_LOCALS)
+    assert result == run_printing(Interpreter, LIVE_LOCALS) == gcc(LIVE_LOCALS)
+
+
+@pytest.mark.parametrize("threshold", [1, 2, 7])
+def test_each_loop_is_promoted_once_at_the_threshold(threshold):
+    stdout = io.BytesIO()
+    interp = tiered(LIVE_LOCALS, Runtime(stdout).builtins, call_threshold=1000, loop_threshold=threshold)
+    interp.run("main", ())
+    assert events(interp) == [("loop", "main", 1, threshold)] * 3
+
+
+@pytest.mark.parametrize("threshold, calls", [(1, 2), (2, 3), (7, 5)])
+def test_back_edges_add_up_across_calls_and_returns_leave_compiled_loops(threshold, calls):
+    # find() runs 0, 1, 2, 3, 4 and 4 iterations, so the threshold is crossed in call number `calls`
+    expected = Interpreter(Parser(lexer(SEARCH)).parse()).run("main", ())
+    interp = tiered(SEARCH, call_threshold=1000, loop_threshold=threshold)
+    assert interp.run("main", ()) == expected
+    assert [event for event in events(interp) if event[1] == "find"] == [("loop", "find", calls, threshold)]
@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+
+from lexer import lexer
+from parser import (Parser, BinaryOp, CompoundStatement, Constant, ExpressionStatement, FunctionDefinition,
+                    Identifier, ReturnStatement)
+from visitor import Analysis, Transformer, Visitor, child_fields, run_analyses
+
+
+PROGRAM = """
+int g;
+int f(int a, int b) {
+    int s = 0;
+    int i;
+    for (i = 0; i < a; i++) {
+        while (s > 100) { s = s / 2; }
+        if (i % 3 == 0) s += i * b;
+        else s = -s;
+    }
+    return s + g;
+}
+"""
+
+
+def parse(code=PROGRAM):
+    return Parser(lexer(code)).parse()
+
+
+@dataclass
+class CheckedBinaryOp(BinaryOp):
+    pass
+
+
+class Names(Visitor):
+    def __init__(self):
+        self.seen = []
+
+    def visit_Identifier(self, node):
+        self.seen.append(node.name)
+
+    def visit_BinaryOp(self, node):
+        self.seen.append(node.op)
+        self.generic_visit(node)
+
+    def visit_Node(self, node):
+        self.seen.append(node.__class__.__name__)
+        self.generic_visit(node)
+
+
+class Leaves(Visitor):
+    def __init__(self):
+        self.seen = []
+
+    def visit_Constant(self, node):
+        self.seen.append(node.value)
+
+
+def test_dispatch_falls_back_along_the_mro():
+    tree = CheckedBinaryOp("+", Identifier("x"), BinaryOp("*", Constant(2), Identifier("y")))
+    names = Names()
+    names.visit(tree)
+    # the subclass is handled by visit_BinaryOp, Constant has no method and lands on visit_Node
+    assert names.seen == ["+", "x", "*", "Constant", "y"]
+    assert Names.dispatch[CheckedBinaryOp] is Names.visit_BinaryOp
+
+
+def test_each_visitor_class_keeps_its_own_dispatch_table():
+    tree = BinaryOp("-", Constant(1), Constant(2))
+    Names().visit(tree)
+    leaves = Leaves()
+    leaves.visit(tree)
+    # Leaves has no visit_BinaryOp, so generic_visit walks down to both constants
+    assert leaves.seen == [1, 2]
+    assert Leaves.dispatch[BinaryOp] is Leaves.generic_visit
+    assert Visitor.dispatch == {}
+
+
+class DropAndSplice(Transformer):
+    # drop "x;" statements, double "y;" statements and fold 1 + 1
+    def visit_ExpressionStatement(self, node):
+        if isinstance(node.expr, Identifier):
+            if node.expr.name == "x":
+                return None
+            if node.expr.name == "y":
+                return [node, ExpressionStatement(Identifier("y2"))]
+        return self.generic_visit(node)
+
+    def visit_BinaryOp(self, node):
+        node = self.generic_visit(node)
+        if node.op == "+" and node.left == node.right == Constant(1):
+            return Constant(2)
+        return node
+
+
+def test_transformer_drops_none_and_splices_lists():
+    tree = parse("int f(int x, int y, int y2) { x; y; { x; y; } return 1 + 1; }")
+    DropAndSplice().visit(tree)
+    body = tree.external_declarations[0].body
+    assert body == CompoundStatement([
+        ExpressionStatement(Identifier("y")),
+        ExpressionStatement(Identifier("y2")),
+        CompoundStatement([ExpressionStatement(Identifier("y")), ExpressionStatement(Identifier("y2"))]),
+        ReturnStatement(Constant(2)),
+    ])
+
+
+def test_transformer_keeps_declaration_pairs_as_tuples():
+    tree = parse("int f() { int a = 1 + 1; return a; }")
+    DropAndSplice().visit(tree)
+    declaration = tree.external_declarations[0].body.items[0]
+    (declarator, init), = declaration.init_declarators
+    assert declaration.init_declarators[0].__class__ is tuple
+    assert init == Constant(2)
+
+
+def test_compare_false_fields_are_not_children():
+    assert child_fields(BinaryOp) == ("left", "right")
+    assert child_fields(Identifier) == ()
+    assert child_fields(FunctionDefinition) == ("declarator", "body")
+    tree = parse("int f() { return 3; }")
+    fn = tree.external_declarations[0]
+    # an annotation that happens to hold a node is still not walked
+    fn.frame = Constant(99)
+    leaves = Leaves()
+    leaves.visit(tree)
+    assert leaves.seen == [3]
+
+
+class Counts(Analysis):
+    def __init__(self):
+        self.counts = {}
+
+    def visit_Node(self, node):
+        name = node.__class__.__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def result(self):
+        return self.counts
+
+
+class Order(Analysis):
+    def __init__(self):
+        self.events = []
+
+    def visit_Identifier(self, node):
+        self.events.append(node.name)
+
+    def visit_BinaryOp(self, node):
+        self.events.append(f"enter {node.op}")
+
+    def leave_BinaryOp(self, node):
+        self.events.append(f"leave {node.op}")
+
+
+class LoopDepth(Analysis):
+    def __init__(self):
+        self.depth = self.deepest = 0
+
+    def visit_WhileStatement(self, node):
+        self.depth += 1
+        self.deepest = max(self.deepest, self.depth)
+
+    def leave_WhileStatement(self, node):
+        self.depth -= 1
+
+    visit_ForStatement = visit_WhileStatement
+    leave_ForStatement = leave_WhileStatement
+
+    def result(self):
+        return self.deepest
+
+
+def test_run_analyses_matches_running_each_analysis_alone():
+    tree = parse()
+    alone = [Counts().run(tree), Order().run(tree).events, LoopDepth().run(tree)]
+    counts, order, depth = run_analyses(tree, [Counts(), Order(), LoopDepth()])
+    assert [counts, order.events, depth] == alone
+    assert depth == 2
+    assert counts["ForStatement"] == counts["WhileStatement"] == 1
+    assert order.events[:4] == ["g", "f", "a", "b"]
+    assert order.events[-4:] == ["enter +", "s", "g", "leave +"]
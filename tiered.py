@@ -0,0 +1,767 @@
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import List
+
+from lexer import lexer
+from parser import (Parser, Declaration, CompoundStatement, IfStatement, WhileStatement, ForStatement,
+                    DoWhileStatement, SwitchStatement, CaseStatement, ReturnStatement,
+                    ExpressionStatement, BreakStatement, ContinueStatement, BinaryOp, UnaryOp, TernaryOp, Assignment, Call, Constant,
+                    Identifier, ArraySubscript, MemberAccess, c_div, c_mod, declarator_type, declares_function,
+                    evaluate_constant)
+from type_registry import (ScalarType, PointerType, ArrayType, FunctionType, FLOAT, is_integer, is_arithmetic,
+                           usual_arithmetic_conversion)
+from typecheck import decay, binary_result
+from interpreter import (Interpreter, CRuntimeError, Pointer, BREAK, RETURN, INTEGER_LIMITS, ASSIGN_OPS,
+                         add, sub, deref, convert, zero_value, string_buffer, int_div, int_mod,
+                         select_binary_op, unsigned_mask, operation_mask, to_float32)
+from memory import strides, load_element, element_lvalue
+
+
+@dataclass
+class Profile:
+    name: str
+    calls: int = 0
+    back_edges: int = 0
+    tier: int = 0
+
+
+@dataclass
+class TierEvent:
+    # one promotion decision: a whole function or a single loop entered mid-flight (OSR)
+    kind: str
+    name: str
+    calls: int
+    back_edges: int
+    compile_time: float
+    delegated: int = 0
+    source: str = field(default="", repr=False)
+
+
+def wrap(value, lo, hi):
+    return (value - lo) % (hi - lo + 1) + lo
+
+
+def store(lvalue, ctype, value):
+    base, key = lvalue
+    if ctype is not None:
+        value = convert(ctype, value)
+    base[key] = value
+    return value
+
+
+def incdec(lvalue, ctype, delta, post):
+    base, key = lvalue
+    old = base[key]
+    new = old + delta
+    if ctype is not None:
+        new = convert(ctype, new)
+    base[key] = new
+    return old if post else new
+
+
+def update(lvalue, ctype, op, value):
+    base, key = lvalue
+    value = op(base[key], value)
+    if ctype is not None:
+        value = convert(ctype, value)
+    base[key] = value
+    return value
+
+
+def address(lvalue, stride):
+    return Pointer(*lvalue, stride)
+
+
+def deref_lvalue(pointer):
+    if pointer.__class__ is Pointer:
+        return pointer.base, pointer.index
+    if isinstance(pointer, (list, array)):
+        return pointer, 0
+    raise CRuntimeError(f"cannot dereference {pointer!r}")
+
+
+COMPARISONS = {"==", "!=", "<", ">", "<=", ">="}
+PLAIN_INT_OPS = {"+", "-", "*", "&", "|", "^", "<<", ">>"}
+
+
+def integer_mask(op, left, right):
+    # the mask of an integer operation carried out in an unsigned type, or None
+    left, right = decay(left), decay(right)
+    if is_integer(left) and is_integer(right):
+        return operation_mask(op, left, right)
+    return None
+
+
+def unsigned_code(op, mask, left, right):
+    if op == "<<":
+        return f"(({left} << {right}) & {mask})"
+    if op == ">>":
+        return f"(({left} & {mask}) >> {right})"
+    if op in COMPARISONS:
+        return f"int(({left} & {mask}) {op} ({right} & {mask}))"
+    if op in ("/", "%"):
+        return f"(({left} & {mask}) {'//' if op == '/' else '%'} ({right} & {mask}))"
+    return f"(({left} {op} {right}) & {mask})"
+
+
+class PythonCompiler:
+    # translates a function (or one loop of it) into Python source working on the same
+    # frame lists as the tree-walking interpreter; anything not handled here is handed
+    # back to the interpreter for that subtree, so the translation never fails
+    def __init__(self, interp, layout):
+        self.interp = interp
+        self.layout = layout
+        self.lines = []
+        self.env = {
+            "interp": interp, "G": interp.globals, "call": interp.call_function,
+            "EV": interp.evaluate, "EX": interp.execute, "RETURN": RETURN, "BREAK": BREAK,
+            "add": add, "sub": sub, "deref": deref, "convert": convert,
+            "zero_value": zero_value, "c_div": c_div, "c_mod": c_mod, "int_div": int_div,
+            "int_mod": int_mod, "wrap": wrap, "store": store, "update": update, "incdec": incdec,
+            "load_element": load_element, "element_lvalue": element_lvalue, "address": address,
+            "deref_lvalue": deref_lvalue, "Pointer": Pointer, "to_float32": to_float32,
+        }
+        self.constants = {}
+        self.loops = []
+        self.temps = 0
+        self.delegated = 0
+        self.loop_mode = False
+
+    def constant(self, value):
+        key = id(value)
+        if key not in self.constants:
+            name = f"K{len(self.constants)}"
+            self.constants[key] = name
+            self.env[name] = value
+        return self.constants[key]
+
+    def temp(self):
+        self.temps += 1
+        return f"t{self.temps}"
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def build(self, name):
+        source = "\n".join([f"def {name}(frame):"] + (self.lines or ["    pass"])) + "\n"
+        code = compile(source, f"<tier1 {self.layout.name}>", "exec")
+        exec(code, self.env)
+        return self.env[name], source
+
+    def compile_function(self, fn):
+        self.statement(fn.body, 1)
+        return self.build(f"tier1_{self.layout.name}")
+
+    def compile_loop(self, node):
+        # the loop is entered after its init has run and with the condition still to check
+        self.loop_mode = True
+        if isinstance(node, ForStatement):
+            self.for_loop(node, 1, with_init=False)
+        else:
+            self.statement(node, 1)
+        self.emit(1, "return None")
+        return self.build(f"osr_{self.layout.name}")
+
+    # statements
+    def statement(self, node, depth):
+        cls = node.__class__
+        if cls is CompoundStatement:
+            start = len(self.lines)
+            for item in node.items:
+                self.statement(item, depth)
+            if len(self.lines) == start:
+                self.emit(depth, "pass")
+        elif cls is Declaration:
+            self.declaration(node, depth)
+        elif cls is ExpressionStatement:
+            if node.expr is not None:
+                self.expression_statement(node.expr, depth)
+            else:
+                self.emit(depth, "pass")
+        elif cls is IfStatement:
+            self.emit(depth, f"if {self.condition(node.cond)}:")
+            self.statement(node.then_stmt, depth + 1)
+            if node.else_stmt is not None:
+                self.emit(depth, "else:")
+                self.statement(node.else_stmt, depth + 1)
+        elif cls is WhileStatement:
+            self.emit(depth, f"while {self.condition(node.cond)}:")
+            self.loop_body(node.body, depth + 1, [])
+        elif cls is ForStatement:
+            self.for_loop(node, depth, with_init=True)
+        elif cls is DoWhileStatement:
+            cond = self.condition(node.cond)
+            self.emit(depth, "while True:")
+            self.loop_body(node.body, depth + 1, [f"if not ({cond}): break"])
+            self.emit(depth + 1, f"if not ({cond}): break")
+        elif cls is ReturnStatement:
+            value = "None" if node.expr is None else self.expression(node.expr)
+            self.return_value(value, depth)
+        elif cls is SwitchStatement and isinstance(node.body, CompoundStatement):
+            self.switch(node, depth)
+        elif cls is CaseStatement:
+            for item in node.body:
+                self.statement(item, depth)
+            if not node.body:
+                self.emit(depth, "pass")
+        elif cls is BreakStatement and self.loops:
+            self.emit(depth, "break")
+        elif cls is ContinueStatement and self.in_loop():
+            self.continue_code(depth)
+        else:
+            self.delegate_statement(node, depth)
+
+    def return_value(self, value, depth):
+        if self.loop_mode:
+            self.emit(depth, f"interp.return_value = {value}")
+            self.emit(depth, "return RETURN")
+        elif value == "None":
+            self.emit(depth, "return None")
+        else:
+            self.emit(depth, f"return convert({self.constant(self.layout.return_type)}, {value})")
+
+    def for_loop(self, node, depth, with_init):
+        if with_init and node.init is not None:
+            self.statement(node.init, depth)
+        cond = "True" if node.cond is None else self.condition(node.cond)
+        post = []
+        if node.post is not None:
+            start = len(self.lines)
+            self.expression_statement(node.post, 0)
+            post = self.lines[start:]
+            del self.lines[start:]
+        self.emit(depth, f"while {cond}:")
+        self.loop_body(node.body, depth + 1, post)
+        for line in post:
+            self.emit(depth + 1, line)
+
+    def loop_body(self, body, depth, before_continue):
+        self.loops.append(before_continue)
+        self.statement(body, depth)
+        self.loops.pop()
+
+    def in_loop(self):
+        return any(isinstance(target, list) for target in self.loops)
+
+    def continue_code(self, depth):
+        target = self.loops[-1]
+        if isinstance(target, str):
+            # inside a switch: leave it through its flag, the code after it continues the loop
+            self.emit(depth, f"{target} = True")
+            self.emit(depth, "break")
+            return
+        for line in target:
+            self.emit(depth, line)
+        self.emit(depth, "continue")
+
+    def switch(self, node, depth):
+        # the body runs inside a one-shot loop so that break leaves the switch; cases
+        # fall through because each one is entered whenever the start index allows it
+        items = node.body.items
+        cases, default = {}, len(items)
+        for i, item in enumerate(items):
+            if isinstance(item, CaseStatement):
+                if item.expr is None:
+                    default = i
+                else:
+                    cases.setdefault(evaluate_constant(item.expr, self.interp.types.enum_constants), i)
+        start, flag = self.temp(), self.temp()
+        self.emit(depth, f"{start} = {self.constant(cases)}.get({self.expression(node.cond)}, {default})")
+        self.emit(depth, f"{flag} = False")
+        self.emit(depth, "while True:")
+        self.loops.append(flag)
+        for i, item in enumerate(items):
+            self.emit(depth + 1, f"if {start} <= {i}:")
+            self.statement(item, depth + 2)
+        self.emit(depth + 1, "break")
+        self.loops.pop()
+        if self.in_loop():
+            self.emit(depth, f"if {flag}:")
+            self.continue_code(depth + 1)
+
+    def delegate_statement(self, node, depth):
+        # statements not translated here run on the interpreter; its signals are mapped back to Python
+        self.delegated += 1
+        signal = self.temp()
+        self.emit(depth, f"{signal} = EX({self.constant(node)}, frame)")
+        self.emit(depth, f"if {signal} is not None:")
+        if self.loop_mode:
+            self.emit(depth + 1, f"if {signal} is RETURN: return RETURN")
+        else:
+            self.emit(depth + 1, f"if {signal} is RETURN: return interp.take_return()")
+        if self.loops:
+            self.emit(depth + 1, f"if {signal} is BREAK: break")
+            if self.in_loop():
+                self.continue_code(depth + 1)
+
+    def declaration(self, node, depth):
+        if "typedef" in node.specifiers:
+            return
+        base = None
+        for dec, init in node.init_declarators:
+            ident = dec.direct_decl
+            if declares_function(dec) or ident is None or ident.slot is None:
+                continue
+            ctype = self.layout.types[ident.slot]
+            if init is None:
+                if isinstance(ctype, ScalarType):
+                    self.emit(depth, f"frame[{ident.slot}] = {0.0 if ctype.is_float else 0}")
+                else:
+                    self.emit(depth, f"frame[{ident.slot}] = zero_value({self.constant(ctype)})")
+            elif isinstance(ctype, ScalarType):
+                self.store_statement(f"frame[{ident.slot}]", ctype, init.ctype, self.expression(init), depth)
+            else:
+                if base is None:
+                    base = self.interp.types.from_specifiers(node.specifiers)
+                ctype = declarator_type(self.interp.types, base, dec)
+                self.emit(depth, f"frame[{ident.slot}] = convert({self.constant(ctype)}, {self.expression(init)})")
+
+    def store_statement(self, target, ctype, value_type, value, depth):
+        value_type = decay(value_type)
+        if isinstance(ctype, ScalarType) and ctype.is_float:
+            if ctype.size == 4:
+                self.emit(depth, f"{target} = to_float32({value})")
+            elif value_type is not None and is_arithmetic(value_type) and value_type.is_float:
+                self.emit(depth, f"{target} = {value}")
+            else:
+                self.emit(depth, f"{target} = float({value})")
+        elif ctype in INTEGER_LIMITS and value_type is not None and is_integer(value_type):
+            lo, hi = INTEGER_LIMITS[ctype]
+            t = self.temp()
+            self.emit(depth, f"{t} = {value}")
+            self.emit(depth, f"if not {lo} <= {t} <= {hi}: {t} = wrap({t}, {lo}, {hi})")
+            self.emit(depth, f"{target} = {t}")
+        else:
+            self.emit(depth, f"{target} = convert({self.constant(ctype)}, {value})")
+
+    def expression_statement(self, node, depth):
+        cls = node.__class__
+        if cls is Assignment and isinstance(node.left, Identifier):
+            target, ctype = self.variable(node.left)
+            if target is not None:
+                if node.op == "ASSIGN":
+                    value, value_type = self.expression(node.right), node.right.ctype
+                else:
+                    op = ASSIGN_OPS[node.op]
+                    left_type, right_type = decay(node.left.ctype), decay(node.right.ctype)
+                    value = self.binary_code(op, left_type, right_type, target, self.expression(node.right))
+                    value_type = binary_result(op, left_type, right_type) if left_type and right_type else None
+                self.store_statement(target, ctype, value_type, value, depth)
+                return
+        if cls is UnaryOp and node.op in ("++pre", "--pre", "++post", "--post") and isinstance(node.operand, Identifier):
+            target, ctype = self.variable(node.operand)
+            if target is not None and isinstance(ctype, ScalarType):
+                sign = "+" if node.op[0] == "+" else "-"
+                self.store_statement(target, ctype, ctype, f"{target} {sign} 1", depth)
+                return
+        if cls is Assignment and node.left.__class__ is ArraySubscript and isinstance(node.left.ctype, ScalarType):
+            element = self.flat_element(node.left)
+            if element is not None:
+                self.element_store(node, element, depth)
+                return
+        self.emit(depth, self.expression(node))
+
+    def element_store(self, node, element, depth):
+        # a[i][j] op= value straight on the flat buffer, with the offset computed once
+        base, offset, _ = element
+        ctype = node.left.ctype
+        if node.op == "ASSIGN":
+            self.store_statement(f"{base}[{offset}]", ctype, node.right.ctype, self.expression(node.right), depth)
+            return
+        t = self.temp()
+        self.emit(depth, f"{t} = {offset}")
+        target = f"{base}[{t}]"
+        op = ASSIGN_OPS[node.op]
+        right_type = decay(node.right.ctype)
+        value = self.binary_code(op, ctype, right_type, target, self.expression(node.right))
+        value_type = binary_result(op, ctype, right_type) if right_type else None
+        self.store_statement(target, ctype, value_type, value, depth)
+
+    def variable(self, ident):
+        if ident.slot is not None:
+            return f"frame[{ident.slot}]", self.layout.types[ident.slot]
+        name = ident.symbol or ident.name
+        if name in self.interp.globals:
+            return f"G[{name!r}]", self.interp.global_types[name]
+        return None, None
+
+    # expressions
+    def condition(self, node):
+        cls = node.__class__
+        if cls is BinaryOp:
+            if node.op == "&&":
+                return f"({self.condition(node.left)} and {self.condition(node.right)})"
+            if node.op == "||":
+                return f"({self.condition(node.left)} or {self.condition(node.right)})"
+            if node.op in COMPARISONS:
+                left, right = self.expression(node.left), self.expression(node.right)
+                mask = integer_mask(node.op, node.left.ctype, node.right.ctype)
+                if mask is not None:
+                    left, right = f"({left} & {mask})", f"({right} & {mask})"
+                return f"({left} {node.op} {right})"
+        if cls is UnaryOp and node.op == "!":
+            return f"(not {self.condition(node.operand)})"
+        return self.expression(node)
+
+    def binary_code(self, op, left_type, right_type, left, right):
+        left_type, right_type = decay(left_type), decay(right_type)
+        if op in ("+", "-") and (isinstance(left_type, PointerType) or isinstance(right_type, PointerType)):
+            return f"{self.constant(select_binary_op(op, left_type, right_type))}({left}, {right})"
+        if is_integer(left_type) and is_integer(right_type):
+            mask = operation_mask(op, left_type, right_type)
+            if mask is not None:
+                return unsigned_code(op, mask, left, right)
+            if op in PLAIN_INT_OPS:
+                return f"({left} {op} {right})"
+            if op == "/":
+                return f"int_div({left}, {right})"
+            if op == "%":
+                return f"int_mod({left}, {right})"
+        elif is_arithmetic(left_type) and is_arithmetic(right_type):
+            if op in ("+", "-", "*", "/"):
+                if usual_arithmetic_conversion(left_type, right_type) == FLOAT:
+                    return f"to_float32({left} {op} {right})"
+                return f"({left} {op} {right})"
+        if op in COMPARISONS:
+            return f"int({left} {op} {right})"
+        if op == "+":
+            return f"add({left}, {right})"
+        if op == "-":
+            return f"sub({left}, {right})"
+        if op == "/":
+            return f"c_div({left}, {right})"
+        if op == "%":
+            return f"c_mod({left}, {right})"
+        return f"({left} {op} {right})"
+
+    def expression(self, node):
+        cls = node.__class__
+        if cls is Constant:
+            value = node.value
+            if value.__class__ is str:
+                if value.startswith("'"):
+                    return repr(evaluate_constant(node))
+                if value.startswith('"'):
+                    return self.constant(string_buffer(value))
+                return self.delegate(node)
+            return repr(value)
+        if cls is Identifier:
+            if node.slot is not None:
+                return f"frame[{node.slot}]"
+            if (node.symbol or node.name) in self.interp.globals:
+                return f"G[{node.symbol or node.name!r}]"
+            if node.name in self.interp.types.enum_constants and node.name not in self.interp.functions:
+                return repr(self.interp.types.enum_constants[node.name])
+            return self.delegate(node)
+        if cls is BinaryOp:
+            if node.op in ("&&", "||") or node.op in COMPARISONS:
+                return f"(1 if {self.condition(node)} else 0)"
+            return self.binary_code(node.op, node.left.ctype, node.right.ctype,
+                                    self.expression(node.left), self.expression(node.right))
+        if cls is UnaryOp:
+            return self.unary(node)
+        if cls is TernaryOp:
+            value = f"({self.expression(node.if_true)} if {self.condition(node.cond)} else {self.expression(node.if_false)})"
+            return f"convert({self.constant(node.ctype)}, {value})" if node.converts else value
+        if cls is Assignment:
+            lvalue = self.lvalue(node.left)
+            if lvalue is None:
+                return self.delegate(node)
+            pair, ctype = lvalue
+            if node.op == "ASSIGN":
+                return f"store({pair}, {ctype}, {self.expression(node.right)})"
+            op = self.constant(select_binary_op(ASSIGN_OPS[node.op], node.left.ctype, node.right.ctype))
+            return f"update({pair}, {ctype}, {op}, {self.expression(node.right)})"
+        if cls is Call:
+            return self.call(node)
+        if cls is ArraySubscript:
+            element = self.flat_element(node)
+            if element is not None:
+                base, offset, rest = element
+                return f"Pointer({base}, {offset}, {rest})" if rest else f"{base}[{offset}]"
+            stride = self.constant(strides(node.array.ctype))
+            return f"load_element({self.expression(node.array)}, {self.expression(node.index)}, {stride})"
+        if cls is MemberAccess and node.index is not None:
+            target = self.expression(node.target)
+            value = f"deref({target})[{node.index}]" if node.arrow else f"{target}[{node.index}]"
+            return f"convert({self.constant(node.ctype)}, {value})" if node.shared else value
+        return self.delegate(node)
+
+    def unary(self, node):
+        op = node.op
+        if op in ("++pre", "--pre", "++post", "--post"):
+            lvalue = self.lvalue(node.operand)
+            if lvalue is None:
+                return self.delegate(node)
+            pair, ctype = lvalue
+            delta = 1 if op[0] == "+" else -1
+            return f"incdec({pair}, {ctype}, {delta}, {op.endswith('post')})"
+        if op == "&":
+            lvalue = self.lvalue(node.operand)
+            if lvalue is None or isinstance(node.operand.ctype, (ArrayType, FunctionType)):
+                return self.delegate(node)
+            return f"address({lvalue[0]}, {self.constant(strides(node.ctype))})"
+        if op == "!":
+            return f"(0 if {self.condition(node.operand)} else 1)"
+        value = self.expression(node.operand)
+        mask = unsigned_mask(node.ctype)
+        if op == "-u":
+            return f"(-{value})" if mask is None else f"(-{value} & {mask})"
+        if op == "+u":
+            return value
+        if op == "~":
+            return f"(~{value})" if mask is None else f"(~{value} & {mask})"
+        if op == "*" and not isinstance(node.ctype, ArrayType):
+            return f"deref({value})"
+        return self.delegate(node)
+
+    def flat_element(self, node):
+        # (buffer, offset, remaining strides) as Python source for a subscript chain rooted
+        # at a local array, so m[i][j] indexes the flat buffer directly; None otherwise
+        array = node.array
+        if array.__class__ is Identifier and isinstance(array.ctype, ArrayType):
+            if array.slot is not None:
+                base = f"frame[{array.slot}]"
+            elif (array.symbol or array.name) in self.interp.globals:
+                # a global array is never rebound, so its buffer can be a constant
+                base = self.constant(self.interp.globals[array.symbol or array.name])
+            else:
+                return None
+            offset, stride = None, strides(array.ctype)
+        elif array.__class__ is ArraySubscript and isinstance(array.ctype, ArrayType):
+            inner = self.flat_element(array)
+            if inner is None or not inner[2]:
+                return None
+            base, offset, stride = inner
+        else:
+            return None
+        index = self.expression(node.index)
+        term = index if stride[0] == 1 else f"({index}) * {stride[0]}"
+        return base, term if offset is None else f"{offset} + {term}", stride[1:]
+
+    def element_type(self, node):
+        return self.constant(node.ctype) if isinstance(node.ctype, ScalarType) else "None"
+
+    def lvalue(self, node):
+        # a (container, key) pair as Python source, plus the type used to convert stores;
+        # like the interpreter, every store to a scalar lvalue is converted
+        cls = node.__class__
+        if cls is Identifier:
+            if node.slot is not None:
+                return f"(frame, {node.slot})", self.constant(self.layout.types[node.slot])
+            name = node.symbol or node.name
+            if name in self.interp.globals:
+                return f"(G, {name!r})", self.constant(self.interp.global_types[name])
+            return None
+        if cls is ArraySubscript:
+            element = self.flat_element(node)
+            if element is not None:
+                return f"({element[0]}, {element[1]})", self.element_type(node)
+            stride = self.constant(strides(node.array.ctype))
+            return (f"element_lvalue({self.expression(node.array)}, {self.expression(node.index)}, {stride})",
+                    self.element_type(node))
+        if cls is MemberAccess and node.index is not None:
+            target = self.expression(node.target)
+            return f"({f'deref({target})' if node.arrow else target}, {node.index})", self.element_type(node)
+        if cls is UnaryOp and node.op == "*":
+            return f"deref_lvalue({self.expression(node.operand)})", self.element_type(node)
+        return None
+
+    def call(self, node):
+        func = node.func
+        if func.__class__ is Identifier and func.slot is None and func.symbol is None:
+            fn = self.interp.functions.get(func.name)
+            if fn is not None:
+                return f"call({self.constant(fn)}, [{', '.join(self.expression(arg) for arg in node.args)}])"
+            builtin = self.interp.builtins.get(func.name)
+            if builtin is not None:
+                return self.builtin_call(node, builtin)
+        return self.delegate(node)
+
+    def builtin_call(self, node, builtin):
+        impl, args = self.interp.bind_builtin(node, builtin)
+        return f"{self.constant(impl)}({', '.join(self.expression(arg) for arg in args)})"
+
+    def delegate(self, node):
+        self.delegated += 1
+        return f"EV({self.constant(node)}, frame)"
+
+
+class TieredInterpreter(Interpreter):
+    def __init__(self, tu, builtins=None, call_threshold=1000, loop_threshold=1000, specialize=True):
+        super().__init__(tu, builtins, specialize)
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        self.profiles = {name: Profile(name) for name in self.functions}
+        self.compiled = {}
+        self.loop_code = {}
+        self.loop_counts = {}
+        self.events: List[TierEvent] = []
+
+    def call_function(self, fn, args):
+        layout = fn.frame
+        name = layout.name
+        code = self.compiled.get(name)
+        if code is None:
+            profile = self.profiles[name]
+            profile.calls += 1
+            if profile.calls + profile.back_edges > self.call_threshold:
+                code = self.promote(fn)
+            else:
+                return Interpreter.call_function(self, fn, args)
+
+        count = layout.param_count
+        if len(args) != count and not (layout.variadic and len(args) > count):
+            raise CRuntimeError(f"{name} expects {count} argument(s), got {len(args)}")
+        frame = [None] * layout.size
+        types = layout.types
+        for i in range(count):
+            frame[i] = convert(types[i], args[i])
+        previous = self.layout
+        self.layout = layout
+        try:
+            return code(frame)
+        except ZeroDivisionError:
+            raise CRuntimeError("division by zero") from None
+        finally:
+            self.layout = previous
+
+    def promote(self, fn):
+        profile = self.profiles[fn.frame.name]
+        start = time.perf_counter()
+        compiler = PythonCompiler(self, fn.frame)
+        code, source = compiler.compile_function(fn)
+        elapsed = time.perf_counter() - start
+        self.compiled[fn.frame.name] = code
+        profile.tier = 1
+        self.events.append(TierEvent("function", profile.name, profile.calls, profile.back_edges,
+                                     elapsed, compiler.delegated, source))
+        return code
+
+    def promote_loop(self, node):
+        profile = self.profiles[self.layout.name]
+        start = time.perf_counter()
+        compiler = PythonCompiler(self, self.layout)
+        code, source = compiler.compile_loop(node)
+        elapsed = time.perf_counter() - start
+        self.loop_code[id(node)] = code
+        self.events.append(TierEvent("loop", profile.name, profile.calls, self.loop_counts[id(node)],
+                                     elapsed, compiler.delegated, source))
+        return code
+
+    def back_edges(self, node, count):
+        key = id(node)
+        self.loop_counts[key] = self.loop_counts.get(key, 0) + count
+        self.profiles[self.layout.name].back_edges += count
+        return self.loop_counts[key] >= self.loop_threshold
+
+    def run_compiled_loop(self, code, frame):
+        try:
+            return code(frame)
+        except ZeroDivisionError:
+            raise CRuntimeError("division by zero") from None
+
+    # tier 0 loops count their back-edges and jump into compiled code once hot
+    def exec_while(self, node, frame):
+        code = self.loop_code.get(id(node))
+        if code is not None:
+            return self.run_compiled_loop(code, frame)
+        evaluate, execute = self.evaluate, self.execute
+        cond, body = node.cond, node.body
+        limit = self.loop_threshold - self.loop_counts.get(id(node), 0)
+        count = 0
+        while evaluate(cond, frame):
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                self.back_edges(node, count)
+                return signal
+            count += 1
+            if count >= limit:
+                self.back_edges(node, count)
+                return self.run_compiled_loop(self.promote_loop(node), frame)
+        self.back_edges(node, count)
+        return None
+
+    def exec_do_while(self, node, frame):
+        code = self.loop_code.get(id(node))
+        if code is not None:
+            return self.run_compiled_loop(code, frame)
+        evaluate, execute = self.evaluate, self.execute
+        cond, body = node.cond, node.body
+        limit = self.loop_threshold - self.loop_counts.get(id(node), 0)
+        count = 0
+        while True:
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                self.back_edges(node, count)
+                return signal
+            if not evaluate(cond, frame):
+                break
+            count += 1
+            if count >= limit:
+                self.back_edges(node, count)
+                return self.run_compiled_loop(self.promote_loop(node), frame)
+        self.back_edges(node, count)
+        return None
+
+    def exec_for(self, node, frame):
+        evaluate, execute = self.evaluate, self.execute
+        if node.init is not None:
+            execute(node.init, frame)
+        code = self.loop_code.get(id(node))
+        if code is not None:
+            return self.run_compiled_loop(code, frame)
+        cond, post, body = node.cond, node.post, node.body
+        limit = self.loop_threshold - self.loop_counts.get(id(node), 0)
+        count = 0
+        while cond is None or evaluate(cond, frame):
+            signal = execute(body, frame)
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                self.back_edges(node, count)
+                return signal
+            if post is not None:
+                evaluate(post, frame)
+            count += 1
+            if count >= limit:
+                self.back_edges(node, count)
+                return self.run_compiled_loop(self.promote_loop(node), frame)
+        self.back_edges(node, count)
+        return None
+
+    def report(self):
+        lines = [f"{'TIPO':<9} | {'FUNÇÃO':<16} | {'CHAMADAS':>8} | {'BACK-EDGES':>10} | {'COMPILAÇÃO':>10} | DELEGADOS"]
+        for event in self.events:
+            lines.append(f"{event.kind:<9} | {event.name:<16} | {event.calls:>8} | {event.back_edges:>10} | "
+                         f"{event.compile_time * 1000:>7.2f} ms | {event.delegated}")
+        cold = [p.name for p in self.profiles.values() if p.tier == 0]
+        lines.append(f"tier 0: {', '.join(cold) or '-'}")
+        return "\n".join(lines)
+
+
+def run_source(code, entry="main", builtins=None, **thresholds):
+    interp = TieredInterpreter(Parser(lexer(code)).parse(), builtins, **thresholds)
+    return interp.run(entry), interp
+
+
+def main(argv):
+    if not argv:
+        print("uso: tiered.py ARQUIVO.c [--limite N] [--relatorio]")
+        return 1
+    threshold = int(argv[argv.index("--limite") + 1]) if "--limite" in argv else 1000
+    with open(argv[0], encoding="utf-8") as f:
+        result, interp = run_source(f.read(), call_threshold=threshold, loop_threshold=threshold)
+    if "--relatorio" in argv:
+        print(interp.report(), file=sys.stderr)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
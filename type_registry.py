@@ -0,0 +1,277 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+class CType:
+    size = 0
+    align = 1
+
+
+@dataclass(frozen=True)
+class ScalarType(CType):
+    name: str
+    size: int
+    align: int
+    is_float: bool = False
+    signed: bool = True
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True)
+class PointerType(CType):
+    target: CType
+    size = 8
+    align = 8
+
+    def __str__(self):
+        return f"{self.target}*"
+
+
+@dataclass(frozen=True)
+class ArrayType(CType):
+    element: CType
+    length: Optional[int]
+
+    @property
+    def size(self):
+        return self.element.size * (self.length or 0)
+
+    @property
+    def align(self):
+        return self.element.align
+
+    def __str__(self):
+        return f"{self.element}[{'' if self.length is None else self.length}]"
+
+
+@dataclass
+class Field:
+    name: str
+    ctype: CType
+    offset: int
+    index: int
+
+
+@dataclass(eq=False)
+class AggregateType(CType):
+    kind: str
+    tag: str
+    members: Optional[List[Tuple[str, CType]]] = None
+    _layout: Optional[Tuple[Dict[str, Field], int, int]] = field(default=None, repr=False)
+
+    @property
+    def complete(self):
+        return self.members is not None
+
+    def layout(self):
+        if self._layout is None:
+            if self.members is None:
+                raise TypeError(f"{self} is incomplete")
+            fields = {}
+            offset = size = 0
+            align = 1
+            for index, (name, ctype) in enumerate(self.members):
+                align = max(align, ctype.align)
+                if self.kind == "union":
+                    fields[name] = Field(name, ctype, 0, 0)
+                    size = max(size, ctype.size)
+                else:
+                    offset = align_up(offset, ctype.align)
+                    fields[name] = Field(name, ctype, offset, index)
+                    offset += ctype.size
+                    size = offset
+            self._layout = (fields, align_up(size, align), align)
+        return self._layout
+
+    @property
+    def fields(self):
+        return self.layout()[0]
+
+    @property
+    def size(self):
+        return self.layout()[1]
+
+    @property
+    def align(self):
+        return self.layout()[2]
+
+    @property
+    def slots(self):
+        # number of value slots an instance occupies: a union shares one
+        return 1 if self.kind == "union" else len(self.members)
+
+    def member(self, name):
+        try:
+            return self.fields[name]
+        except KeyError:
+            raise TypeError(f"{self} has no member named '{name}'") from None
+
+    def __str__(self):
+        return f"{self.kind} {self.tag}"
+
+
+@dataclass(eq=False)
+class EnumType(CType):
+    tag: str
+    constants: Dict[str, int] = field(default_factory=dict)
+    size = 4
+    align = 4
+
+    def __str__(self):
+        return f"enum {self.tag}"
+
+
+@dataclass(frozen=True)
+class FunctionType(CType):
+    return_type: CType
+    params: Tuple[CType, ...] = ()
+    variadic: bool = False
+
+    def __str__(self):
+        params = ", ".join(str(p) for p in self.params) + (", ..." if self.variadic else "")
+        return f"{self.return_type}({params})"
+
+
+VOID = ScalarType("void", 0, 1)
+CHAR = ScalarType("char", 1, 1)
+SHORT = ScalarType("short", 2, 2)
+INT = ScalarType("int", 4, 4)
+LONG = ScalarType("long", 8, 8)
+LONGLONG = ScalarType("long long", 8, 8)
+UCHAR = ScalarType("unsigned char", 1, 1, signed=False)
+USHORT = ScalarType("unsigned short", 2, 2, signed=False)
+UINT = ScalarType("unsigned int", 4, 4, signed=False)
+ULONG = ScalarType("unsigned long", 8, 8, signed=False)
+ULONGLONG = ScalarType("unsigned long long", 8, 8, signed=False)
+FLOAT = ScalarType("float", 4, 4, is_float=True)
+DOUBLE = ScalarType("double", 8, 8, is_float=True)
+LONGDOUBLE = ScalarType("long double", 16, 16, is_float=True)
+
+INTEGER_BY_NAME = {
+    ("char", True): CHAR, ("short", True): SHORT, ("int", True): INT,
+    ("long", True): LONG, ("long long", True): LONGLONG,
+    ("char", False): UCHAR, ("short", False): USHORT, ("int", False): UINT,
+    ("long", False): ULONG, ("long long", False): ULONGLONG,
+}
+
+QUALIFIERS = {"typedef", "static", "extern", "auto", "register", "const", "volatile"}
+
+INTEGER_RANK = {"char": 1, "short": 2, "int": 3, "long": 4, "long long": 5}
+
+
+def is_integer(ctype):
+    return (isinstance(ctype, ScalarType) and not ctype.is_float and ctype.size > 0) or isinstance(ctype, EnumType)
+
+
+def is_arithmetic(ctype):
+    return is_integer(ctype) or (isinstance(ctype, ScalarType) and ctype.is_float)
+
+
+def is_scalar(ctype):
+    return is_arithmetic(ctype) or isinstance(ctype, (PointerType, ArrayType, FunctionType))
+
+
+def integer_rank(ctype):
+    return INTEGER_RANK[ctype.name.replace("unsigned ", "")]
+
+
+def integer_promotion(ctype):
+    if isinstance(ctype, EnumType):
+        return INT
+    if is_integer(ctype) and integer_rank(ctype) < INTEGER_RANK["int"]:
+        return INT
+    return ctype
+
+
+def usual_arithmetic_conversion(left, right):
+    for ctype in (LONGDOUBLE, DOUBLE, FLOAT):
+        if left == ctype or right == ctype:
+            return ctype
+    left, right = integer_promotion(left), integer_promotion(right)
+    if left == right:
+        return left
+    if left.signed == right.signed:
+        return left if integer_rank(left) >= integer_rank(right) else right
+    signed, unsigned = (left, right) if left.signed else (right, left)
+    if integer_rank(unsigned) >= integer_rank(signed):
+        return unsigned
+    if signed.size > unsigned.size:
+        return signed
+    return INTEGER_BY_NAME[(signed.name, False)]
+
+
+def align_up(offset, align):
+    return (offset + align - 1) // align * align
+
+
+class TypeRegistry:
+    def __init__(self):
+        self.aggregates: Dict[Tuple[str, str], AggregateType] = {}
+        self.enums: Dict[str, EnumType] = {}
+        self.enum_constants: Dict[str, int] = {}
+        self._anonymous = 0
+
+    def anonymous_tag(self):
+        self._anonymous += 1
+        return f"__anon{self._anonymous}"
+
+    def aggregate(self, kind, tag):
+        key = (kind, tag)
+        if key not in self.aggregates:
+            self.aggregates[key] = AggregateType(kind, tag)
+        return self.aggregates[key]
+
+    def define_aggregate(self, kind, tag, members):
+        aggregate = self.aggregate(kind, tag)
+        if aggregate.complete:
+            raise TypeError(f"redefinition of {aggregate}")
+        names = [name for name, _ in members]
+        if len(set(names)) != len(names):
+            raise TypeError(f"duplicate member in {aggregate}")
+        aggregate.members = list(members)
+        return aggregate
+
+    def enum(self, tag):
+        if tag not in self.enums:
+            self.enums[tag] = EnumType(tag)
+        return self.enums[tag]
+
+    def define_enum(self, tag, constants):
+        enum = self.enum(tag)
+        enum.constants.update(constants)
+        self.enum_constants.update(constants)
+        return enum
+
+    def from_specifiers(self, specifiers):
+        words = [w for w in specifiers if w not in QUALIFIERS]
+        for keyword in ("struct", "union"):
+            if keyword in words:
+                return self.aggregate(keyword, words[words.index(keyword) + 1])
+        if "enum" in words:
+            return self.enum(words[words.index("enum") + 1])
+
+        signed = "unsigned" not in words
+        longs = words.count("long")
+        if "void" in words:
+            return VOID
+        if "float" in words:
+            return FLOAT
+        if "double" in words:
+            return LONGDOUBLE if longs else DOUBLE
+        if "char" in words:
+            return INTEGER_BY_NAME[("char", signed)]
+        if "short" in words:
+            return INTEGER_BY_NAME[("short", signed)]
+        if longs:
+            return INTEGER_BY_NAME[("long long" if longs > 1 else "long", signed)]
+        return INTEGER_BY_NAME[("int", signed)]
+
+    def derive(self, base, pointer=0, dims=()):
+        ctype = base
+        for _ in range(pointer):
+            ctype = PointerType(ctype)
+        for length in reversed(dims):
+            ctype = ArrayType(ctype, length)
+        return ctype
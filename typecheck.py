@@ -0,0 +1,372 @@
+import sys
+from dataclasses import fields
+
+from lexer import lexer
+from parser import (Parser, Node, TranslationUnit, FunctionDefinition, Declaration, CompoundStatement,
+                    ForStatement, IfStatement, WhileStatement, DoWhileStatement, SwitchStatement,
+                    ReturnStatement, Identifier, Constant, BinaryOp, UnaryOp, TernaryOp, Assignment,
+                    Call, ArraySubscript, MemberAccess, declarator_type, innermost)
+from type_registry import (AggregateType, ScalarType, ArrayType, PointerType, FunctionType, INT, LONG, CHAR, DOUBLE,
+                           VOID, is_integer, is_arithmetic, is_scalar, integer_promotion,
+                           usual_arithmetic_conversion)
+
+
+class TypeCheckError(Exception):
+    pass
+
+
+COMPARISON_OPS = {"==", "!=", "<", ">", "<=", ">="}
+INTEGER_OPS = {"%", "&", "|", "^"}
+SHIFT_OPS = {"<<", ">>"}
+ASSIGN_OPS = {
+    "PLUS_ASSIGN": "+", "MINUS_ASSIGN": "-", "MUL_ASSIGN": "*", "DIV_ASSIGN": "/", "MOD_ASSIGN": "%",
+    "BIT_AND_ASSIGN": "&", "BIT_OR_ASSIGN": "|", "BIT_XOR_ASSIGN": "^",
+    "SHIFT_LEFT_ASSIGN": "<<", "SHIFT_RIGHT_ASSIGN": ">>",
+}
+INT_MAX = 2**31 - 1
+
+
+class TypeChecker:
+    # every expression node gets its C type in node.ctype; None means the type is
+    # unknown (e.g. an implicitly declared function) and is never reported as an error
+    def __init__(self, types):
+        self.types = types
+        self.scopes = [{}]
+        self.return_type = None
+        self.rules = {
+            Identifier: self.type_identifier,
+            Constant: self.type_constant,
+            BinaryOp: self.type_binary,
+            UnaryOp: self.type_unary,
+            TernaryOp: self.type_ternary,
+            Assignment: self.type_assignment,
+            Call: self.type_call,
+            ArraySubscript: self.type_subscript,
+            MemberAccess: self.member_type,
+        }
+
+    def declare(self, name, ctype):
+        self.scopes[-1][name] = ctype
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        if name in self.types.enum_constants:
+            return INT
+        return None
+
+    def check(self, node):
+        if isinstance(node, (list, tuple)):
+            for item in node:
+                self.check(item)
+            return
+        if not isinstance(node, Node):
+            return
+
+        if isinstance(node, TranslationUnit):
+            self.check(node.external_declarations)
+        elif isinstance(node, FunctionDefinition):
+            base = self.types.from_specifiers(node.specifiers)
+            declarator = node.declarator
+            ftype = self.declarator_type(base, declarator)
+            if declarator and declarator.direct_decl:
+                self.declare(declarator.direct_decl.name, ftype)
+            self.scopes.append({})
+            for param in (innermost(declarator).params if declarator else None) or []:
+                if param.declarator is not None and param.declarator.direct_decl is not None:
+                    ctype = self.declarator_type(self.types.from_specifiers(param.specifiers), param.declarator)
+                    self.declare(param.declarator.direct_decl.name, decay(ctype))
+            previous = self.return_type
+            self.return_type = ftype.return_type if isinstance(ftype, FunctionType) else ftype
+            self.check(node.body.items)
+            self.return_type = previous
+            self.scopes.pop()
+        elif isinstance(node, Declaration):
+            base = self.types.from_specifiers(node.specifiers)
+            for dec, init in node.init_declarators:
+                ctype = self.declarator_type(base, dec) if dec.direct_decl is not None else None
+                if init is not None:
+                    value = self.expr_type(init)
+                    if ctype is not None and not isinstance(ctype, (ArrayType, AggregateType)):
+                        self.check_assignable(ctype, value, init, f"initialization of '{dec.direct_decl.name}'")
+                if dec.direct_decl is not None:
+                    self.declare(dec.direct_decl.name, ctype)
+        elif isinstance(node, CompoundStatement):
+            self.scopes.append({})
+            self.check(node.items)
+            self.scopes.pop()
+        elif isinstance(node, ForStatement):
+            self.scopes.append({})
+            self.check(node.init)
+            if node.cond is not None:
+                self.condition(node.cond)
+            if node.post is not None:
+                self.expr_type(node.post)
+            self.check(node.body)
+            self.scopes.pop()
+        elif isinstance(node, (IfStatement, WhileStatement, DoWhileStatement)):
+            self.condition(node.cond)
+            for f in fields(node):
+                if f.name != "cond":
+                    self.check(getattr(node, f.name))
+        elif isinstance(node, SwitchStatement):
+            ctype = self.expr_type(node.cond)
+            if ctype is not None and not is_integer(ctype):
+                raise TypeCheckError(f"switch quantity not an integer (have '{ctype}')")
+            self.check(node.body)
+        elif isinstance(node, ReturnStatement):
+            if node.expr is not None:
+                value = self.expr_type(node.expr)
+                if self.return_type == VOID:
+                    raise TypeCheckError("'return' with a value, in function returning void")
+                if self.return_type is not None:
+                    self.check_assignable(self.return_type, value, node.expr, "return")
+        elif type(node) in EXPRESSION_TYPES:
+            self.expr_type(node)
+        else:
+            for f in fields(node):
+                value = getattr(node, f.name)
+                if type(value) in EXPRESSION_TYPES:
+                    self.expr_type(value)
+                else:
+                    self.check(value)
+
+    def declarator_type(self, base, declarator):
+        return declarator_type(self.types, base, declarator)
+
+    def condition(self, node):
+        ctype = decay(self.expr_type(node))
+        if ctype is not None and not is_scalar(ctype):
+            raise TypeCheckError(f"used '{ctype}' value where scalar is required")
+
+    def check_assignable(self, target, value, node, context):
+        value = decay(value)
+        if target is None or value is None:
+            return
+        if is_arithmetic(target) and is_arithmetic(value):
+            return
+        if isinstance(target, PointerType) and (isinstance(value, PointerType) or is_integer(value)):
+            return
+        if is_integer(target) and isinstance(value, PointerType):
+            return
+        if target == value:
+            return
+        raise TypeCheckError(f"incompatible types in {context}: '{value}' to '{target}'")
+
+    # expressions
+    def expr_type(self, node):
+        rule = self.rules.get(node.__class__)
+        ctype = rule(node) if rule is not None else None
+        node.ctype = ctype
+        return ctype
+
+    def type_identifier(self, node):
+        ctype = self.lookup(node.name)
+        if ctype is None and not any(node.name in scope for scope in self.scopes):
+            raise TypeCheckError(f"'{node.name}' undeclared")
+        return ctype
+
+    def type_constant(self, node):
+        value = node.value
+        if isinstance(value, float):
+            return DOUBLE
+        if isinstance(value, int):
+            # the parser types integer literals from their suffix
+            return node.ctype or (INT if value <= INT_MAX else LONG)
+        if value.startswith("'"):
+            return INT
+        if value.startswith('"'):
+            return PointerType(CHAR)
+        return DOUBLE
+
+    def type_binary(self, node):
+        op = node.op
+        left = decay(self.expr_type(node.left))
+        right = decay(self.expr_type(node.right))
+        if op in ("&&", "||"):
+            for ctype in (left, right):
+                if ctype is not None and not is_scalar(ctype):
+                    raise TypeCheckError(f"used '{ctype}' value where scalar is required")
+            return INT
+        if left is None or right is None:
+            return None
+        return binary_result(op, left, right)
+
+    def type_unary(self, node):
+        op = node.op
+        operand = self.expr_type(node.operand)
+        if op == "&":
+            return PointerType(operand) if operand is not None else None
+        operand = decay(operand)
+        if operand is None:
+            return INT if op == "!" else None
+        if op == "*":
+            if not isinstance(operand, PointerType):
+                raise TypeCheckError(f"invalid type argument of unary '*' (have '{operand}')")
+            return operand.target
+        if op == "!":
+            if not is_scalar(operand):
+                raise TypeCheckError(f"wrong type argument to unary exclamation mark (have '{operand}')")
+            return INT
+        if op in ("-u", "+u"):
+            if not is_arithmetic(operand):
+                raise TypeCheckError(f"wrong type argument to unary {op[0]} (have '{operand}')")
+            return integer_promotion(operand)
+        if op == "~":
+            if not is_integer(operand):
+                raise TypeCheckError(f"wrong type argument to bit-complement (have '{operand}')")
+            return integer_promotion(operand)
+        # ++/-- keep the operand's type
+        if not is_scalar(operand):
+            raise TypeCheckError(f"wrong type argument to {op[:2]} (have '{operand}')")
+        return operand
+
+    def type_ternary(self, node):
+        self.condition(node.cond)
+        if_true = decay(self.expr_type(node.if_true))
+        if_false = decay(self.expr_type(node.if_false))
+        if if_true is not None and if_false is not None and is_arithmetic(if_true) and is_arithmetic(if_false):
+            ctype = usual_arithmetic_conversion(if_true, if_false)
+            node.converts = if_true != ctype or if_false != ctype
+            return ctype
+        return if_true if if_true is not None else if_false
+
+    def type_assignment(self, node):
+        left = self.expr_type(node.left)
+        right = self.expr_type(node.right)
+        if isinstance(left, ArrayType):
+            raise TypeCheckError("assignment to expression with array type")
+        if node.op == "ASSIGN":
+            self.check_assignable(left, right, node.right, "assignment")
+        elif left is not None and right is not None:
+            binary_result(ASSIGN_OPS[node.op], left, decay(right))
+        return left
+
+    def type_call(self, node):
+        if isinstance(node.func, Identifier) and self.lookup(node.func.name) is None:
+            # implicit declaration: int f(), but the result type is left unknown
+            for arg in node.args:
+                self.expr_type(arg)
+            return None
+        func = self.expr_type(node.func)
+        if isinstance(func, PointerType):
+            func = func.target
+        arg_types = [self.expr_type(arg) for arg in node.args]
+        if func is None:
+            return None
+        if not isinstance(func, FunctionType):
+            raise TypeCheckError(f"called object is not a function (have '{func}')")
+        name = node.func.name if isinstance(node.func, Identifier) else "function"
+        if func.params and not func.variadic and len(node.args) != len(func.params):
+            few = len(node.args) < len(func.params)
+            raise TypeCheckError(f"too {'few' if few else 'many'} arguments to function '{name}'")
+        if func.variadic and len(node.args) < len(func.params):
+            raise TypeCheckError(f"too few arguments to function '{name}'")
+        for i, (param, arg, ctype) in enumerate(zip(func.params, node.args, arg_types), 1):
+            self.check_assignable(param, ctype, arg, f"argument {i} of '{name}'")
+        return func.return_type
+
+    def type_subscript(self, node):
+        array = decay(self.expr_type(node.array))
+        index = decay(self.expr_type(node.index))
+        if isinstance(index, PointerType) and is_integer(array):
+            array, index = index, array
+        if array is None:
+            return None
+        if not isinstance(array, PointerType):
+            raise TypeCheckError(f"subscripted value is neither array nor pointer (have '{array}')")
+        if index is not None and not is_integer(index):
+            raise TypeCheckError(f"array subscript is not an integer (have '{index}')")
+        return array.target
+
+    def member_type(self, node):
+        target = self.expr_type(node.target)
+        if node.arrow:
+            target = pointee(target)
+        if target is None:
+            return None
+        if not isinstance(target, AggregateType):
+            raise TypeCheckError(f"request for member '{node.member}' in something not a structure or union ({target})")
+        try:
+            member = target.member(node.member)
+        except TypeError as e:
+            raise TypeCheckError(str(e)) from None
+        node.offset = member.offset
+        node.index = member.index
+        node.shared = target.kind == "union" and isinstance(member.ctype, ScalarType)
+        return member.ctype
+
+
+def binary_result(op, left, right):
+    if is_arithmetic(left) and is_arithmetic(right):
+        if op in COMPARISON_OPS:
+            return INT
+        if op in SHIFT_OPS:
+            if is_integer(left) and is_integer(right):
+                return integer_promotion(left)
+        elif op not in INTEGER_OPS or (is_integer(left) and is_integer(right)):
+            return usual_arithmetic_conversion(left, right)
+    elif op in COMPARISON_OPS:
+        if isinstance(left, PointerType) or isinstance(right, PointerType):
+            return INT
+    elif op == "+" and isinstance(left, PointerType) and is_integer(right):
+        return left
+    elif op == "+" and is_integer(left) and isinstance(right, PointerType):
+        return right
+    elif op == "-" and isinstance(left, PointerType):
+        if is_integer(right):
+            return left
+        if isinstance(right, PointerType):
+            return LONG
+    raise TypeCheckError(f"invalid operands to binary {op} (have '{left}' and '{right}')")
+
+
+def decay(ctype):
+    if isinstance(ctype, ArrayType):
+        return PointerType(ctype.element)
+    if isinstance(ctype, FunctionType):
+        return PointerType(ctype)
+    return ctype
+
+
+def pointee(ctype):
+    if isinstance(ctype, PointerType):
+        return ctype.target
+    if isinstance(ctype, ArrayType):
+        return ctype.element
+    return None
+
+
+EXPRESSION_TYPES = {Identifier, Constant, MemberAccess, ArraySubscript, UnaryOp, Call,
+                    Assignment, BinaryOp, TernaryOp}
+
+
+def check_types(tu):
+    TypeChecker(tu.types).check(tu)
+    return tu
+
+
+def resolve_members(tu):
+    return check_types(tu)
+
+
+def main(argv):
+    if not argv:
+        print("uso: typecheck.py ARQUIVOS...")
+        return 1
+    status = 0
+    for path in argv:
+        with open(path, encoding="utf-8") as f:
+            code = f.read()
+        try:
+            check_types(Parser(lexer(code)).parse())
+            print(f"{path}: ok")
+        except TypeCheckError as e:
+            print(f"ERRO DE TIPO em {path}: {e}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
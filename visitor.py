@@ -0,0 +1,156 @@
+import typing
+from dataclasses import fields
+from functools import lru_cache
+
+from parser import Node
+
+
+# field types that can never hold a node
+LEAF_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def holds_nodes(annotation):
+    args = typing.get_args(annotation)
+    if args:
+        return any(holds_nodes(arg) for arg in args)
+    return annotation not in LEAF_TYPES
+
+
+@lru_cache(maxsize=None)
+def child_fields(cls):
+    # the fields of a node class that can lead to other nodes, in declaration order; the
+    # annotations later passes attach (ctype, op_impl, frame, ... all compare=False) and
+    # plain data such as op, name or pointer are left out
+    return tuple(f.name for f in fields(cls) if f.compare and holds_nodes(f.type))
+
+
+def children(node):
+    for name in child_fields(node.__class__):
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            yield value
+        elif value.__class__ is list or value.__class__ is tuple:
+            yield from nodes_in(value)
+
+
+def nodes_in(items):
+    # lists of nodes, and the (declarator, initializer) pairs of Declaration.init_declarators
+    for item in items:
+        if isinstance(item, Node):
+            yield item
+        elif item.__class__ is list or item.__class__ is tuple:
+            yield from nodes_in(item)
+
+
+@lru_cache(maxsize=None)
+def handler(owner, prefix, cls):
+    # the <prefix>_<ClassName> method of owner for cls, trying the base classes of cls in
+    # MRO order, so visit_Node catches every node without a more specific method
+    for klass in cls.__mro__:
+        method = getattr(owner, f"{prefix}_{klass.__name__}", None)
+        if method is not None:
+            return method
+    return None
+
+
+class Visitor:
+    # visit() calls visit_<ClassName>(node) through a class -> method table that each
+    # visitor class fills once per node class; a method that wants the children visited
+    # calls generic_visit(node), which is also what runs for classes without a method
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+
+    dispatch = {}
+
+    def visit(self, node):
+        method = self.dispatch.get(node.__class__)
+        if method is None:
+            owner = self.__class__
+            method = owner.dispatch[node.__class__] = handler(owner, "visit", node.__class__) or owner.generic_visit
+        return method(self, node)
+
+    def generic_visit(self, node):
+        for child in children(node):
+            self.visit(child)
+
+
+class Transformer(Visitor):
+    # visit methods return the node that takes the place of the one visited; inside a list,
+    # None drops the item and a list is spliced in
+    def generic_visit(self, node):
+        for name in child_fields(node.__class__):
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                setattr(node, name, self.visit(value))
+            elif value.__class__ is list or value.__class__ is tuple:
+                setattr(node, name, self.transform_items(value))
+        return node
+
+    def transform_items(self, items):
+        if items.__class__ is tuple:
+            return tuple(self.visit(item) if isinstance(item, Node) else
+                         self.transform_items(item) if item.__class__ in (list, tuple) else item
+                         for item in items)
+        out = []
+        for item in items:
+            if isinstance(item, Node):
+                item = self.visit(item)
+                if item is None:
+                    continue
+                if item.__class__ is list:
+                    out.extend(item)
+                    continue
+            elif item.__class__ is list or item.__class__ is tuple:
+                item = self.transform_items(item)
+            out.append(item)
+        return out
+
+
+class Analysis:
+    # a pass that looks at the tree without steering the walk, which is what lets several
+    # of them share one traversal (see run_analyses): visit_<ClassName>(node) is called
+    # before the children of a node and leave_<ClassName>(node) after them
+    def result(self):
+        return self
+
+    def run(self, tree):
+        run_analyses(tree, [self])
+        return self.result()
+
+
+def run_analyses(tree, analyses):
+    # one preorder walk for all analyses; per node class the hooks of every analysis are
+    # gathered once, and classes no analysis cares about only cost the child iteration
+    hooks = {}
+
+    def hooks_for(cls):
+        enter = tuple(method.__get__(a) for a in analyses
+                      if (method := handler(a.__class__, "visit", cls)) is not None)
+        leave = tuple(method.__get__(a) for a in analyses
+                      if (method := handler(a.__class__, "leave", cls)) is not None)
+        entry = hooks[cls] = (enter, leave, child_fields(cls))
+        return entry
+
+    def walk(node):
+        entry = hooks.get(node.__class__) or hooks_for(node.__class__)
+        for hook in entry[0]:
+            hook(node)
+        for name in entry[2]:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                walk(value)
+            elif value.__class__ is list or value.__class__ is tuple:
+                walk_items(value)
+        for hook in entry[1]:
+            hook(node)
+
+    def walk_items(items):
+        for item in items:
+            if isinstance(item, Node):
+                walk(item)
+            elif item.__class__ is list or item.__class__ is tuple:
+                walk_items(item)
+
+    walk(tree)
+    return [a.result() for a in analyses]